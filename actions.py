@@ -6,7 +6,46 @@ if TYPE_CHECKING:
     from entity import Entity
 
 
+def melee(entity: Entity, target: Entity) -> None:
+    """Have entity attack target"""
+    entity.gamemap.engine.message(f"You kick the {target.name}, much to it's annoyance")
+
+
+def move(entity: Entity, dx: int, dy: int) -> None:
+    """Move entity by dx, dy if the destination is in bounds, walkable and free of blocking entities"""
+    game_map = entity.gamemap
+    dest_x, dest_y = entity.x + dx, entity.y + dy
+
+    if not game_map.in_bounds(dest_x, dest_y):
+        return  # Destination is out of bounds
+    if not game_map.tiles["walkable"][dest_x, dest_y]:
+        return  # Destination is blocked by a tile
+    if game_map.get_blocking_entity_at_location(dest_x, dest_y):
+        return  # Destination is blocked by an entity
+
+    entity.move(dx, dy)
+
+
+def bump(entity: Entity, dx: int, dy: int) -> None:
+    """
+    Attack whatever blocks the way, or move there if nothing does
+
+    This is BumpAction without any action objects, the destination and the blocking entity are each looked up once.
+    Scripted and AI driven actors can call it directly.
+    """
+    game_map = entity.gamemap
+    dest_x, dest_y = entity.x + dx, entity.y + dy
+    target = game_map.get_blocking_entity_at_location(dest_x, dest_y)
+    if target:
+        melee(entity, target)
+    elif game_map.in_bounds(dest_x, dest_y) and game_map.tiles["walkable"][dest_x, dest_y]:
+        entity.move(dx, dy)
+
+
 class Action:
+    # Actions are created for every key press and every scripted step, slots keep them small and quick to make
+    __slots__ = ("entity",)
+
     def __init__(self, entity: Entity):
         super().__init__()
         self.entity = entity
@@ -29,11 +68,44 @@ class Action:
 
 
 class EscapeAction(Action):
+    __slots__ = ()
+
     def perform(self) -> None:
         raise SystemExit
 
 
+class TakeStairsAction(Action):
+    """Go down the stairs the entity stands on if direction is 1, up them if it is -1"""
+    __slots__ = ("direction",)
+
+    def __init__(self, entity: Entity, direction: int):
+        super().__init__(entity)
+
+        self.direction = direction
+
+    def perform(self) -> None:
+        engine = self.engine
+        game_map = engine.game_map
+        stairs = game_map.downstairs_location if self.direction > 0 else game_map.upstairs_location
+        if engine.world is None or stairs != (self.entity.x, self.entity.y):
+            engine.message("There are no stairs here.")
+            return
+
+        if self.direction > 0:
+            engine.world.descend()
+            engine.message("You descend the staircase.")
+        else:
+            engine.world.ascend()
+            engine.message("You climb the staircase.")
+
+
 class ActionWithDirection(Action):
+    """
+    An action in a direction. These don't change once made, so the same one can be performed over and over, see
+    EventHandler's keymap
+    """
+    __slots__ = ("dx", "dy")
+
     def __init__(self, entity: Entity, dx: int, dy: int):
         super().__init__(entity)
 
@@ -55,6 +127,8 @@ class ActionWithDirection(Action):
 
 
 class MeleeAction(ActionWithDirection):
+    __slots__ = ()
+
     def perform(self) -> None:
         """Attempts to perform a melee action at destination, if there is an entity there to attack"""
         target = self.blocking_entity
@@ -62,27 +136,19 @@ class MeleeAction(ActionWithDirection):
         if not target:
             return  # There is no entity to attack
 
-        print(f"You kick the {target.name}, much to it's annoyance")
+        melee(self.entity, target)
 
 
 class MovementAction(ActionWithDirection):
-    def perform(self) -> None:
-        dest_x, dest_y = self.dest_xy
-
-        if not self.engine.game_map.in_bounds(dest_x, dest_y):
-            return  # Destination is out of bounds
-        if not self.engine.game_map.tiles["walkable"][dest_x, dest_y]:
-            return  # Destination is blocked by a tile
-        if self.engine.game_map.get_blocking_entity_at_location(dest_x, dest_y):
-            return  # Destination is blocked by an entity
+    __slots__ = ()
 
-        self.entity.move(self.dx, self.dy)
+    def perform(self) -> None:
+        move(self.entity, self.dx, self.dy)
 
 
 class BumpAction(ActionWithDirection):
+    __slots__ = ()
+
     def perform(self) -> None:
-        """Determines if MeleeAction or MovementAction should be called"""
-        if self.blocking_entity:
-            return MeleeAction(self.entity, self.dx, self.dy).perform()
-        else:
-            return MovementAction(self.entity, self.dx, self.dy).perform()
+        """Melee whatever blocks the destination, otherwise move there"""
+        bump(self.entity, self.dx, self.dy)
@@ -0,0 +1,7 @@
+"""
+Headless benchmarks. Run them from the repository root as modules, e.g.
+
+    python -m benchmarks.bench_spatial_index
+
+benchmarks.suite is the standard suite, with machine-readable results and a comparison against the stored baseline.
+"""
@@ -0,0 +1,93 @@
+"""
+Measure actions per second for key dispatch and for performing bumps, old style against the pooled actions
+
+The old style builds a new BumpAction per key press through an if/elif chain, and BumpAction.perform then built a
+MeleeAction or MovementAction that looked up the destination and the blocking entity again.
+
+    python -m benchmarks.bench_actions
+"""
+import random
+import time
+from types import SimpleNamespace
+
+import tcod.event
+
+from actions import ActionWithDirection, BumpAction, MeleeAction, MovementAction, bump
+import simulation
+
+ACTIONS = 200_000
+KEYS = [tcod.event.K_UP, tcod.event.K_DOWN, tcod.event.K_LEFT, tcod.event.K_RIGHT]
+DIRECTIONS = simulation.DIRECTIONS
+
+
+class OldBumpAction(ActionWithDirection):
+    __slots__ = ()
+
+    def perform(self) -> None:
+        if self.blocking_entity:
+            return MeleeAction(self.entity, self.dx, self.dy).perform()
+        else:
+            return MovementAction(self.entity, self.dx, self.dy).perform()
+
+
+def old_keydown(player, key):
+    if key == tcod.event.K_UP:
+        return OldBumpAction(player, dx=0, dy=-1)
+    elif key == tcod.event.K_DOWN:
+        return OldBumpAction(player, dx=0, dy=1)
+    elif key == tcod.event.K_LEFT:
+        return OldBumpAction(player, dx=-1, dy=0)
+    elif key == tcod.event.K_RIGHT:
+        return OldBumpAction(player, dx=1, dy=0)
+    return None
+
+
+def report(label: str, seconds: float) -> None:
+    print(f"{label:>28} {seconds * 1e3:>9.1f} {ACTIONS / seconds:>14,.0f}")
+
+
+def main() -> None:
+    rng = random.Random(0)
+    events = [SimpleNamespace(sym=rng.choice(KEYS)) for _ in range(ACTIONS)]
+    steps = [rng.choice(DIRECTIONS) for _ in range(ACTIONS)]
+    engine = simulation.new_game(0)
+    player = engine.player
+    handler = engine.event_handler
+
+    print(f"{ACTIONS} actions")
+    print(f"{'method':>28} {'ms':>9} {'actions/s':>14}")
+
+    start = time.perf_counter()
+    for event in events:
+        old_keydown(player, event.sym)
+    report("dispatch, if/elif + new", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for event in events:
+        handler.ev_keydown(event)
+    report("dispatch, keymap", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for dx, dy in steps:
+        OldBumpAction(player, dx, dy).perform()
+    report("perform, old BumpAction", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for dx, dy in steps:
+        BumpAction(player, dx, dy).perform()
+    report("perform, new BumpAction", time.perf_counter() - start)
+
+    pool = {(dx, dy): BumpAction(player, dx, dy) for dx, dy in DIRECTIONS}
+    start = time.perf_counter()
+    for step in steps:
+        pool[step].perform()
+    report("perform, pooled BumpAction", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for dx, dy in steps:
+        bump(player, dx, dy)
+    report("bump()", time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
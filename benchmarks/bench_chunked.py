@@ -0,0 +1,71 @@
+"""
+Walk the player across a ChunkedGameMap far bigger than memory, and show that memory use stays flat
+
+The player starts at the map's spawn point and walks east along the hub tunnels, which run through every chunk, past
+any monster in the way. Every so often the number of chunks generated so far, the number held in memory and the
+process's resident set size are printed. RSS is read from /proc, so this needs Linux.
+
+    python -m benchmarks.bench_chunked
+"""
+import time
+
+from chunked_map import ChunkedGameMap
+from engine import Engine
+import entity_factories
+import tile_types
+
+WORLD_SIZE = 16_384
+CHUNK_SIZE = 64
+STEPS = 8_000
+REPORT_EVERY = 1_000
+
+
+def rss_mib() -> float:
+    """The resident set size of this process"""
+    with open("/proc/self/statm") as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * 4096 / 2 ** 20
+
+
+def step_east(game_map: ChunkedGameMap) -> None:
+    """Move the player one tile east, or to the first free tile past whatever is blocking the way"""
+    player = game_map.engine.player
+    x = player.x + 1
+    while game_map.get_blocking_entity_at_location(x, player.y) is not None:
+        x += 1
+    if x == player.x + 1:
+        player.move(1, 0)
+    else:
+        player.place(x, player.y, game_map)
+
+
+def main() -> None:
+    engine = Engine(player=entity_factories.player.instantiate(), quiet=True)
+    game_map = ChunkedGameMap(engine, WORLD_SIZE, WORLD_SIZE, seed=0, chunk_size=CHUNK_SIZE)
+    engine.game_map = game_map
+    full_size = WORLD_SIZE * WORLD_SIZE * tile_types.tile_dt.itemsize / 2 ** 20
+    print(f"{WORLD_SIZE}x{WORLD_SIZE} world, {full_size:.0f} MiB of tiles if it were one array")
+    print(f"{'steps':>8} {'chunks made':>12} {'resident':>9} {'RSS MiB':>8} {'ms/step':>8}")
+    try:
+        engine.player.place(*game_map.spawn_point(), game_map)
+        engine.update_fov()
+        generated = set()
+        start = time.perf_counter()
+        for step in range(1, STEPS + 1):
+            step_east(game_map)
+            engine.handle_enemy_turns()
+            engine.update_fov()
+            generated.update((chunk.x, chunk.y) for chunk in game_map.resident_chunks())
+            if step % REPORT_EVERY == 0:
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{step:>8} {len(generated):>12} {len(game_map.resident_chunks()):>9} {rss_mib():>8.1f} "
+                    f"{elapsed / REPORT_EVERY * 1e3:>8.2f}"
+                )
+                start = time.perf_counter()
+    finally:
+        game_map.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Compare object-per-entity storage against the columnar EntityStore
+
+Reports memory per entity and the per-turn cost of selecting the actors, filtering them by FOV and building a
+collision grid.
+
+    python -m benchmarks.bench_entity_store
+"""
+import random
+import timeit
+import tracemalloc
+
+import numpy as np  # type: ignore
+
+from engine import Engine
+from entity import Entity
+from game_map import GameMap
+import entity_factories
+
+MAP_WIDTH = 500
+MAP_HEIGHT = 500
+REPEATS = 20
+
+
+def build_map(entity_count: int, columnar: bool) -> GameMap:
+    rng = random.Random(0)
+    player = Entity(char="@", name="Player", blocks_movement=True)
+    engine = Engine(player=player)
+    game_map = GameMap(engine, MAP_WIDTH, MAP_HEIGHT, entities=[player], columnar=columnar)
+    engine.game_map = game_map
+    game_map.visible[:250, :250] = True
+    for _ in range(entity_count):
+        entity_factories.orc.spawn(game_map, rng.randrange(MAP_WIDTH), rng.randrange(MAP_HEIGHT))
+    return game_map
+
+
+def object_blocking_grid(game_map: GameMap) -> np.ndarray:
+    grid = np.zeros((game_map.width, game_map.height), dtype=bool, order="F")
+    for entity in game_map.entities:
+        if entity.blocks_movement:
+            grid[entity.x, entity.y] = True
+    return grid
+
+
+def main() -> None:
+    print(f"{'entities':>10} {'mode':>9} {'bytes/ent':>10} {'actors ms':>10} {'visible ms':>11} {'grid ms':>8}")
+    for entity_count in (1_000, 10_000, 100_000):
+        for columnar in (False, True):
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            game_map = build_map(entity_count, columnar)
+            after = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            # Only count the entity data, not the map arrays which are the same in both modes
+            map_bytes = game_map.tiles.nbytes + game_map.visible.nbytes + game_map.explored.nbytes
+            per_entity = (after - before - map_bytes) / entity_count
+
+            actors = timeit.timeit(game_map.actors, number=REPEATS) / REPEATS
+            visible = timeit.timeit(game_map.visible_entities, number=REPEATS) / REPEATS
+            if columnar:
+                grid = timeit.timeit(
+                    lambda: game_map.entity_store.blocking_grid((MAP_WIDTH, MAP_HEIGHT)), number=REPEATS,
+                )
+            else:
+                grid = timeit.timeit(lambda: object_blocking_grid(game_map), number=REPEATS)
+            grid /= REPEATS
+
+            print(
+                f"{entity_count:>10} {'columnar' if columnar else 'objects':>9} {per_entity:>10.0f} "
+                f"{actors * 1e3:>10.2f} {visible * 1e3:>11.2f} {grid * 1e3:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare full map and windowed FOV in Engine.update_fov across map sizes and FOV algorithms
+
+    python -m benchmarks.bench_fov
+"""
+import random
+import timeit
+
+import numpy as np  # type: ignore
+import tcod
+
+from engine import Engine
+from entity import Entity
+from game_map import GameMap
+import tile_types
+
+STEPS = 200
+ALGORITHMS = {
+    "basic": tcod.constants.FOV_BASIC,
+    "shadow": tcod.constants.FOV_SHADOW,
+    "restrictive": tcod.constants.FOV_RESTRICTIVE,
+    "symmetric": tcod.constants.FOV_SYMMETRIC_SHADOWCAST,
+}
+
+
+def build_engine(size: int, algorithm: int, windowed: bool) -> Engine:
+    """A map of scattered pillars with the player walking a random path through it"""
+    rng = np.random.default_rng(0)
+    player = Entity(char="@", name="Player", blocks_movement=True)
+    engine = Engine(player=player, fov_algorithm=algorithm, fov_windowed=windowed)
+    game_map = GameMap(engine, size, size, entities=[player])
+    game_map.set_tiles(rng.random((size, size)) > 0.2, tile_types.floor)
+    engine.game_map = game_map
+    player.place(size // 2, size // 2, game_map)
+    return engine
+
+
+def walk(engine: Engine, steps) -> None:
+    for dx, dy in steps:
+        engine.player.move(dx, dy)
+        engine.update_fov()
+
+
+def main() -> None:
+    rng = random.Random(0)
+    # Walk back and forth so the player stays near the middle of the map
+    steps = [(rng.choice((-1, 1)), rng.choice((-1, 1))) for _ in range(STEPS // 2)]
+    steps += [(-dx, -dy) for dx, dy in reversed(steps)]
+
+    print(f"{'map':>10} {'algorithm':>12} {'full us/turn':>13} {'window us/turn':>15} {'same':>5}")
+    for size in (80, 250, 500, 1000):
+        for name, algorithm in ALGORITHMS.items():
+            results = []
+            for windowed in (False, True):
+                engine = build_engine(size, algorithm, windowed)
+                seconds = timeit.timeit(lambda: walk(engine, steps), number=1)
+                results.append((seconds / STEPS * 1e6, engine.game_map))
+            (full, full_map), (window, window_map) = results
+            same = np.array_equal(full_map.visible, window_map.visible) and np.array_equal(
+                full_map.explored, window_map.explored
+            )
+            print(f"{size}x{size:<5} {name:>12} {full:>13.1f} {window:>15.1f} {str(same):>5}")
+
+
+if __name__ == "__main__":
+    main()
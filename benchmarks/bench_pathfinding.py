@@ -0,0 +1,93 @@
+"""
+Compare per monster pathfinding against one shared FlowField, with 1000 monsters chasing the player on a 200x200 map
+
+    python -m benchmarks.bench_pathfinding
+"""
+import random
+import time
+
+import numpy as np  # type: ignore
+import tcod.path
+
+from engine import Engine
+from game_map import GameMap
+from pathfinding import FlowField
+import entity_factories
+from procgen import generate_dungeon
+
+MAP_WIDTH = 200
+MAP_HEIGHT = 200
+CHASERS = 1_000
+TURNS = 50
+
+
+def build_map(seed: int = 0) -> GameMap:
+    engine = Engine(player=entity_factories.player.instantiate(), quiet=True)
+    game_map = generate_dungeon(
+        max_rooms=120, room_min_size=6, room_max_size=14, map_width=MAP_WIDTH, map_height=MAP_HEIGHT,
+        max_monsters_per_room=0, engine=engine, seed=seed,
+    )
+    engine.game_map = game_map
+
+    rng = random.Random(seed)
+    xs, ys = np.nonzero(game_map.tiles["walkable"])
+    free = [(x, y) for x, y in zip(xs.tolist(), ys.tolist()) if not game_map.get_blocking_entity_at_location(x, y)]
+    picks = rng.sample(free, CHASERS)
+    entity_factories.spawn_many(
+        entity_factories.orc, game_map, [x for x, _ in picks], [y for _, y in picks],
+    )
+    return game_map
+
+
+def per_entity_step(game_map: GameMap) -> int:
+    """Every monster runs its own search to the player and takes the first step, like the tutorial's HostileEnemy"""
+    player = game_map.engine.player
+    cost = np.array(game_map.tiles["walkable"], dtype=np.int8)
+    for entity in game_map.entities:
+        if entity.blocks_movement:
+            cost[entity.x, entity.y] += 10  # Walk around other monsters where possible
+    moved = 0
+    for actor in game_map.actors():
+        graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
+        pathfinder = tcod.path.Pathfinder(graph)
+        pathfinder.add_root((actor.x, actor.y))
+        path = pathfinder.path_to((player.x, player.y))[1:].tolist()
+        if path:
+            dest_x, dest_y = path[0]
+            if not game_map.is_blocked(dest_x, dest_y):
+                actor.move(dest_x - actor.x, dest_y - actor.y)
+                moved += 1
+    return moved
+
+
+def main() -> None:
+    print(f"{CHASERS} chasers on a {MAP_WIDTH}x{MAP_HEIGHT} map, player moving every turn")
+    print(f"{'method':>22} {'ms/turn':>9} {'moves/turn':>11}")
+
+    game_map = build_map()
+    start = time.perf_counter()
+    moved = sum(per_entity_step(game_map) for _ in range(2))
+    elapsed = (time.perf_counter() - start) / 2
+    print(f"{'per monster search':>22} {elapsed * 1e3:>9.1f} {moved / 2:>11.1f}")
+
+    for label, player_moves in (("flow field", True), ("flow field, cached", False)):
+        game_map = build_map()
+        player = game_map.engine.player
+        field = FlowField()
+        actors = game_map.actors()
+        rng = random.Random(1)
+        moved = 0
+        start = time.perf_counter()
+        for _ in range(TURNS):
+            if player_moves:
+                dx, dy = rng.choice([(-1, 0), (1, 0), (0, -1), (0, 1)])
+                if game_map.tiles["walkable"][player.x + dx, player.y + dy]:
+                    player.move(dx, dy)  # Monsters are ignored, so the field has to follow the player every turn
+            field.update(game_map, player.x, player.y)
+            moved += field.step(game_map, actors)
+        elapsed = (time.perf_counter() - start) / TURNS
+        print(f"{label:>22} {elapsed * 1e3:>9.2f} {moved / TURNS:>11.1f}  ({field.recomputes} recomputes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Compare generate_dungeon against generate_dungeon_vectorized as maps and room counts grow
+
+    python -m benchmarks.bench_procgen
+"""
+import time
+
+from engine import Engine
+import entity_factories
+from procgen import generate_dungeon, generate_dungeon_vectorized
+
+# (map size, room attempts)
+CASES = [(80, 30), (250, 500), (500, 5_000), (1000, 20_000)]
+SLOW_LIMIT = 5_000  # Skip the pure Python generator above this many attempts, it takes too long to be useful
+
+
+def time_generation(generate, size: int, max_rooms: int, monsters: int):
+    engine = Engine(player=entity_factories.player.instantiate(), quiet=True)
+    start = time.perf_counter()
+    dungeon = generate(
+        max_rooms=max_rooms,
+        room_min_size=6,
+        room_max_size=10,
+        map_width=size,
+        map_height=size,
+        max_monsters_per_room=monsters,
+        engine=engine,
+        seed=0,
+    )
+    return time.perf_counter() - start, len(dungeon.entities)
+
+
+def main() -> None:
+    print(f"{'map':>10} {'attempts':>9} {'monsters':>9} {'python ms':>10} {'vectorized ms':>14}")
+    for size, max_rooms in CASES:
+        for monsters in (0, 2):
+            if max_rooms <= SLOW_LIMIT:
+                python_ms = f"{time_generation(generate_dungeon, size, max_rooms, monsters)[0] * 1e3:.1f}"
+            else:
+                python_ms = "-"
+            seconds, _ = time_generation(generate_dungeon_vectorized, size, max_rooms, monsters)
+            print(f"{size}x{size:<5} {max_rooms:>9} {monsters:>9} {python_ms:>10} {seconds * 1e3:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
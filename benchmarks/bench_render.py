@@ -0,0 +1,82 @@
+"""
+Compare GameMap.render against the buffered MapRenderer
+
+Reports frames per second and the bytes allocated per frame for several map sizes, rendering into an off-screen
+console. The FOV moves a little between frames, like it would while walking around.
+
+    python -m benchmarks.bench_render
+"""
+import random
+import time
+import tracemalloc
+
+import tcod
+
+from engine import Engine
+from entity import Entity
+from game_map import GameMap
+from renderer import MapRenderer
+import entity_factories
+import tile_types
+
+FRAMES = 30
+
+
+def build_map(width: int, height: int) -> GameMap:
+    rng = random.Random(0)
+    player = Entity(char="@", name="Player", blocks_movement=True)
+    engine = Engine(player=player)
+    game_map = GameMap(engine, width, height, entities=[player], columnar=True)
+    engine.game_map = game_map
+    game_map.set_tiles((slice(1, -1), slice(1, -1)), tile_types.floor)
+    game_map.explored[:] = True
+    for _ in range(width * height // 50):
+        entity_factories.orc.spawn(game_map, rng.randrange(width), rng.randrange(height))
+    return game_map
+
+
+def step_fov(game_map: GameMap, frame: int) -> None:
+    """Slide a 17x17 window of visibility across the map"""
+    game_map.visible[:] = False
+    x = frame % (game_map.width - 17)
+    game_map.visible[x: x + 17, 0:17] = True
+    game_map.mark_dirty(0, 0, game_map.width, game_map.height)  # Visible was written directly, redraw everything
+
+
+def measure(render, game_map: GameMap):
+    tracemalloc.start()
+    allocated = 0
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        step_fov(game_map, frame)
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        render(frame)
+        allocated += tracemalloc.get_traced_memory()[1] - base
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    return FRAMES / elapsed, allocated / FRAMES
+
+
+def main() -> None:
+    print(f"{'map':>10} {'mode':>9} {'fps':>9} {'KiB alloc/frame':>16}")
+    for width, height in ((80, 45), (200, 200), (500, 500), (1000, 1000)):
+        game_map = build_map(width, height)
+        console = tcod.Console(width, height, order="F")
+
+        def plain(frame):
+            game_map.render(console)
+            console.clear()
+
+        renderer = MapRenderer()
+
+        def buffered(frame):
+            renderer.render(console, game_map)
+
+        for mode, render in (("select", plain), ("buffered", buffered)):
+            fps, allocated = measure(render, game_map)
+            print(f"{width}x{height:<5} {mode:>9} {fps:>9.1f} {allocated / 1024:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
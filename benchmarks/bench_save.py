@@ -0,0 +1,99 @@
+"""
+Compare savegame.save_game/load_game against pickling the whole Engine
+
+The maps are columnar, as load_game returns them, so both sides load the same thing. The load times include reading
+every tile once, so the lazily memory-mapped arrays aren't given an unfair advantage. Every time is the best of several
+runs, with the garbage collector off during each as timeit does, and the two loads are timed in turns. The exit status
+is 1 if load_game isn't faster than unpickling on every map.
+
+    python -m benchmarks.bench_save
+"""
+import os
+import pickle
+import sys
+import tempfile
+import timeit
+from typing import Tuple
+
+import numpy as np  # type: ignore
+
+from engine import Engine
+import entity_factories
+from procgen import generate_dungeon_vectorized
+from savegame import load_game, save_game
+
+
+def build(size: int, compact: bool) -> Engine:
+    engine = Engine(player=entity_factories.player.instantiate(), quiet=True)
+    engine.game_map = generate_dungeon_vectorized(
+        max_rooms=size * size // 200, room_min_size=6, room_max_size=10, map_width=size, map_height=size,
+        max_monsters_per_room=2, engine=engine, seed=0, columnar=True, compact_tiles=compact,
+    )
+    engine.update_fov()
+    return engine
+
+
+def touch(engine: Engine) -> int:
+    """Read every tile once, forcing memory-mapped pages in"""
+    game_map = engine.game_map
+    return int(np.count_nonzero(game_map.explored)) + int(np.count_nonzero(game_map.tiles["walkable"]))
+
+
+def pickle_to(engine: Engine, path: str) -> None:
+    with open(path, "wb") as f:
+        pickle.dump(engine, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def pickle_from(path: str) -> Engine:
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def best(function, repeats: int = 15) -> float:
+    return min(timeit.repeat(function, number=1, repeat=repeats))
+
+
+def race(first, second, repeats: int = 25) -> Tuple[float, float]:
+    """The best times of two functions, timed in turns so that both see the same machine load"""
+    first_times, second_times = [], []
+    for _ in range(repeats):
+        first_times.append(timeit.timeit(first, number=1))
+        second_times.append(timeit.timeit(second, number=1))
+    return min(first_times), min(second_times)
+
+
+def main() -> int:
+    print(
+        f"{'map':>10} {'tiles':>8} {'pickle save ms':>15} {'pickle load ms':>15} {'save ms':>8} {'open ms':>8} "
+        f"{'load ms':>8} {'MiB':>6}"
+    )
+    slower = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "game.sav")
+        for size in (80, 250, 500, 1000):
+            for compact in (False, True):
+                engine = build(size, compact)
+
+                pickle_path = os.path.join(directory, "game.pickle")
+                pickle_save = best(lambda: pickle_to(engine, pickle_path))
+                save = best(lambda: save_game(engine, path))
+                opened = best(lambda: load_game(path))
+                pickle_load, load = race(lambda: touch(pickle_from(pickle_path)), lambda: touch(load_game(path)))
+                assert touch(load_game(path)) == touch(engine)
+                if load >= pickle_load:
+                    slower.append(f"{size}x{size} {'palette' if compact else 'full'}")
+
+                print(
+                    f"{size}x{size:<5} {'palette' if compact else 'full':>8} {pickle_save * 1e3:>15.2f} "
+                    f"{pickle_load * 1e3:>15.2f} {save * 1e3:>8.2f} {opened * 1e3:>8.2f} {load * 1e3:>8.2f} "
+                    f"{os.path.getsize(path) / 2 ** 20:>6.2f}"
+                )
+
+    if slower:
+        print(f"\nload_game is slower than pickle on: {', '.join(slower)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
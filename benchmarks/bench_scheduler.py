@@ -0,0 +1,71 @@
+"""
+Compare the cost of enemy turns between sweeping every actor and the TurnScheduler, as the population grows
+
+The player walks back and forth on an open map, so the number of actors near the player stays about the same while
+the total keeps growing.
+
+    python -m benchmarks.bench_scheduler
+"""
+import random
+import time
+
+from actions import BumpAction
+from engine import Engine
+from game_map import GameMap
+import entity_factories
+import tile_types
+
+MAP_WIDTH = 1000
+MAP_HEIGHT = 1000
+TURNS = 200
+
+
+def build_engine(entity_count: int) -> Engine:
+    rng = random.Random(0)
+    player = entity_factories.player.instantiate()
+    engine = Engine(player=player, fov_windowed=True, quiet=True)
+    game_map = GameMap(engine, MAP_WIDTH, MAP_HEIGHT)
+    engine.game_map = game_map
+    game_map.set_tiles(..., tile_types.floor)
+    player.place(MAP_WIDTH // 2, MAP_HEIGHT // 2, game_map)
+    xs = [rng.randrange(MAP_WIDTH) for _ in range(entity_count)]
+    ys = [rng.randrange(MAP_HEIGHT) for _ in range(entity_count)]
+    entity_factories.spawn_many(entity_factories.orc, game_map, xs, ys)
+    return engine
+
+
+def sweep_enemy_turns(engine: Engine) -> int:
+    """The old Engine.handle_enemy_turns, every actor on the map takes a turn"""
+    turns = 0
+    for entity in engine.game_map.actors():
+        engine.message(f'The {entity.name} wonders when it will get to take a real turn.')
+        turns += 1
+    return turns
+
+
+def main() -> None:
+    print(f"{'entities':>10} {'sweep ms':>9} {'sched ms':>9} {'turns/step':>11} {'woken':>6} {'awake':>6}")
+    for entity_count in (1_000, 10_000, 100_000):
+        engine = build_engine(entity_count)
+        player = engine.player
+
+        start = time.perf_counter()
+        for _ in range(TURNS):
+            sweep_enemy_turns(engine)
+        sweep = (time.perf_counter() - start) / TURNS
+
+        start = time.perf_counter()
+        for turn in range(TURNS):
+            BumpAction(player, 1 if turn % 20 < 10 else -1, 0).perform()
+            engine.handle_enemy_turns()
+        scheduled = (time.perf_counter() - start) / TURNS
+
+        stats = engine.scheduler.stats()
+        print(
+            f"{entity_count:>10} {sweep * 1e3:>9.3f} {scheduled * 1e3:>9.3f} "
+            f"{stats['actor_turns'] / TURNS:>11.1f} {stats['actors_woken']:>6} {stats['awake']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compare the GameMap spatial index against the old linear scan over every entity
+
+    python -m benchmarks.bench_spatial_index
+"""
+import random
+import timeit
+
+from engine import Engine
+from entity import Entity
+from game_map import GameMap
+import entity_factories
+
+MAP_WIDTH = 500
+MAP_HEIGHT = 500
+LOOKUPS = 2_000
+
+
+def linear_scan(game_map: GameMap, x: int, y: int):
+    """The lookup GameMap.get_blocking_entity_at_location used to do"""
+    for entity in game_map.entities:
+        if entity.blocks_movement and entity.x == x and entity.y == y:
+            return entity
+    return None
+
+
+def build_map(entity_count: int, rng: random.Random) -> GameMap:
+    player = Entity(char="@", name="Player", blocks_movement=True)
+    engine = Engine(player=player)
+    game_map = GameMap(engine, MAP_WIDTH, MAP_HEIGHT, entities=[player])
+    for _ in range(entity_count):
+        entity_factories.orc.spawn(game_map, rng.randrange(MAP_WIDTH), rng.randrange(MAP_HEIGHT))
+    return game_map
+
+
+def main() -> None:
+    rng = random.Random(0)
+    print(f"{'entities':>10} {'scan us/lookup':>16} {'index us/lookup':>16} {'move us':>10}")
+    for entity_count in (10, 100, 1_000, 10_000, 50_000):
+        game_map = build_map(entity_count, rng)
+        points = [(rng.randrange(MAP_WIDTH), rng.randrange(MAP_HEIGHT)) for _ in range(LOOKUPS)]
+
+        scan_lookups = min(LOOKUPS, max(20, 2_000_000 // entity_count))  # Keep the slow path bounded
+        scan = timeit.timeit(lambda: [linear_scan(game_map, x, y) for x, y in points[:scan_lookups]], number=1)
+        index = timeit.timeit(lambda: [game_map.get_blocking_entity_at_location(x, y) for x, y in points], number=1)
+
+        movers = list(game_map.entities)[:LOOKUPS]
+        move = timeit.timeit(lambda: [entity.move(1, 0) or entity.move(-1, 0) for entity in movers], number=1)
+
+        print(
+            f"{entity_count:>10} {scan / scan_lookups * 1e6:>16.3f} {index / LOOKUPS * 1e6:>16.3f} "
+            f"{move / (2 * len(movers)) * 1e6:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare spawning entities by deep copying a prototype against spawning them from a shared EntityTemplate
+
+    python -m benchmarks.bench_spawn
+"""
+import copy
+import random
+import time
+
+import numpy as np  # type: ignore
+
+from engine import Engine
+from game_map import GameMap
+import entity_factories
+
+MAP_WIDTH = 500
+MAP_HEIGHT = 500
+SPAWNS = 100_000
+
+
+class PrototypeEntity:
+    """The old style entity, every spawn deep copies the prototype and all of its fields"""
+    def __init__(self, char: str, color, name: str, blocks_movement: bool, speed: int = 100):
+        self.x = 0
+        self.y = 0
+        self.char = char
+        self.color = color
+        self.name = name
+        self.blocks_movement = blocks_movement
+        self.speed = speed
+
+    def spawn(self, gamemap: GameMap, x: int, y: int):
+        clone = copy.deepcopy(self)
+        clone.x = x
+        clone.y = y
+        clone.gamemap = gamemap
+        gamemap.add_entity(clone)
+        return clone
+
+
+def new_map(columnar: bool = False) -> GameMap:
+    engine = Engine(player=entity_factories.player.instantiate())
+    game_map = GameMap(engine, MAP_WIDTH, MAP_HEIGHT, columnar=columnar)
+    engine.game_map = game_map
+    return game_map
+
+
+def main() -> None:
+    rng = random.Random(0)
+    xs = [rng.randrange(MAP_WIDTH) for _ in range(SPAWNS)]
+    ys = [rng.randrange(MAP_HEIGHT) for _ in range(SPAWNS)]
+    template = entity_factories.orc
+    prototype = PrototypeEntity(**template._asdict())
+
+    def deepcopy_spawn(game_map: GameMap) -> None:
+        for x, y in zip(xs, ys):
+            prototype.spawn(game_map, x, y)
+
+    def template_spawn(game_map: GameMap) -> None:
+        for x, y in zip(xs, ys):
+            template.spawn(game_map, x, y)
+
+    def bulk_spawn(game_map: GameMap) -> None:
+        entity_factories.spawn_many(template, game_map, np.array(xs), np.array(ys))
+
+    print(f"{SPAWNS} spawns on a {MAP_WIDTH}x{MAP_HEIGHT} map")
+    print(f"{'method':>26} {'ms':>9} {'spawns/s':>12}")
+    baseline = None
+    for label, spawn, columnar in (
+            ("deepcopy prototype", deepcopy_spawn, False),
+            ("template spawn", template_spawn, False),
+            ("spawn_many", bulk_spawn, False),
+            ("template spawn, columnar", template_spawn, True),
+            ("spawn_many, columnar", bulk_spawn, True),
+    ):
+        game_map = new_map(columnar)
+        start = time.perf_counter()
+        spawn(game_map)
+        elapsed = time.perf_counter() - start
+        assert len(game_map.entities) == SPAWNS
+        baseline = baseline or elapsed
+        print(f"{label:>26} {elapsed * 1e3:>9.1f} {SPAWNS / elapsed:>12.0f}  ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
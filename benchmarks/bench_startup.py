@@ -0,0 +1,81 @@
+"""
+How long the game takes to start: the time spent importing, and the wall clock time until the first frames are shown
+
+main.py is launched with --startup-benchmark, which quits right after the first frame of the game and prints when the
+loading frame and that frame were shown. SDL's dummy video driver is used unless --window is given, so this runs
+without a display. Imports are timed separately with python -X importtime.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 20 --window
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def launch(window: bool) -> Dict[str, float]:
+    """Start the game once, returning the milliseconds from launch to each frame and to the process exiting"""
+    env = dict(os.environ)
+    if not window:
+        env["SDL_VIDEODRIVER"] = "dummy"
+    start = time.time()
+    result = subprocess.run(
+        [sys.executable, "main.py", "--startup-benchmark"], cwd=ROOT, env=env, capture_output=True, text=True,
+        check=True,
+    )
+    exited = time.time()
+    shown = json.loads(result.stdout.strip().splitlines()[-1])
+    times = {name: (when - start) * 1e3 for name, when in shown.items()}
+    times["exit"] = (exited - start) * 1e3
+    return times
+
+
+def import_times() -> Tuple[float, List[Tuple[float, str]]]:
+    """Return the total milliseconds to import main, and the self time of every module it imports"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    total = 0.0
+    modules = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((int(own) / 1e3, name.strip()))
+        if name.strip() == "main":
+            total = int(cumulative) / 1e3
+    return total, sorted(modules, reverse=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the game's startup")
+    parser.add_argument("--runs", type=int, default=10, help="Launches to take the median of")
+    parser.add_argument("--window", action="store_true", help="Open a real window instead of using SDL's dummy driver")
+    parser.add_argument("--top", type=int, default=10, help="How many of the slowest imports to list")
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.runs):
+        total, modules = import_times()
+        totals.append(total)
+    print(f"import main: {statistics.median(totals):.1f} ms median of {args.runs}, slowest modules of the last run:")
+    for own, name in modules[:args.top]:
+        print(f"    {own:>8.1f} ms  {name}")
+
+    runs = [launch(args.window) for _ in range(args.runs)]
+    print(f"\n{'from launch to':>16} {'median ms':>10} {'min ms':>10}")
+    for name in ("loading_frame", "first_frame", "exit"):
+        times = [run[name] for run in runs]
+        print(f"{name:>16} {statistics.median(times):>10.1f} {min(times):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
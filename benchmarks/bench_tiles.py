@@ -0,0 +1,54 @@
+"""
+Compare full tile_dt arrays against PaletteTiles: memory, mask reads, rendering and copying
+
+    python -m benchmarks.bench_tiles
+"""
+import pickle
+import timeit
+
+import numpy as np  # type: ignore
+import tcod
+
+from engine import Engine
+import entity_factories
+from procgen import generate_dungeon_vectorized
+
+REPEATS = 10
+
+
+def build(size: int, compact: bool):
+    engine = Engine(player=entity_factories.player.instantiate(), quiet=True)
+    game_map = generate_dungeon_vectorized(
+        max_rooms=size * size // 200, room_min_size=6, room_max_size=10, map_width=size, map_height=size,
+        max_monsters_per_room=0, engine=engine, seed=0, compact_tiles=compact,
+    )
+    engine.game_map = game_map
+    game_map.explored[:, : size // 2] = True
+    game_map.visible[: size // 4, : size // 4] = True
+    return game_map
+
+
+def main() -> None:
+    print(f"{'map':>10} {'tiles':>8} {'tile MiB':>9} {'walkable us':>12} {'render ms':>10} {'pickle ms':>10}")
+    for size in (80, 250, 500, 1000):
+        rendered = []
+        for compact in (False, True):
+            game_map = build(size, compact)
+            tiles = game_map.tiles
+            console = tcod.console.Console(size, size, order="F")
+
+            tiles["walkable"]  # Build the cached mask first, reads after that are what matters
+            walkable = timeit.timeit(lambda: tiles["walkable"], number=REPEATS) / REPEATS
+            render = timeit.timeit(lambda: game_map.render(console), number=REPEATS) / REPEATS
+            dump = timeit.timeit(lambda: pickle.dumps(tiles.ids if compact else tiles), number=REPEATS) / REPEATS
+            rendered.append(console.rgb.copy())
+
+            print(
+                f"{size}x{size:<5} {'palette' if compact else 'full':>8} {tiles.nbytes / 2 ** 20:>9.2f} "
+                f"{walkable * 1e6:>12.1f} {render * 1e3:>10.2f} {dump * 1e3:>10.2f}"
+            )
+        assert np.array_equal(*rendered), "Both representations must draw the same frame"
+
+
+if __name__ == "__main__":
+    main()
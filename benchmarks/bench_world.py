@@ -0,0 +1,41 @@
+"""
+How long taking the stairs down takes, with the next floor generated on the spot or ahead of time in the background
+
+    python -m benchmarks.bench_world
+"""
+import time
+
+from engine import Engine
+from world import World
+import entity_factories
+
+FLOORS = 5
+OPTIONS = dict(max_rooms=300, map_width=200, map_height=200)
+
+
+def descend_times(pregenerate: bool) -> list:
+    engine = Engine(player=entity_factories.player.instantiate(), quiet=True)
+    times = []
+    with World(engine, seed=0, max_loaded=2, pregenerate=pregenerate, **OPTIONS) as world:
+        world.enter(0)
+        for depth in range(1, FLOORS + 1):
+            if pregenerate:
+                world._pending[depth].result()  # The player spends long enough on a floor for the worker to finish
+            start = time.perf_counter()
+            world.descend()
+            engine.update_fov()
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def main() -> None:
+    size = f"{OPTIONS['map_width']}x{OPTIONS['map_height']}"
+    print(f"Taking the stairs down {FLOORS} times on {size} floors, keeping 2 in memory")
+    print(f"{'next floor':>22} {'mean ms':>9} {'max ms':>9}")
+    for label, pregenerate in (("generated on arrival", False), ("pregenerated", True)):
+        times = descend_times(pregenerate)
+        print(f"{label:>22} {sum(times) / len(times) * 1e3:>9.1f} {max(times) * 1e3:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
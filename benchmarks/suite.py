@@ -0,0 +1,413 @@
+"""
+The benchmark suite every performance change is judged by
+
+Runs headless, rendering into an off-screen tcod.Console, and covers dungeon generation, place_entities, the FOV,
+rendering, blocking entity lookups, full turns and replays of recorded games. Results are written as JSON, and can be
+compared against a baseline: any benchmark whose best time got slower by more than --threshold is timed again, and if
+it is still slower it is flagged and the exit status is 1.
+
+    python -m benchmarks.suite                           # Run everything and print the results
+    python -m benchmarks.suite --compare                 # Compare against benchmarks/baseline.json
+    python -m benchmarks.suite --output results.json     # Save the results, e.g. as a CI artifact
+    python -m benchmarks.suite --save-baseline           # Make this run the new baseline
+    python -m benchmarks.suite --filter fov              # Only run benchmarks whose name contains "fov"
+
+Timings depend on the machine, so only compare results from the same one. Refresh the baseline with
+--save-baseline after a deliberate change in performance, or when moving CI to different hardware.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np  # type: ignore
+import tcod
+
+from actions import BumpAction
+from camera import Camera
+from engine import Engine
+from game_map import GameMap
+from renderer import MapRenderer
+from world import World
+import entity_factories
+import map_analytics
+import procgen
+import replay
+import simulation
+import tile_types
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable[[], Callable[[], object]]  # Untimed, returns the function to time
+    number: int  # Calls of the timed function per repeat
+    repeats: int
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str, number: int = 1, repeats: int = 7):
+    """Register a setup function with the suite. It runs before every repeat, and returns what gets timed"""
+    def register(setup: Callable[[], Callable[[], object]]) -> Callable[[], Callable[[], object]]:
+        BENCHMARKS.append(Benchmark(name, setup, number, repeats))
+        return setup
+    return register
+
+
+def new_engine() -> Engine:
+    return Engine(player=entity_factories.player.instantiate(), quiet=True)
+
+
+def open_map(width: int, height: int, entity_count: int = 0, seed: int = 0) -> GameMap:
+    """A map of floor with the player in the middle and entity_count orcs scattered over it"""
+    rng = random.Random(seed)
+    engine = new_engine()
+    game_map = GameMap(engine, width, height)
+    engine.game_map = game_map
+    game_map.set_tiles((slice(1, -1), slice(1, -1)), tile_types.floor)
+    engine.player.place(width // 2, height // 2, game_map)
+    xs = [rng.randrange(1, width - 1) for _ in range(entity_count)]
+    ys = [rng.randrange(1, height - 1) for _ in range(entity_count)]
+    entity_factories.spawn_many(entity_factories.orc, game_map, xs, ys)
+    return game_map
+
+
+# Dungeon generation: (width, height, max rooms, calls per repeat)
+for _width, _height, _rooms, _number in ((80, 45, 30, 20), (200, 200, 120, 5), (500, 500, 800, 1)):
+    def _generate(width=_width, height=_height, rooms=_rooms):
+        engine = new_engine()
+        return lambda: procgen.generate_dungeon(
+            max_rooms=rooms, room_min_size=6, room_max_size=10, map_width=width, map_height=height,
+            max_monsters_per_room=2, engine=engine, seed=0,
+        )
+    benchmark(f"generate_dungeon/{_width}x{_height}/{_rooms}_rooms", number=_number)(_generate)
+
+
+# place_entities on 200 rooms of a fresh map, for a few monster counts
+for _monsters in (2, 10):
+    def _place(monsters=_monsters):
+        game_map = open_map(300, 300)
+        rooms = [procgen.RectangularRoom(x * 15, y * 15, 10, 10) for x in range(20) for y in range(10)]
+        rng = random.Random(0)
+
+        def run():
+            for room in rooms:
+                procgen.place_entities(room, game_map, monsters, rng)
+        return run
+    benchmark(f"place_entities/200_rooms/{_monsters}_max")(_place)
+
+
+# Engine.update_fov, alternating between two spots so every call recomputes
+for _size in (80, 500):
+    for _windowed in (False, True):
+        def _fov(size=_size, windowed=_windowed):
+            game_map = open_map(size, size)
+            engine = game_map.engine
+            engine.fov_windowed = windowed
+            player = engine.player
+            spots = [(size // 2, size // 2), (size // 2 + 1, size // 2)]
+
+            def run():
+                for x, y in spots:
+                    player.place(x, y)
+                    engine.update_fov()
+            return run
+        _number = 50 if _size == 500 and not _windowed else 500  # About 25 ms a repeat
+        benchmark(f"update_fov/{_size}x{_size}/{'windowed' if _windowed else 'full'}", number=_number)(_fov)
+
+
+# GameMap.render into an off-screen console's tiles_rgb: (width, height, calls per repeat)
+for _width, _height, _number in ((80, 45, 100), (500, 500, 20)):
+    def _render(width=_width, height=_height):
+        game_map = open_map(width, height, entity_count=width * height // 50)
+        game_map.engine.update_fov()
+        game_map.explored[:] = True
+        console = tcod.Console(width, height, order="F")
+        return lambda: game_map.render(console)
+    benchmark(f"render/{_width}x{_height}", number=_number)(_render)
+
+
+# A player step, the FOV update and a MapRenderer frame, which only redraws the dirty area around the player
+@benchmark("render/500x500/step_fov_buffered", number=50)
+def _buffered_frame():
+    game_map = open_map(500, 500, entity_count=5000)
+    engine = game_map.engine
+    engine.update_fov()
+    console = tcod.Console(500, 500, order="F")
+    renderer = MapRenderer()
+    renderer.render(console, game_map)
+    steps = [(1, 0), (-1, 0)]
+
+    def run():
+        for dx, dy in steps:
+            engine.player.move(dx, dy)
+            engine.update_fov()
+            renderer.render(console, game_map)
+    return run
+
+
+# A MapRenderer frame through an 80x50 camera scrolling with the player, which should cost the same on any map size
+for _size in (200, 1000, 2000):
+    def _camera_frame(size=_size):
+        game_map = open_map(size, size, entity_count=size * size // 50)
+        engine = game_map.engine
+        engine.fov_windowed = True  # Otherwise the FOV, not the frame, grows with the map
+        engine.update_fov()
+        game_map.explored[:] = True
+        camera = Camera(80, 50)
+        console = tcod.Console(80, 50, order="F")
+        renderer = MapRenderer()
+        steps = [(1, 0), (-1, 0)]
+
+        def run():
+            for dx, dy in steps:
+                engine.player.move(dx, dy)
+                engine.update_fov()
+                camera.follow(game_map, engine.player.x, engine.player.y)
+                renderer.render(console, game_map, camera)
+        return run
+    benchmark(f"render/camera_80x50/{_size}x{_size}", number=50)(_camera_frame)
+
+
+# Building a generated map's analytics, and 1000 queries of each kind against them
+@benchmark("analytics/500x500/build")
+def _analytics_build():
+    engine = new_engine()
+    game_map = procgen.generate_dungeon_vectorized(
+        max_rooms=800, room_min_size=6, room_max_size=10, map_width=500, map_height=500, max_monsters_per_room=0,
+        engine=engine, seed=0,
+    )
+    return lambda: map_analytics.MapAnalytics(game_map)
+
+
+@benchmark("analytics/500x500/1000_queries", number=50)
+def _analytics_queries():
+    engine = new_engine()
+    game_map = procgen.generate_dungeon_vectorized(
+        max_rooms=800, room_min_size=6, room_max_size=10, map_width=500, map_height=500, max_monsters_per_room=0,
+        engine=engine, seed=0,
+    )
+    rng = random.Random(1)
+    spots = [(rng.randrange(500), rng.randrange(500)) for _ in range(1000)]
+    player_x, player_y = engine.player.x, engine.player.y
+    game_map.analytics  # Built untimed
+
+    def run():
+        analytics = game_map.analytics
+        for x, y in spots:
+            analytics.is_reachable(player_x, player_y, x, y)
+            analytics.room_at(x, y)
+            analytics.nearest_room_to(x, y)
+    return run
+
+
+# 1000 blocking entity lookups at random spots, at several entity counts
+for _entities in (100, 10_000, 100_000):
+    def _lookup(entities=_entities):
+        game_map = open_map(500, 500, entity_count=entities)
+        rng = random.Random(1)
+        spots = [(rng.randrange(500), rng.randrange(500)) for _ in range(1000)]
+        lookup = game_map.get_blocking_entity_at_location
+
+        def run():
+            for x, y in spots:
+                lookup(x, y)
+        return run
+    benchmark(f"get_blocking_entity_at_location/{_entities}_entities", number=100)(_lookup)
+
+
+# Full turns: the player's action, the enemy turns and the FOV
+def _turns(engine: Engine) -> Callable[[], None]:
+    rng = random.Random(2)
+    actions = [BumpAction(engine.player, dx, dy) for dx, dy in simulation.DIRECTIONS]
+
+    def run():
+        for _ in range(100):
+            engine.perform_turn(rng.choice(actions))
+    return run
+
+
+@benchmark("turn/80x45_dungeon/100_turns", number=10)
+def _dungeon_turns():
+    return _turns(simulation.new_game(0))
+
+
+@benchmark("turn/200x200_open/2000_chasers/100_turns")
+def _chase_turns():
+    game_map = open_map(200, 200, entity_count=2000)
+    engine = game_map.engine
+    engine.chase = True
+    engine.update_fov()
+    return _turns(engine)
+
+
+def recorded_game(turns: int, seed: int = 0) -> replay.Replay:
+    """Record a random walk game of the given number of turns, the same way main.py --record does"""
+    engine = new_engine()
+    policy = simulation.RandomWalkPolicy(seed)
+    with tempfile.TemporaryDirectory(prefix="replay-") as directory:
+        path = os.path.join(directory, "game.replay")
+        with World(engine, seed=seed, pregenerate=False) as world:
+            engine.world = world
+            world.enter(0)
+            engine.update_fov()
+            with replay.ReplayRecorder(path, world.seed, world.generation_options) as recorder:
+                for _ in range(turns):
+                    action = policy(engine)
+                    recorder.record(action)
+                    engine.perform_turn(action)
+        return replay.read_replay(path)
+
+
+# Replaying a recorded game headlessly: the actions, enemy turns and FOV of a real session, without rendering
+for _skip_fov in (False, True):
+    def _replay(skip_fov=_skip_fov):
+        recorded = recorded_game(1000)
+        return lambda: replay.play(recorded, skip_fov=skip_fov)
+    benchmark(f"replay/80x45_dungeon/1000_turns/{'final_fov' if _skip_fov else 'every_fov'}")(_replay)
+
+
+def time_repeat(bench: Benchmark) -> float:
+    """Time one repeat of a benchmark and return seconds per call of its timed function"""
+    run = bench.setup()
+    # As timeit does, so a collection triggered by garbage from the setup isn't charged to the timed code
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(bench.number):
+            run()
+        return (time.perf_counter() - start) / bench.number
+    finally:
+        gc.enable()
+
+
+def run_benchmarks(benches: List[Benchmark]) -> Dict[str, dict]:
+    """
+    Time every benchmark, taking one repeat of each in turn rather than all the repeats of one in a row
+
+    The speed of a shared machine drifts over seconds. Spread out like this, every benchmark gets repeats from all
+    through the run, and the fastest of them is a fair measure of the code rather than of when it happened to run.
+    """
+    times: Dict[str, List[float]] = {bench.name: [] for bench in benches}
+    for repeat in range(max((bench.repeats for bench in benches), default=0)):
+        for bench in benches:
+            if repeat < bench.repeats:
+                times[bench.name].append(time_repeat(bench))
+    return {
+        bench.name: {
+            "median_s": statistics.median(times[bench.name]),
+            "min_s": min(times[bench.name]),
+            "number": bench.number,
+            "repeats": bench.repeats,
+        }
+        for bench in benches
+    }
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "tcod": tcod.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def regressed(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Return the names of the benchmarks whose best time got slower than the baseline's by more than threshold"""
+    return [
+        name for name, result in results.items()
+        if name in baseline and result["min_s"] / baseline[name]["min_s"] - 1 > threshold
+    ]
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """
+    Print current against baseline best times and return the names of the benchmarks that regressed
+
+    The best of the repeats is compared rather than the median: noise only ever makes code slower, so the best is
+    the steadiest measure of what the code itself costs.
+    """
+    regressions = regressed(results, baseline, threshold)
+    print(f"\n{'benchmark':<52} {'baseline ms':>12} {'current ms':>11} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<52} {'-':>12} {result['min_s'] * 1e3:>11.3f} {'new':>8}")
+            continue
+        before, after = baseline[name]["min_s"], result["min_s"]
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:<52} {before * 1e3:>12.3f} {after * 1e3:>11.3f} {after / before - 1:>+8.1%}{flag}")
+    return regressions
+
+
+def retime(results: Dict[str, dict], names: List[str]) -> None:
+    """
+    Time the named benchmarks again, keeping whichever run was faster
+
+    A burst of load on the machine can slow down a few benchmarks of a run, but it rarely hits the same ones twice,
+    while a real slowdown shows up every time.
+    """
+    again = run_benchmarks([bench for bench in BENCHMARKS if bench.name in names])
+    for name, result in again.items():
+        if result["min_s"] < results[name]["min_s"]:
+            results[name] = result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file")
+    parser.add_argument(
+        "--compare", nargs="?", const=BASELINE_PATH, default=None,
+        help="Compare against a results file, benchmarks/baseline.json by default",
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="Slowdown that counts as a regression, 0.2 is 20%% slower",
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to benchmarks/baseline.json")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks([bench for bench in BENCHMARKS if args.filter in bench.name])
+    print(f"{'benchmark':<52} {'median ms':>10} {'min ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<52} {result['median_s'] * 1e3:>10.3f} {result['min_s'] * 1e3:>10.3f}")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        suspects = regressed(results, baseline, args.threshold)
+        if suspects:
+            print(f"\nTiming {len(suspects)} possible regression(s) again: {', '.join(suspects)}")
+            retime(results, suspects)
+
+    document = {"environment": environment(), "results": results}
+    for path in filter(None, (args.output, BASELINE_PATH if args.save_baseline else None)):
+        with open(path, "w") as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+from __future__ import annotations
+from typing import Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+
+class Camera:
+    """
+    The window of the map that is shown on the console, kept centered on a point such as the player
+
+    The window never goes past the edges of the map, and a map smaller than the camera is shown whole from the top left
+    corner. Rendering through a camera only ever touches the window, so its cost doesn't depend on the size of the map.
+    """
+    def __init__(self, width: int, height: int):
+        self.width = width  # The size of the console area the map is drawn into
+        self.height = height
+        self.x = 0  # The map position of the window's top left corner
+        self.y = 0
+        self.view_width = width  # The size of the window, smaller than the camera if the map is
+        self.view_height = height
+
+    def follow(self, game_map: GameMap, x: int, y: int) -> None:
+        """Center the window on (x, y) of game_map, as far as the edges of the map allow"""
+        self.view_width = min(self.width, game_map.width)
+        self.view_height = min(self.height, game_map.height)
+        self.x = min(max(0, x - self.view_width // 2), game_map.width - self.view_width)
+        self.y = min(max(0, y - self.view_height // 2), game_map.height - self.view_height)
+
+    @property
+    def window(self) -> Tuple[slice, slice]:
+        """The part of the map in view, for slicing the map's arrays without copying them"""
+        return slice(self.x, self.x + self.view_width), slice(self.y, self.y + self.view_height)
+
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """The part of the map in view as a half open (x1, y1, x2, y2) rectangle"""
+        return self.x, self.y, self.x + self.view_width, self.y + self.view_height
+
+    def to_screen(self, x: int, y: int) -> Tuple[int, int]:
+        """Convert a map position to a console position"""
+        return x - self.x, y - self.y
+
+    def to_map(self, x: int, y: int) -> Tuple[int, int]:
+        """Convert a console position, such as where the mouse is, to a map position"""
+        return x + self.x, y + self.y
@@ -0,0 +1,333 @@
+from __future__ import annotations
+from collections import OrderedDict
+import json
+import os
+import random
+import shutil
+import tempfile
+from typing import Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+from tcod.console import Console
+
+from camera import Camera
+from entity import Entity, EntityTemplate
+from game_map import GameMap
+import procgen
+from spatial_index import SpatialIndex
+import tile_types
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+
+class Chunk:
+    """The tiles and FOV state of one chunk_size x chunk_size block of a ChunkedGameMap"""
+    def __init__(self, x: int, y: int, tiles: np.ndarray, explored: np.ndarray):
+        self.x = x  # The world position of this chunk's top left tile
+        self.y = y
+        self.tiles = tiles
+        self.explored = explored
+        self.visible = np.zeros(tiles.shape, dtype=bool, order="F")  # Not persisted, the FOV is recomputed anyway
+
+
+class ChunkedLayer:
+    """
+    One array of a ChunkedGameMap, such as its tiles or explored tiles, indexed like a (width, height) NumPy array
+
+    Supports [x, y] with ints or slices (reads return a copy, writes are split across the chunks they touch) and [:]
+    for the chunks currently in memory. field picks a field out of the tile records, such as "walkable".
+    """
+    def __init__(self, gamemap: ChunkedGameMap, name: str, field: Optional[str] = None):
+        self.gamemap = gamemap
+        self.name = name
+        self.field = field
+
+    def _array(self, chunk: Chunk) -> np.ndarray:
+        array = getattr(chunk, self.name)
+        return array[self.field] if self.field else array
+
+    def _dtype(self) -> np.dtype:
+        if self.name != "tiles":
+            return np.dtype(bool)
+        return tile_types.tile_dt[self.field] if self.field else tile_types.tile_dt
+
+    def _window(self, key) -> Tuple[slice, slice]:
+        if isinstance(key, slice) and key == slice(None):
+            raise IndexError("A chunked map can't be read or written as a whole")
+        x, y = key
+        return _as_slice(x, self.gamemap.width), _as_slice(y, self.gamemap.height)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple) and isinstance(key[0], (int, np.integer)) and isinstance(key[1], (int, np.integer)):
+            x, y = int(key[0]), int(key[1])
+            chunk = self.gamemap.chunk_at(x, y)
+            return self._array(chunk)[x - chunk.x, y - chunk.y]
+
+        x_slice, y_slice = self._window(key)
+        result = np.empty(
+            (x_slice.stop - x_slice.start, y_slice.stop - y_slice.start), dtype=self._dtype(), order="F",
+        )
+        for chunk, world, local in self.gamemap.chunks_in(x_slice, y_slice):
+            result[world[0].start - x_slice.start: world[0].stop - x_slice.start,
+                   world[1].start - y_slice.start: world[1].stop - y_slice.start] = self._array(chunk)[local]
+        return result
+
+    def __setitem__(self, key, value) -> None:
+        if isinstance(key, slice) and key == slice(None):
+            # Only the chunks in memory can hold anything that needs resetting, such as the visible tiles
+            for chunk in self.gamemap.resident_chunks():
+                self._array(chunk)[...] = value
+            return
+
+        if isinstance(key, tuple) and isinstance(key[0], (int, np.integer)) and isinstance(key[1], (int, np.integer)):
+            x, y = int(key[0]), int(key[1])
+            chunk = self.gamemap.chunk_at(x, y)
+            self._array(chunk)[x - chunk.x, y - chunk.y] = value
+            return
+
+        x_slice, y_slice = self._window(key)
+        value = np.asarray(value)
+        for chunk, world, local in self.gamemap.chunks_in(x_slice, y_slice):
+            if value.ndim >= 2:
+                part = value[world[0].start - x_slice.start: world[0].stop - x_slice.start,
+                             world[1].start - y_slice.start: world[1].stop - y_slice.start]
+            else:
+                part = value
+            self._array(chunk)[local] = part
+
+
+class ChunkedTiles(ChunkedLayer):
+    """The tiles layer, tiles["walkable"] and friends return a layer for that field"""
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return ChunkedLayer(self.gamemap, "tiles", field=key)
+        return super().__getitem__(key)
+
+
+def _as_slice(index, size: int) -> slice:
+    """Turn an int or slice along one axis into a slice clipped to the map"""
+    if isinstance(index, slice):
+        start, stop, step = index.indices(size)
+        if step != 1:
+            raise IndexError("Chunked maps don't support slice steps")
+        return slice(start, max(start, stop))
+    index = int(index)
+    return slice(index, index + 1)
+
+
+class ChunkedGameMap(GameMap):
+    """
+    A GameMap which is split into chunks that are generated on demand and kept on disk when not in use
+
+    Only the max_chunks most recently used chunks are kept in memory. When a chunk is evicted its tiles and explored
+    tiles are written to cache_dir as .npy files, and the entities standing on it are saved and removed from the map.
+    Touching it again memory-maps the files back in, so memory use stays bounded no matter how big the world is.
+
+    tiles, visible and explored are ChunkedLayer objects rather than arrays, so they only support the window style
+    indexing used by the rest of the game. The FOV is always computed in windowed mode on these maps. A MapRenderer can
+    draw them, but only through a Camera, as a buffer the size of the whole world is what this class avoids.
+    """
+    def __init__(
+            self,
+            engine: Engine,
+            width: int,
+            height: int,
+            seed: int = 0,
+            chunk_size: int = 64,
+            max_chunks: int = 64,
+            cache_dir: Optional[str] = None,
+            max_rooms: int = 8,
+            room_min_size: int = 6,
+            room_max_size: int = 10,
+            max_monsters_per_room: int = 2,
+    ):
+        # GameMap.__init__ is skipped on purpose, it would allocate full size arrays
+        self.engine = engine
+        self.width = width
+        self.height = height
+        self.entity_store = None
+        self.entities = self.unstored_entities = set()
+        self.entity_index = SpatialIndex()
+        self.tiles_version = 0
+        # In world positions like on any map. A MapRenderer only ever looks at the part inside its camera's window
+        self.dirty: Optional[Tuple[int, int, int, int]] = (0, 0, width, height)
+        self.downstairs_location = None  # A chunked world is a single floor
+        self.upstairs_location = None
+        self.rooms = []  # Rooms are generated per chunk and not tracked, nor is analytics supported
+        self._analytics = None
+
+        engine.fov_windowed = True  # A full map FOV would touch every chunk
+
+        self.seed = seed
+        self.chunk_size = chunk_size
+        # The FOV window and the screen can straddle several chunks at once, and so can the area monsters chase the
+        # player in. All of that has to fit, or reading the chase area would unload monsters that are about to move
+        self.max_chunks = max(max_chunks, 9, self.chunks_across(2 * engine.chase_radius + 1) ** 2)
+        self.generation_options = dict(
+            max_rooms=max_rooms,
+            room_min_size=room_min_size,
+            room_max_size=room_max_size,
+            max_monsters_per_room=max_monsters_per_room,
+        )
+
+        self._owns_cache_dir = cache_dir is None
+        self.cache_dir = cache_dir or tempfile.mkdtemp(prefix="chunks-")
+        self._chunks: OrderedDict[Tuple[int, int], Chunk] = OrderedDict()
+        self._last_chunk: Optional[Chunk] = None  # Repeated lookups tend to hit the same chunk
+
+        self.tiles = ChunkedTiles(self, "tiles")
+        self.visible = ChunkedLayer(self, "visible")
+        self.explored = ChunkedLayer(self, "explored")
+
+    def close(self) -> None:
+        """Drop every chunk, and the cache directory if this map created it"""
+        self._chunks.clear()
+        self._last_chunk = None
+        if self._owns_cache_dir:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def chunks_across(self, tiles: int) -> int:
+        """The most chunks a window this many tiles wide can straddle along one axis"""
+        return (tiles - 2) // self.chunk_size + 2
+
+    def resident_chunks(self) -> List[Chunk]:
+        """The chunks currently held in memory"""
+        return list(self._chunks.values())
+
+    def spawn_point(self) -> Tuple[int, int]:
+        """The hub of the chunk at the middle of the world, which is always floor"""
+        size = self.chunk_size
+        chunk_x, chunk_y = (self.width // 2) // size, (self.height // 2) // size
+        chunk = self.chunk(chunk_x, chunk_y)
+        return chunk.x + chunk.tiles.shape[0] // 2, chunk.y + chunk.tiles.shape[1] // 2
+
+    def chunk_at(self, x: int, y: int) -> Chunk:
+        """Return the chunk holding the tile at x, y"""
+        chunk = self._last_chunk
+        if chunk is not None and 0 <= x - chunk.x < self.chunk_size and 0 <= y - chunk.y < self.chunk_size:
+            return chunk
+        if not self.in_bounds(x, y):
+            raise IndexError(f"{x}, {y} is outside of the map")
+        return self.chunk(x // self.chunk_size, y // self.chunk_size)
+
+    def chunks_in(
+            self, x_slice: slice, y_slice: slice,
+    ) -> Iterator[Tuple[Chunk, Tuple[slice, slice], Tuple[slice, slice]]]:
+        """Yield each chunk overlapping the window, with the overlap in world and in chunk coordinates"""
+        size = self.chunk_size
+        if x_slice.start >= x_slice.stop or y_slice.start >= y_slice.stop:
+            return
+        for chunk_x in range(x_slice.start // size, (x_slice.stop - 1) // size + 1):
+            for chunk_y in range(y_slice.start // size, (y_slice.stop - 1) // size + 1):
+                chunk = self.chunk(chunk_x, chunk_y)
+                x1, x2 = max(x_slice.start, chunk.x), min(x_slice.stop, chunk.x + chunk.tiles.shape[0])
+                y1, y2 = max(y_slice.start, chunk.y), min(y_slice.stop, chunk.y + chunk.tiles.shape[1])
+                yield (
+                    chunk,
+                    (slice(x1, x2), slice(y1, y2)),
+                    (slice(x1 - chunk.x, x2 - chunk.x), slice(y1 - chunk.y, y2 - chunk.y)),
+                )
+
+    def chunk(self, chunk_x: int, chunk_y: int) -> Chunk:
+        """Return a chunk by its chunk coordinates, loading or generating it if needed"""
+        key = (chunk_x, chunk_y)
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+        else:
+            chunk = self._load(chunk_x, chunk_y)
+            if chunk is None:
+                chunk = self._generate(chunk_x, chunk_y)
+            self._chunks[key] = chunk
+            while len(self._chunks) > self.max_chunks:
+                self._evict(*next(iter(self._chunks)))
+        self._last_chunk = chunk
+        return chunk
+
+    def _chunk_dir(self, chunk_x: int, chunk_y: int) -> str:
+        return os.path.join(self.cache_dir, f"{chunk_x}_{chunk_y}")
+
+    def _generate(self, chunk_x: int, chunk_y: int) -> Chunk:
+        # Each chunk gets its own generator, so it comes out the same whatever order chunks are visited in
+        rng = random.Random(f"{self.seed}:{chunk_x}:{chunk_y}")
+        tiles = procgen.generate_chunk(self, chunk_x, chunk_y, self.chunk_size, rng=rng, **self.generation_options)
+        return Chunk(
+            chunk_x * self.chunk_size, chunk_y * self.chunk_size, tiles, np.zeros(tiles.shape, dtype=bool, order="F"),
+        )
+
+    def _load(self, chunk_x: int, chunk_y: int) -> Optional[Chunk]:
+        path = self._chunk_dir(chunk_x, chunk_y)
+        if not os.path.isdir(path):
+            return None
+
+        # Memory map the arrays, pages are only read in as they are touched and writes go straight back to the file
+        tiles = np.load(os.path.join(path, "tiles.npy"), mmap_mode="r+")
+        explored = np.load(os.path.join(path, "explored.npy"), mmap_mode="r+")
+        chunk = Chunk(chunk_x * self.chunk_size, chunk_y * self.chunk_size, tiles, explored)
+
+        with open(os.path.join(path, "entities.json")) as f:
+            for x, y, char, color, *fields in json.load(f):
+                EntityTemplate(char, tuple(color), *fields).spawn(self, x, y)
+        return chunk
+
+    def _evict(self, chunk_x: int, chunk_y: int) -> None:
+        chunk = self._chunks.pop((chunk_x, chunk_y))
+        if self._last_chunk is chunk:
+            self._last_chunk = None
+
+        path = self._chunk_dir(chunk_x, chunk_y)
+        if isinstance(chunk.tiles, np.memmap):
+            chunk.tiles.flush()
+            chunk.explored.flush()
+        else:
+            os.makedirs(path, exist_ok=True)
+            np.save(os.path.join(path, "tiles.npy"), chunk.tiles)
+            np.save(os.path.join(path, "explored.npy"), chunk.explored)
+
+        # Entities leave memory with their chunk, except the player
+        width, height = chunk.tiles.shape
+        leaving = [
+            entity for entity in self.entity_index.entities_in_rect(chunk.x, chunk.y, chunk.x + width, chunk.y + height)
+            if entity is not self.engine.player
+        ]
+        with open(os.path.join(path, "entities.json"), "w") as f:
+            json.dump([(entity.x, entity.y, *entity.template) for entity in leaving], f)
+        for entity in leaving:
+            self.remove_entity(entity)
+
+    def _mark_entity_tile(self, x: int, y: int) -> None:
+        """The same as GameMap's, but only visible tiles are dirty and those are all in chunks that are in memory"""
+        if not self.in_bounds(x, y):
+            return
+        chunk = self._chunks.get((x // self.chunk_size, y // self.chunk_size))
+        if chunk is not None and chunk.visible[x - chunk.x, y - chunk.y]:
+            self.mark_dirty(x, y, x + 1, y + 1)
+
+    def visible_entities(self) -> List[Entity]:
+        """Only entities near the player can be visible, so only that area of the spatial index is searched"""
+        player, radius = self.engine.player, self.engine.fov_radius
+        return [
+            entity
+            for entity in list(self.entity_index.entities_in_rect(
+                player.x - radius, player.y - radius, player.x + radius + 1, player.y + radius + 1,
+            ))
+            if self.visible[entity.x, entity.y]
+        ]
+
+    def render(self, console: Console, camera: Optional[Camera] = None) -> None:
+        """Render the camera's window of the world, by default a console sized one centered on the player"""
+        if camera is None:
+            camera = Camera(console.width, console.height)
+            camera.follow(self, self.engine.player.x, self.engine.player.y)
+        window = camera.window
+
+        tiles = self.tiles[window]  # One pass over the chunks for every field
+        console.tiles_rgb[0:camera.view_width, 0:camera.view_height] = np.select(
+            condlist=[self.visible[window], self.explored[window]],
+            choicelist=[tiles["light"], tiles["dark"]],
+            default=tile_types.SHROUD,
+        )
+
+        for entity in self.visible_entities_in(*camera.bounds):
+            console.print(x=entity.x - camera.x, y=entity.y - camera.y, string=entity.char, fg=entity.color)
@@ -1,41 +1,169 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+from tcod.constants import FOV_RESTRICTIVE
 from tcod.context import Context
 from tcod.console import Console
 from tcod.map import compute_fov
+from camera import Camera
 from input_handlers import EventHandler
+from pathfinding import FlowField
+from renderer import MapRenderer
+from scheduler import TurnScheduler
 
 if TYPE_CHECKING:
+    from actions import Action
     from entity import Entity
     from game_map import GameMap
+    from world import World
 
 
 class Engine:
     game_map: GameMap
 
-    def __init__(self, player: Entity):
+    def __init__(
+            self,
+            player: Entity,
+            fov_radius: int = 8,
+            fov_algorithm: int = FOV_RESTRICTIVE,
+            fov_windowed: bool = False,
+            quiet: bool = False,
+            chase: bool = False,
+    ):
+        """
+        fov_algorithm is one of tcod's FOV_* constants.
+        fov_windowed only computes the FOV on the (2r+1)x(2r+1) area around the player, so its cost depends on the
+        radius instead of the map size.
+        quiet silences game messages, for headless runs.
+        chase makes monsters walk towards the player on their turns.
+        """
         self.event_handler: EventHandler = EventHandler(self)
         self.player = player
+        self.quiet = quiet
+        self.scheduler = TurnScheduler(self)  # Decides which actors act after each player action
+        self.chase = chase
+        self.chase_field = FlowField()  # Distances to the player, shared by every monster chasing them
+        # When set, frames are drawn through this buffered renderer instead of GameMap.render
+        self.renderer: Optional[MapRenderer] = None
+        # When set, only this window of the map is drawn, following the player. Needed for maps bigger than the console
+        self.camera: Optional[Camera] = None
+        # The floors of the dungeon when it has more than one, see World. Needed for the stairs to lead anywhere
+        self.world: Optional[World] = None
+
+        self.fov_radius = fov_radius
+        self.fov_algorithm = fov_algorithm
+        self.fov_windowed = fov_windowed
+        self._fov_key: Optional[tuple] = None  # What the current FOV was computed from, see update_fov
+        self._fov_window: Optional[Tuple[slice, slice]] = None  # The area the last FOV wrote to
+
+    def message(self, text: str) -> None:
+        """Show a message to the player"""
+        if not self.quiet:
+            print(text)
+
+    def perform_turn(self, action: Action) -> None:
+        """Perform the player's action, then let everything else take its turn and update what the player can see"""
+        action.perform()
+        self.handle_enemy_turns()
+        self.update_fov()
 
     def handle_enemy_turns(self) -> None:
-        for entity in self.game_map.entities - {self.player}:
-            print(f'The {entity.name} wonders when it will get to take a real turn.')
+        """Give a turn to every actor the scheduler has due. Actors far from the player are asleep and skipped"""
+        actors = self.scheduler.advance()
+        if self.chase and actors:
+            self.chase_field.update(self.game_map, self.player.x, self.player.y, self.chase_radius)
+            self.chase_field.step(self.game_map, actors)
+
+        for entity in actors:
+            self.message(f'The {entity.name} wonders when it will get to take a real turn.')
+
+    @property
+    def chase_radius(self) -> Optional[int]:
+        """How far around the player the way to them is searched when monsters chase them, None for the whole map"""
+        # Monsters can't be further than sleep_radius away, but the way to the player can lead further than that
+        return 2 * self.scheduler.sleep_radius if self.fov_windowed else None
 
     def update_fov(self) -> None:
-        """Recompute the visible area based on the player's point of view"""
-        # Setting the game_map's visible tiles to equal the result of compute_fov
-        self.game_map.visible[:] = compute_fov(
-            self.game_map.tiles["transparent"],   # Transparency is 2d numpy array and considers != 0 as transparent
-            (self.player.x, self.player.y),  # The origin point of the FOV, which is a 2d index of x,y coordinates
-            radius=8                              # How far the FOV extends
+        """
+        Recompute the visible area based on the player's point of view
+
+        Nothing is recomputed if the player hasn't moved and no tiles have changed since the last call, such as after
+        bumping into a wall.
+        """
+        game_map = self.game_map
+        key = (
+            game_map, game_map.tiles_version, self.player.x, self.player.y,
+            self.fov_radius, self.fov_algorithm, self.fov_windowed,
         )
+        if key == self._fov_key:
+            return  # The current FOV is still valid
 
+        x, y = self.player.x, self.player.y
+        window = self._fov_bounds(x, y)
+        if self.fov_windowed:
+            # Only the area the radius can reach goes into compute_fov
+            visible = compute_fov(
+                game_map.tiles["transparent"][window],
+                (x - window[0].start, y - window[1].start),  # The origin relative to the window
+                radius=self.fov_radius,
+                algorithm=self.fov_algorithm,
+            )
+        else:
+            visible = compute_fov(
+                game_map.tiles["transparent"],  # Transparency is 2d numpy array and considers != 0 as transparent
+                (x, y),                         # The origin point of the FOV, which is a 2d index of x,y coordinates
+                radius=self.fov_radius,         # How far the FOV extends
+                algorithm=self.fov_algorithm,
+            )[window]
+
+        self._write_fov(window, visible, same_map=self._fov_key is not None and self._fov_key[0] is game_map)
+        self._fov_key = key
+
+    def _fov_bounds(self, x: int, y: int) -> Tuple[slice, slice]:
+        """Return the window of the map the FOV radius can reach from (x, y), or the whole map if it is unlimited"""
+        game_map = self.game_map
+        radius = self.fov_radius
+        if radius <= 0:
+            return slice(0, game_map.width), slice(0, game_map.height)
+        x1, y1 = max(0, x - radius), max(0, y - radius)
+        x2, y2 = min(game_map.width, x + radius + 1), min(game_map.height, y + radius + 1)
+        return slice(x1, x2), slice(y1, y2)
+
+    def _write_fov(self, window: Tuple[slice, slice], visible: np.ndarray, same_map: bool) -> None:
+        """
+        Write the FOV of window into the map's visible and explored tiles
+
+        Nothing outside the previous window can be visible, so only that area needs clearing, and only the two windows
+        are marked as dirty. The rest of the map is never touched.
+        """
+        game_map = self.game_map
+        previous = self._fov_window
+        if same_map and previous is not None:
+            game_map.visible[previous] = False
+            game_map.mark_dirty(previous[0].start, previous[1].start, previous[0].stop, previous[1].stop)
+        else:
+            game_map.visible[:] = False
+            game_map.mark_dirty(0, 0, game_map.width, game_map.height)
+
+        game_map.visible[window] = visible
         # If a tile is visible it should be added to explored
-        self.game_map.explored |= self.game_map.visible
+        game_map.explored[window] |= visible
+        game_map.mark_dirty(window[0].start, window[1].start, window[0].stop, window[1].stop)
+        self._fov_window = window
 
     def render(self, console: Console, context: Context) -> None:
         """We iterate through our entities and print them to their proper locations"""
-        self.game_map.render(console)
+        if self.camera is not None:
+            self.camera.follow(self.game_map, self.player.x, self.player.y)
+
+        if self.renderer is not None:
+            # The renderer only rewrites tiles that changed, so the console has to keep its contents between frames
+            self.renderer.render(console, self.game_map, self.camera)
+            context.present(console)
+            return
+
+        self.game_map.render(console, self.camera)
 
         context.present(console)
         console.clear()
@@ -1,6 +1,5 @@
 from __future__ import annotations
-import copy
-from typing import Optional, Tuple, TypeVar, TYPE_CHECKING
+from typing import NamedTuple, Optional, Tuple, TypeVar, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from game_map import GameMap
@@ -8,11 +7,81 @@ if TYPE_CHECKING:
 T = TypeVar("T", bound="Entity")
 
 
-class Entity:
+class EntityTemplate(NamedTuple):
+    """
+    The data every entity of one kind shares, such as every orc
+
+    Templates are immutable, so any number of entities can point at the same one. Spawning an entity from a template
+    only creates its per-instance state (position and map) instead of deep copying a prototype entity.
+    """
+    char: str = "?"
+    color: Tuple[int, int, int] = (255, 255, 255)
+    name: str = "<Unnamed>"
+    blocks_movement: bool = False
+    speed: int = 100  # How often this kind of entity gets a turn, 100 is the player's speed. See TurnScheduler
+
+    def instantiate(self, x: int = 0, y: int = 0) -> Entity:
+        """Return a new entity of this kind which isn't on any map yet"""
+        return Entity(x=x, y=y, template=self)
+
+    def spawn(self, gamemap: GameMap, x: int, y: int) -> Entity:
+        """Spawn a new entity of this kind at the given location"""
+        if gamemap.entity_store is not None:
+            # Columnar maps keep the entity's data in their EntityStore
+            entity = gamemap.entity_store.create(
+                x, y, self.char, self.color, self.name, self.blocks_movement, self.speed,
+            )
+            gamemap.add_entity(entity)
+            return entity
+        return Entity(gamemap, x, y, template=self)
+
+
+class BaseEntity:
+    """
+    What every entity does, wherever its data is kept
+
+    It has no slots, so each subclass only pays for the fields it stores: Entity keeps its own, a StoredEntity reads
+    them from an EntityStore.
+    """
+    __slots__ = ()
+
+    x: int
+    y: int
+    template: EntityTemplate
+    gamemap: GameMap
+
+    def spawn(self, gamemap: GameMap, x: int, y: int) -> BaseEntity:
+        """Spawn a new entity of this one's kind at the given location"""
+        return self.template.spawn(gamemap, x, y)
+
+    def move(self, dx: int, dy: int) -> None:
+        old_x, old_y = self.x, self.y
+        self.x += dx
+        self.y += dy
+        if hasattr(self, "gamemap"):
+            # Keep the map's position lookup and dirty region in sync with our new location
+            self.gamemap.entity_moved(self, old_x, old_y)
+
+    def place(self, x: int, y: int, gamemap: Optional[GameMap] = None) -> None:
+        """Place this entity at a new location. Handles moving across GameMaps"""
+        old_x, old_y = self.x, self.y
+        if gamemap and hasattr(self, "gamemap"):  # Possibly uninitialized
+            self.gamemap.remove_entity(self)  # From where we stand now
+        self.x = x
+        self.y = y
+        if gamemap:
+            self.gamemap = gamemap
+            gamemap.add_entity(self)
+        elif hasattr(self, "gamemap"):
+            self.gamemap.entity_moved(self, old_x, old_y)
+
+
+class Entity(BaseEntity):
     """
     A generic object to represent players, enemies, items, etc
     """
-    game_map: GameMap
+    # Slots keep each entity small and its attribute access fast, there can be thousands of these on a map
+    __slots__ = ("x", "y", "template", "gamemap")
 
     def __init__(
             self,
@@ -23,40 +92,73 @@ class Entity:
             color: Tuple[int, int, int] = (255, 255, 255),
             name: str = "<Unnamed>",
             blocks_movement: bool = False,
+            template: Optional[EntityTemplate] = None,
     ):
         """
         char is the character we'll use to represent our entity (such as player being '@'
+        If a template is given it is shared as is, and char, color, name and blocks_movement are ignored
         """
         self.x = x
         self.y = y
-        self.char = char
-        self.color = color
-        self.name = name
-        self.blocks_movement = blocks_movement
+        if template is None:
+            template = EntityTemplate(char, color, name, blocks_movement)
+        self.template = template
         if gamemap:
             # If gamemap isn't provided now then it will be set later
             self.gamemap = gamemap
-            gamemap.entities.add(self)
+            gamemap.add_entity(self)
+
+    # The shared data is read from the template. Changing it gives this entity its own modified copy of the template
+    @property
+    def char(self) -> str:
+        return self.template.char
+
+    @char.setter
+    def char(self, value: str) -> None:
+        self.template = self.template._replace(char=value)
+
+    @property
+    def color(self) -> Tuple[int, int, int]:
+        return self.template.color
+
+    @color.setter
+    def color(self, value: Tuple[int, int, int]) -> None:
+        self.template = self.template._replace(color=value)
+
+    @property
+    def name(self) -> str:
+        return self.template.name
+
+    @name.setter
+    def name(self, value: str) -> None:
+        self.template = self.template._replace(name=value)
+
+    @property
+    def blocks_movement(self) -> bool:
+        return self.template.blocks_movement
+
+    @blocks_movement.setter
+    def blocks_movement(self, value: bool) -> None:
+        self.template = self.template._replace(blocks_movement=value)
+
+    @property
+    def speed(self) -> int:
+        return self.template.speed
+
+    @speed.setter
+    def speed(self, value: int) -> None:
+        self.template = self.template._replace(speed=value)
 
     def spawn(self: T, gamemap: GameMap, x: int, y: int) -> T:
         """Spawn a copy of this instance at the given location"""
-        clone = copy.deepcopy(self)
+        if gamemap.entity_store is not None:
+            return self.template.spawn(gamemap, x, y)  # type: ignore
+
+        # Only the per-instance state is copied, the template is shared
+        clone = object.__new__(type(self))
         clone.x = x
         clone.y = y
+        clone.template = self.template
         clone.gamemap = gamemap
-        gamemap.entities.add(clone)
+        gamemap.add_entity(clone)
         return clone
-
-    def move(self, dx: int, dy: int) -> None:
-        self.x += dx
-        self.y += dy
-
-    def place(self, x: int, y: int, gamemap: Optional[GameMap] = None) -> None:
-        """Place this entity at a new location. Handles moving across GameMaps"""
-        self.x = x
-        self.y = y
-        if gamemap:
-            if hasattr(self, "gamemap"):  # Possibly uninitialized
-                self.gamemap.entities.remove(self)
-            self.gamemap = gamemap
-            gamemap.entities.add(self)
@@ -1,5 +1,32 @@
-from entity import Entity
+from __future__ import annotations
+from typing import List, Sequence, TYPE_CHECKING
 
-player = Entity(char="@", color=(255, 255, 255), name="Player", blocks_movement=True)
-orc = Entity(char="o", color=(63, 127, 63), name="Orc", blocks_movement=True)
-troll = Entity(char="T", color=(0, 127, 0), name="Troll", blocks_movement=True)
+import numpy as np  # type: ignore
+
+from entity import Entity, EntityTemplate
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+player = EntityTemplate(char="@", color=(255, 255, 255), name="Player", blocks_movement=True)
+orc = EntityTemplate(char="o", color=(63, 127, 63), name="Orc", blocks_movement=True)
+troll = EntityTemplate(char="T", color=(0, 127, 0), name="Troll", blocks_movement=True)
+
+
+def spawn_many(template: EntityTemplate, gamemap: GameMap, xs: Sequence[int], ys: Sequence[int]) -> List[Entity]:
+    """
+    Spawn one entity of the template's kind at each xs[i], ys[i] in a single call
+
+    On columnar maps all of the rows are written to the EntityStore at once.
+    """
+    store = gamemap.entity_store
+    if store is not None:
+        entities: List[Entity] = list(store.create_many(template, xs, ys))
+    else:
+        entities = []
+        for x, y in zip(np.asarray(xs).tolist(), np.asarray(ys).tolist()):
+            entity = Entity(x=x, y=y, template=template)
+            entity.gamemap = gamemap
+            entities.append(entity)
+    gamemap.add_entities(entities)
+    return entities
@@ -0,0 +1,458 @@
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional, Set, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+from entity import BaseEntity, EntityTemplate
+from spatial_index import SpatialIndex
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+
+class EntityStore:
+    """
+    Columnar (struct of arrays) storage for the entities of one GameMap
+
+    Instead of every entity carrying its own __dict__, the data lives in one NumPy array per field and each entity is
+    a StoredEntity handle that only knows its store and row. Per-turn work such as picking out the living actors,
+    filtering by FOV or building a collision grid then becomes whole-array operations.
+
+    The store also indexes its entities by position, so they don't need entries in the GameMap's entity set or
+    SpatialIndex: each occupied tile maps to the first row on it, and next_in_cell chains the other rows on that tile.
+    """
+    def __init__(self, gamemap: GameMap, capacity: int = 64):
+        self.gamemap = gamemap
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.char = np.zeros(capacity, dtype=np.int32)  # Unicode codepoints, ready to be written into tiles_rgb["ch"]
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+        self.blocks_movement = np.zeros(capacity, dtype=bool)
+        self.speed = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)  # False for rows that are unused or have been released
+        self.names: List[str] = [""] * capacity
+        self.handles: List[Optional[StoredEntity]] = [None] * capacity
+        self.count = 0  # Rows in use, including released ones
+        self._free: List[int] = []
+
+        # The position index: tile -> first row on it, then row -> next row on the same tile, -1 ending the chain
+        self.cells: Dict[int, int] = {}
+        self.next_in_cell = np.full(capacity, -1, dtype=np.int32)
+        self.cell = np.full(capacity, -1, dtype=np.int64)  # The tile each row is indexed at, -1 if it isn't
+        self.indexed = 0  # Rows in the position index
+
+    @property
+    def capacity(self) -> int:
+        return len(self.x)
+
+    def _grow(self, needed: int = 0) -> None:
+        """Double the size of every column, as many times as it takes to fit needed rows"""
+        new_capacity = self.capacity * 2
+        while new_capacity < needed:
+            new_capacity *= 2
+        for field in ("x", "y", "char", "color", "blocks_movement", "speed", "alive", "next_in_cell", "cell"):
+            old = getattr(self, field)
+            fill = -1 if field in ("next_in_cell", "cell") else 0
+            new = np.full((new_capacity,) + old.shape[1:], fill, dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, field, new)
+        self.names.extend([""] * (new_capacity - len(self.names)))
+        self.handles.extend([None] * (new_capacity - len(self.handles)))
+
+    def create(
+            self,
+            x: int,
+            y: int,
+            char: str,
+            color: Tuple[int, int, int],
+            name: str,
+            blocks_movement: bool,
+            speed: int = 100,
+    ) -> StoredEntity:
+        """
+        Allocate a row for a new entity and return its handle
+
+        The handle isn't on the map yet, use GameMap.add_entity for that.
+        """
+        if self._free:
+            index = self._free.pop()
+        else:
+            if self.count == self.capacity:
+                self._grow()
+            index = self.count
+            self.count += 1
+
+        self.x[index] = x
+        self.y[index] = y
+        self.char[index] = ord(char)
+        self.color[index] = color
+        self.blocks_movement[index] = blocks_movement
+        self.speed[index] = speed
+        self.alive[index] = True
+        self.names[index] = name
+
+        handle = StoredEntity(self, index)
+        self.handles[index] = handle
+        return handle
+
+    def create_many(self, template: EntityTemplate, xs: np.ndarray, ys: np.ndarray) -> List[StoredEntity]:
+        """Allocate rows for len(xs) new entities of one kind at once and return their handles"""
+        count = len(xs)
+        if self.count + count > self.capacity:
+            self._grow(self.count + count)
+        # Bulk creation always appends, released rows are only reused by create
+        start, stop = self.count, self.count + count
+        self.count = stop
+
+        self.x[start:stop] = xs
+        self.y[start:stop] = ys
+        self.char[start:stop] = ord(template.char)
+        self.color[start:stop] = template.color
+        self.blocks_movement[start:stop] = template.blocks_movement
+        self.speed[start:stop] = template.speed
+        self.alive[start:stop] = True
+        self.names[start:stop] = [template.name] * count
+
+        handles = [StoredEntity(self, index) for index in range(start, stop)]
+        self.handles[start:stop] = handles
+        return handles
+
+    def extend(
+            self,
+            xs: np.ndarray,
+            ys: np.ndarray,
+            chars: np.ndarray,
+            colors: np.ndarray,
+            blocks_movement: np.ndarray,
+            speeds: np.ndarray,
+            names: List[str],
+    ) -> List[StoredEntity]:
+        """
+        Append one row per entity from whole columns, such as those of a save file, and index them all by position
+
+        Unlike create_many the entities can be of any mix of kinds. chars holds codepoints. As the rows are indexed
+        here, the handles must not be passed to GameMap.add_entities, and the tiles they stand on aren't marked dirty.
+        """
+        count = len(xs)
+        if self.count + count > self.capacity:
+            self._grow(self.count + count)
+        start, stop = self.count, self.count + count
+        self.count = stop
+
+        self.x[start:stop] = xs
+        self.y[start:stop] = ys
+        self.char[start:stop] = chars
+        self.color[start:stop] = colors
+        self.blocks_movement[start:stop] = blocks_movement
+        self.speed[start:stop] = speeds
+        self.alive[start:stop] = True
+        self.names[start:stop] = names
+
+        handles = [StoredEntity(self, index) for index in range(start, stop)]
+        self.handles[start:stop] = handles
+
+        # The same as link for each row, without reading every x and y out of the columns on its own
+        height = self.gamemap.height
+        cells = self.cells
+        keys = []
+        following = []
+        for index, x, y in zip(range(start, stop), self.x[start:stop].tolist(), self.y[start:stop].tolist()):
+            key = x * height + y
+            keys.append(key)
+            following.append(cells.get(key, -1))
+            cells[key] = index
+        self.next_in_cell[start:stop] = following
+        self.cell[start:stop] = keys
+        self.indexed += count
+        return handles
+
+    def release(self, entity: StoredEntity) -> None:
+        """Free the row of an entity that has been removed from the map"""
+        index = entity.index
+        if self.cell[index] >= 0:
+            self.unlink(index)
+        self.alive[index] = False
+        self.handles[index] = None
+        self._free.append(index)
+
+    def __contains__(self, entity: object) -> bool:
+        """Whether entity is a live handle of this store"""
+        if not isinstance(entity, StoredEntity) or entity.store is not self:
+            return False
+        return self.handles[entity.index] is entity
+
+    def __len__(self) -> int:
+        return self.count - len(self._free)
+
+    def live_handles(self) -> List[StoredEntity]:
+        """Return the handle of every entity currently in the store"""
+        handles = self.handles[: self.count]
+        if self._free:
+            return [handle for handle in handles if handle is not None]
+        return handles  # type: ignore
+
+    def _key(self, x: int, y: int) -> int:
+        return x * self.gamemap.height + y
+
+    def link(self, index: int) -> None:
+        """Add a row to the position index at its current x, y. A row that is already indexed is moved"""
+        if self.cell[index] >= 0:
+            self.unlink(index)
+        key = self._key(int(self.x[index]), int(self.y[index]))
+        self.next_in_cell[index] = self.cells.get(key, -1)
+        self.cells[key] = index
+        self.cell[index] = key
+        self.indexed += 1
+
+    def unlink(self, index: int) -> None:
+        """Remove a row from the position index, using the tile it was indexed at"""
+        key = int(self.cell[index])
+        following = int(self.next_in_cell[index])
+        row = self.cells[key]
+        if row == index:
+            if following < 0:
+                del self.cells[key]
+            else:
+                self.cells[key] = following
+        else:
+            next_in_cell = self.next_in_cell
+            while next_in_cell[row] != index:
+                row = int(next_in_cell[row])
+            next_in_cell[row] = following
+        self.cell[index] = -1
+        self.indexed -= 1
+
+    def relink(self, index: int) -> None:
+        """Call after a row's x/y have changed to move it in the position index, if it is indexed"""
+        indexed_at = self.cell[index]
+        if indexed_at >= 0 and indexed_at != self._key(int(self.x[index]), int(self.y[index])):
+            self.link(index)
+
+    def rows_at(self, x: int, y: int) -> Iterator[int]:
+        """Yield the indexed rows standing on x, y"""
+        row = self.cells.get(self._key(x, y), -1)
+        next_in_cell = self.next_in_cell
+        while row >= 0:
+            yield row
+            row = int(next_in_cell[row])
+
+    def rows_in_rect(self, x1: int, y1: int, x2: int, y2: int) -> List[int]:
+        """
+        Return the indexed rows inside the half open rectangle [x1, x2) x [y1, y2)
+
+        Like SpatialIndex.entities_in_rect, small rectangles look up their tiles and big ones scan the columns.
+        """
+        x1, y1 = max(x1, 0), max(y1, 0)
+        x2, y2 = min(x2, self.gamemap.width), min(y2, self.gamemap.height)
+        if x1 >= x2 or y1 >= y2:
+            return []
+        if (x2 - x1) * (y2 - y1) <= len(self.cells):
+            rows = []
+            for x in range(x1, x2):
+                for y in range(y1, y2):
+                    rows.extend(self.rows_at(x, y))
+            return rows
+        count = self.count
+        xs, ys = self.x[:count], self.y[:count]
+        inside = (self.cell[:count] >= 0) & (xs >= x1) & (xs < x2) & (ys >= y1) & (ys < y2)
+        return np.flatnonzero(inside).tolist()
+
+    def live_indices(self) -> np.ndarray:
+        """Return the rows of every entity currently in the store"""
+        return np.flatnonzero(self.alive[: self.count])
+
+    def visible_indices(self, visible: np.ndarray) -> np.ndarray:
+        """Return the rows of the entities standing on a visible tile"""
+        indices = self.live_indices()
+        return indices[visible[self.x[indices], self.y[indices]]]
+
+    def blocking_grid(self, shape: Tuple[int, int]) -> np.ndarray:
+        """Return a boolean (width, height) array which is True wherever a blocking entity stands"""
+        grid = np.zeros(shape, dtype=bool, order="F")
+        mask = self.alive[: self.count] & self.blocks_movement[: self.count]
+        grid[self.x[: self.count][mask], self.y[: self.count][mask]] = True
+        return grid
+
+    def entities(self, indices: np.ndarray) -> List[StoredEntity]:
+        """Turn an array of rows back into entity handles"""
+        handles = self.handles
+        return [handles[i] for i in indices.tolist()]  # type: ignore
+
+
+class StoredEntity(BaseEntity):
+    """
+    A thin handle to one row of an EntityStore
+
+    It behaves like any other Entity, but reads and writes its fields straight from the store's arrays, so the handle
+    itself is only two slots. Stored entities belong to the map that owns the store and can't be placed on another
+    GameMap.
+    """
+    __slots__ = ("store", "index")
+
+    def __init__(self, store: EntityStore, index: int):
+        self.store = store
+        self.index = index
+
+    @property  # type: ignore
+    def gamemap(self) -> GameMap:
+        return self.store.gamemap
+
+    @property  # type: ignore
+    def template(self) -> EntityTemplate:
+        return EntityTemplate(self.char, self.color, self.name, self.blocks_movement, self.speed)
+
+    @template.setter
+    def template(self, value: EntityTemplate) -> None:
+        self.char, self.color, self.name, self.blocks_movement, self.speed = value
+
+    @property  # type: ignore
+    def x(self) -> int:
+        return int(self.store.x[self.index])
+
+    @x.setter
+    def x(self, value: int) -> None:
+        self.store.x[self.index] = value
+
+    @property  # type: ignore
+    def y(self) -> int:
+        return int(self.store.y[self.index])
+
+    @y.setter
+    def y(self, value: int) -> None:
+        self.store.y[self.index] = value
+
+    @property  # type: ignore
+    def char(self) -> str:
+        return chr(self.store.char[self.index])
+
+    @char.setter
+    def char(self, value: str) -> None:
+        self.store.char[self.index] = ord(value)
+
+    @property  # type: ignore
+    def color(self) -> Tuple[int, int, int]:
+        r, g, b = self.store.color[self.index].tolist()
+        return r, g, b
+
+    @color.setter
+    def color(self, value: Tuple[int, int, int]) -> None:
+        self.store.color[self.index] = value
+
+    @property  # type: ignore
+    def name(self) -> str:
+        return self.store.names[self.index]
+
+    @name.setter
+    def name(self, value: str) -> None:
+        self.store.names[self.index] = value
+
+    @property  # type: ignore
+    def blocks_movement(self) -> bool:
+        return bool(self.store.blocks_movement[self.index])
+
+    @blocks_movement.setter
+    def blocks_movement(self, value: bool) -> None:
+        self.store.blocks_movement[self.index] = value
+
+    @property  # type: ignore
+    def speed(self) -> int:
+        return int(self.store.speed[self.index])
+
+    @speed.setter
+    def speed(self, value: int) -> None:
+        self.store.speed[self.index] = value
+
+    def place(self, x: int, y: int, gamemap: Optional[GameMap] = None) -> None:
+        if gamemap is not None and gamemap is not self.store.gamemap:
+            raise ValueError("Stored entities can't be moved to another GameMap")
+        super().place(x, y)
+
+
+class ColumnarEntities:
+    """
+    The entities of a columnar GameMap, as a read-only set: the live entities of its store and every other entity
+
+    Stands in for GameMap.entities, so that stored entities don't each need an entry in a Python set.
+    """
+    def __init__(self, store: EntityStore, unstored: Set[BaseEntity]):
+        self.store = store
+        self.unstored = unstored
+
+    def __len__(self) -> int:
+        return len(self.store) + len(self.unstored)
+
+    def __iter__(self) -> Iterator[BaseEntity]:
+        yield from self.store.live_handles()
+        yield from self.unstored
+
+    def __contains__(self, entity: object) -> bool:
+        return entity in self.store or entity in self.unstored
+
+
+class StoreSpatialIndex(SpatialIndex):
+    """
+    The SpatialIndex of a columnar GameMap
+
+    Entities of its store are indexed by the store itself (see EntityStore.link), every other entity, such as the
+    player, the usual way.
+    """
+    def __init__(self, store: EntityStore):
+        super().__init__()
+        self.store = store
+
+    def _row(self, entity: BaseEntity) -> int:
+        """The row of a handle of our store, -1 for any other entity"""
+        if isinstance(entity, StoredEntity) and entity.store is self.store:
+            return entity.index
+        return -1
+
+    def __len__(self) -> int:
+        return super().__len__() + self.store.indexed
+
+    def __contains__(self, entity: BaseEntity) -> bool:
+        row = self._row(entity)
+        if row < 0:
+            return super().__contains__(entity)
+        return bool(self.store.cell[row] >= 0)
+
+    def add(self, entity: BaseEntity) -> None:
+        row = self._row(entity)
+        if row < 0:
+            super().add(entity)
+        else:
+            self.store.link(row)
+
+    def remove(self, entity: BaseEntity) -> None:
+        row = self._row(entity)
+        if row < 0:
+            super().remove(entity)
+        else:
+            self.store.unlink(row)
+
+    def update(self, entity: BaseEntity) -> None:
+        row = self._row(entity)
+        if row < 0:
+            super().update(entity)
+        else:
+            self.store.relink(row)
+
+    def entities_at(self, x: int, y: int) -> List[BaseEntity]:
+        others = super().entities_at(x, y)
+        rows = list(self.store.rows_at(x, y))
+        if not rows:
+            return others
+        handles = self.store.handles
+        return [handles[row] for row in rows] + others  # type: ignore
+
+    def blocking_entity_at(self, x: int, y: int) -> Optional[BaseEntity]:
+        store = self.store
+        for row in store.rows_at(x, y):
+            if store.blocks_movement[row]:
+                return store.handles[row]
+        return super().blocking_entity_at(x, y)
+
+    def entities_in_rect(self, x1: int, y1: int, x2: int, y2: int) -> Iterator[BaseEntity]:
+        handles = self.store.handles
+        for row in self.store.rows_in_rect(x1, y1, x2, y2):
+            yield handles[row]  # type: ignore
+        yield from super().entities_in_rect(x1, y1, x2, y2)
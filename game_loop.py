@@ -0,0 +1,154 @@
+"""
+A real time main loop, as an alternative to main.main's render then wait for input loop
+
+Input, simulation and rendering each run on their own schedule:
+
+- Events are polled with tcod.event.get() so the loop never blocks waiting for a key.
+- The simulation advances in fixed ticks. A player action waiting in the queue is performed on the next tick, and
+  ticks without one run idle_tick, which is where animations and idle AI go.
+- Frames are drawn at most max_fps times a second, and only when something changed since the last one.
+
+How long each phase takes is tracked in PhaseTimings.
+"""
+from __future__ import annotations
+from collections import deque
+import time
+from typing import Deque, Dict, TYPE_CHECKING
+
+import tcod.event
+
+if TYPE_CHECKING:
+    from tcod.console import Console
+    from tcod.context import Context
+    from actions import Action
+    from engine import Engine
+
+PHASES = ("input", "simulation", "fov", "render")
+
+
+class PhaseTimings:
+    """Total time spent in each phase of the loop, and how many times it ran"""
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {phase: 0.0 for phase in PHASES}
+        self.counts: Dict[str, int] = {phase: 0 for phase in PHASES}
+        self.frames_skipped = 0  # Frames that weren't drawn because nothing had changed
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.seconds[phase] += seconds
+        self.counts[phase] += 1
+
+    def summary(self) -> dict:
+        """Per phase totals and averages in milliseconds, suitable for dumping as JSON"""
+        return {
+            "phases": {
+                phase: {
+                    "count": self.counts[phase],
+                    "total_ms": self.seconds[phase] * 1e3,
+                    "mean_ms": self.seconds[phase] * 1e3 / self.counts[phase] if self.counts[phase] else 0.0,
+                }
+                for phase in PHASES
+            },
+            "frames_skipped": self.frames_skipped,
+        }
+
+
+class RealtimeLoop:
+    """
+    Runs the game with a fixed tick simulation clock, polled input and a frame rate capped, dirty only renderer
+
+    tick_rate is the number of simulation ticks per second. max_fps caps how often a frame is drawn.
+    """
+    # Ticks to catch up on at most per pass, so a long stall doesn't turn into a burst of back to back ticks
+    MAX_CATCH_UP_TICKS = 5
+
+    def __init__(self, engine: Engine, context: Context, console: Console, tick_rate: int = 30, max_fps: int = 60):
+        self.engine = engine
+        self.context = context
+        self.console = console
+        self.tick_seconds = 1 / tick_rate
+        self.frame_seconds = 1 / max_fps
+        self.timings = PhaseTimings()
+        self.ticks = 0
+        self.dirty = True  # Whether anything on screen changed since the last frame
+        self._actions: Deque[Action] = deque()
+
+    def run(self) -> None:
+        """Run until an action raises SystemExit, such as the player pressing escape or closing the window"""
+        clock = time.perf_counter
+        next_tick = next_frame = clock()
+        while True:
+            self.poll_input()
+
+            now = clock()
+            ticks = 0
+            while now >= next_tick and ticks < self.MAX_CATCH_UP_TICKS:
+                self.tick()
+                next_tick += self.tick_seconds
+                ticks += 1
+            if ticks == self.MAX_CATCH_UP_TICKS:
+                next_tick = max(next_tick, now)  # Drop the ticks we couldn't catch up on
+
+            now = clock()
+            if now >= next_frame:
+                if self.dirty:
+                    self.render()
+                else:
+                    self.timings.frames_skipped += 1
+                next_frame = max(next_frame + self.frame_seconds, now)
+
+            # Sleep until there is something to do, new input is picked up on the next pass
+            delay = min(next_tick, next_frame) - clock()
+            if delay > 0:
+                time.sleep(delay)
+
+    def poll_input(self) -> None:
+        """Turn every pending event into actions for the next ticks, without waiting"""
+        start = time.perf_counter()
+        handler = self.engine.event_handler
+        for event in tcod.event.get():
+            if isinstance(event, tcod.event.WindowEvent):
+                self.dirty = True  # Such as the window being exposed or resized
+            action = handler.dispatch(event)
+            if action is not None:
+                self._actions.append(action)
+        self.timings.add("input", time.perf_counter() - start)
+
+    def tick(self) -> None:
+        """Advance the simulation by one tick, performing at most one of the player's actions"""
+        engine = self.engine
+        start = time.perf_counter()
+        action = self._actions.popleft() if self._actions else None
+        if action is not None:
+            # The same steps as Engine.perform_turn, split so the FOV update is timed on its own
+            action.perform()
+            engine.handle_enemy_turns()
+            acted = True
+        else:
+            acted = self.idle_tick()
+        fov_start = time.perf_counter()
+        self.timings.add("simulation", fov_start - start)
+        self.ticks += 1
+
+        if acted:
+            engine.update_fov()
+            self.timings.add("fov", time.perf_counter() - fov_start)
+            self.dirty = True
+
+        recorder = engine.event_handler.recorder
+        if action is not None and recorder is not None:
+            # Only once the turn is over, so actions still queued when the game quits never make it into the replay
+            recorder.record(action)
+
+    def idle_tick(self) -> bool:
+        """
+        Run one tick of things that happen between the player's turns, such as animations and idle AI
+
+        Return True if anything changed that needs drawing. Nothing happens between turns yet, override this to add it.
+        """
+        return False
+
+    def render(self) -> None:
+        start = time.perf_counter()
+        self.engine.render(console=self.console, context=self.context)
+        self.dirty = False
+        self.timings.add("render", time.perf_counter() - start)
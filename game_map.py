@@ -1,23 +1,60 @@
 from __future__ import annotations
 
-from typing import Iterable, Optional, TYPE_CHECKING
+from typing import Iterable, List, Optional, Tuple, TYPE_CHECKING
 
 import numpy as np  # type: ignore
 from tcod.console import Console
 import tile_types
+from entity_store import ColumnarEntities, EntityStore, StoreSpatialIndex, StoredEntity
+from map_analytics import MapAnalytics
+from spatial_index import SpatialIndex
+from tile_grid import PaletteTiles
 
 if TYPE_CHECKING:
+    from camera import Camera
     from engine import Engine
     from entity import Entity
+    from procgen import RectangularRoom
 
 
 class GameMap:
-    def __init__(self, engine: Engine, width: int, height: int, entities: Iterable[Entity] = ()):
+    def __init__(
+            self,
+            engine: Engine,
+            width: int,
+            height: int,
+            entities: Iterable[Entity] = (),
+            columnar: bool = False,
+            compact_tiles: bool = False,
+    ):
+        """
+        columnar keeps spawned entities in an EntityStore.
+        compact_tiles stores the tiles as IDs into a palette (see PaletteTiles) instead of full tile_dt records.
+        """
         self.engine = engine
         self.width = width
         self.height = height
-        self.entities = set(entities)
-        self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
+        # Columnar maps keep spawned entities in NumPy arrays so per-turn work can be done on whole arrays.
+        # Entities that aren't in the store (such as the player) are tracked separately
+        self.entity_store: Optional[EntityStore] = EntityStore(self) if columnar else None
+        self.unstored_entities = set(entities)
+        if self.entity_store is None:
+            self.entities = self.unstored_entities
+            self.entity_index = SpatialIndex()  # Position lookup for self.entities, kept up to date by Entity
+        else:
+            # The store tracks and indexes its own entities, these add the unstored ones to it
+            self.entities = ColumnarEntities(self.entity_store, self.unstored_entities)
+            self.entity_index = StoreSpatialIndex(self.entity_store)
+        for entity in self.unstored_entities:
+            self.entity_index.add(entity)
+        if compact_tiles:
+            self.tiles = PaletteTiles(width, height, fill=tile_types.wall)
+        else:
+            self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
+        self.tiles_version = 0  # Bumped on every tile change so anything derived from the tiles knows to refresh
+        # The bounding box (x1, y1, x2, y2), half open, of everything that may look different since the last frame
+        # drawn by a MapRenderer: tile edits, FOV changes and visible entities moving. None if nothing changed
+        self.dirty: Optional[Tuple[int, int, int, int]] = (0, 0, width, height)
 
         # Tiles that the player can currently see
         self.visible = np.full(
@@ -28,39 +65,230 @@ class GameMap:
             (width, height), fill_value=False, order="F"
         )  # Tiles the player has seen before
 
+        # Where the stairs to the floors below and above are, None on maps without them
+        self.downstairs_location: Optional[Tuple[int, int]] = None
+        self.upstairs_location: Optional[Tuple[int, int]] = None
+
+        # The rooms the generator dug out, see analytics for what is derived from them
+        self.rooms: List[RectangularRoom] = []
+        self._analytics: Optional[MapAnalytics] = None
+
+    @classmethod
+    def from_arrays(
+            cls,
+            engine: Engine,
+            tiles,
+            visible: np.ndarray,
+            explored: np.ndarray,
+            columnar: bool = False,
+    ) -> GameMap:
+        """
+        Build a map around existing arrays instead of allocating new ones, such as arrays memory-mapped from a save
+
+        tiles may be a tile_dt array or a PaletteTiles.
+        """
+        width, height = visible.shape
+        game_map = cls(engine, 0, 0, columnar=columnar, compact_tiles=isinstance(tiles, PaletteTiles))
+        game_map.width, game_map.height = width, height
+        game_map.tiles, game_map.visible, game_map.explored = tiles, visible, explored
+        game_map.mark_dirty(0, 0, width, height)
+        return game_map
+
     def get_blocking_entity_at_location(
             self, location_x: int, location_y: int,
     ) -> Optional[Entity]:
-        """Iterates through all entities"""
-        for entity in self.entities:
-            if entity.blocks_movement and entity.x == location_x and entity.y == location_y:
-                return entity
+        """Return the entity blocking movement at this location, if any"""
+        return self.entity_index.blocking_entity_at(location_x, location_y)
+
+    def get_entities_at_location(self, location_x: int, location_y: int) -> List[Entity]:
+        """Return every entity at this location, blocking or not"""
+        return self.entity_index.entities_at(location_x, location_y)
+
+    def is_blocked(self, location_x: int, location_y: int) -> bool:
+        """Return True if this location can't be walked into, either because of the tile or a blocking entity"""
+        if not self.tiles["walkable"][location_x, location_y]:
+            return True
+        return self.entity_index.blocking_entity_at(location_x, location_y) is not None
+
+    def add_entity(self, entity: Entity) -> None:
+        """Add an entity to this map at its current location"""
+        self.entity_index.add(entity)
+        if not self._is_stored(entity):
+            self.unstored_entities.add(entity)
+        self._mark_entity_tile(entity.x, entity.y)
+
+    def add_entities(self, entities: Iterable[Entity]) -> None:
+        """Add many entities to this map at their current locations, marking the tiles they entered in one go"""
+        entities = list(entities)
+        index = self.entity_index
+        xs, ys = [], []
+        for entity in entities:
+            index.add(entity)
+            if not self._is_stored(entity):
+                self.unstored_entities.add(entity)
+            xs.append(entity.x)
+            ys.append(entity.y)
+
+        # The same as _mark_entity_tile for each of them, as one box
+        x, y = np.array(xs, dtype=np.intp), np.array(ys, dtype=np.intp)
+        inside = (0 <= x) & (x < self.width) & (0 <= y) & (y < self.height)
+        x, y = x[inside], y[inside]
+        shown = self.visible[x, y]
+        if shown.any():
+            x, y = x[shown], y[shown]
+            self.mark_dirty(int(x.min()), int(y.min()), int(x.max()) + 1, int(y.max()) + 1)
+
+    def remove_entity(self, entity: Entity) -> None:
+        """Remove an entity from this map"""
+        self._mark_entity_tile(entity.x, entity.y)
+        if entity not in self.entities:
+            raise KeyError(entity)
+        self.entity_index.remove(entity)
+        if self._is_stored(entity):
+            self.entity_store.release(entity)  # type: ignore
+        else:
+            self.unstored_entities.remove(entity)
+
+    def entity_moved(self, entity: Entity, old_x: int, old_y: int) -> None:
+        """Called by Entity after it moved from (old_x, old_y) to its current location on this map"""
+        self.entity_index.update(entity)
+        self._mark_entity_tile(old_x, old_y)
+        self._mark_entity_tile(entity.x, entity.y)
+
+    def _mark_entity_tile(self, x: int, y: int) -> None:
+        """Mark the tile an entity left or entered as dirty. Only visible entities are drawn, so others don't count"""
+        if self.in_bounds(x, y) and self.visible[x, y]:
+            self.mark_dirty(x, y, x + 1, y + 1)
 
-        return None
+    def _is_stored(self, entity: Entity) -> bool:
+        """Return True if this entity's data lives in this map's EntityStore"""
+        return isinstance(entity, StoredEntity) and entity.store is self.entity_store
+
+    def actors(self) -> List[Entity]:
+        """Return every entity other than the player"""
+        player = self.engine.player
+        if self.entity_store is not None:
+            # Everything in the store is a non-player entity
+            actors: List[Entity] = self.entity_store.live_handles()  # type: ignore
+            actors.extend(entity for entity in self.unstored_entities if entity is not player)
+            return actors
+        return [entity for entity in self.entities if entity is not player]
+
+    def visible_entities(self) -> List[Entity]:
+        """Return every entity standing on a tile inside the FOV"""
+        visible = self.visible
+        if self.entity_store is not None:
+            entities = self.entity_store.entities(self.entity_store.visible_indices(visible))
+            entities.extend(entity for entity in self.unstored_entities if visible[entity.x, entity.y])
+            return entities
+        return [entity for entity in self.entities if visible[entity.x, entity.y]]
+
+    @property
+    def analytics(self) -> MapAnalytics:
+        """
+        Connectivity, room and distance indexes of this map, for constant time queries such as which room a tile is in
+
+        They are built on first use, and built again on the first use after the tiles change.
+        """
+        if self._analytics is None or self._analytics.tiles_version != self.tiles_version:
+            self._analytics = MapAnalytics(self)
+        return self._analytics
+
+    def set_tiles(self, index, tile: np.ndarray) -> None:
+        """Assign tile to self.tiles[index]. Use this rather than writing to self.tiles directly"""
+        self.tiles[index] = tile
+        self.mark_tiles_changed(index)
+
+    def mark_tiles_changed(self, index=...) -> None:
+        """
+        Call after writing to self.tiles directly so cached results such as the FOV get recomputed
+
+        index is the part of the tiles that was written. Slices and ints are tracked exactly, anything else marks the
+        whole map as dirty.
+        """
+        self.tiles_version += 1
+        bounds = self._index_bounds(index)
+        if bounds is None:
+            self.mark_dirty(0, 0, self.width, self.height)
+        else:
+            self.mark_dirty(*bounds)
+
+    def _index_bounds(self, index) -> Optional[Tuple[int, int, int, int]]:
+        """Return the bounding box of self.tiles[index] as (x1, y1, x2, y2), or None if it isn't a simple window"""
+        if not isinstance(index, tuple) or len(index) != 2:
+            return None
+        bounds = []
+        for axis, size in zip(index, (self.width, self.height)):
+            if isinstance(axis, slice):
+                start, stop, step = axis.indices(size)
+                if step != 1:
+                    return None
+                bounds.append((start, max(start, stop)))
+            elif isinstance(axis, (int, np.integer)):
+                axis = int(axis) % size
+                bounds.append((axis, axis + 1))
+            else:
+                return None
+        (x1, x2), (y1, y2) = bounds
+        return x1, y1, x2, y2
+
+    def mark_dirty(self, x1: int, y1: int, x2: int, y2: int) -> None:
+        """Grow the dirty bounding box to cover [x1, x2) x [y1, y2)"""
+        if self.dirty is None:
+            self.dirty = (x1, y1, x2, y2)
+        else:
+            dx1, dy1, dx2, dy2 = self.dirty
+            self.dirty = (min(dx1, x1), min(dy1, y1), max(dx2, x2), max(dy2, y2))
+
+    def take_dirty(self) -> Optional[Tuple[int, int, int, int]]:
+        """Return the dirty bounding box and start a new, empty one"""
+        dirty, self.dirty = self.dirty, None
+        return dirty
 
     def in_bounds(self, x: int, y: int) -> bool:
         """Return True if x and y are inside the bounds of this map"""
         return 0 <= x < self.width and 0 <= y < self.height
 
-    def render(self, console: Console) -> None:
+    def visible_entities_in(self, x1: int, y1: int, x2: int, y2: int) -> List[Entity]:
+        """Return the entities inside the FOV and the half open rectangle [x1, x2) x [y1, y2)"""
+        visible = self.visible
+        return [entity for entity in self.entity_index.entities_in_rect(x1, y1, x2, y2) if visible[entity.x, entity.y]]
+
+    def render(self, console: Console, camera: Optional[Camera] = None) -> None:
         """
-        Render the entire map. Faster than using the console.print method we used for individual entities
+        Render the entire map, or only the camera's window of it. Faster than using the console.print method we used
+        for individual entities
 
         If a tile is in the 'visible' array, then draw it with the 'light' colors.
         If it isn't, but it's in the 'explored array, then draw it with the 'dark' colors.
         Otherwise, the default is 'SHROUD'
         """
+        if camera is None:
+            window = slice(0, self.width), slice(0, self.height)
+            x1, y1 = 0, 0
+        else:
+            # Slicing gives views of the arrays, nothing outside the window is looked at or copied
+            window = camera.window
+            x1, y1 = camera.x, camera.y
+        output = console.tiles_rgb[0: window[0].stop - x1, 0: window[1].stop - y1]
 
         # np.select allows us to conditionally draw the tiles we want, based on what's specified in 'condlist'
         # If it's visible it uses the first value in 'choicelist', if it's not visible but explored then it uses the
         # second value in 'choicelist'. If neither are true, it instead uses the value in SHROUD
-        console.tiles_rgb[0: self.width, 0: self.height] = np.select(
-            condlist=[self.visible, self.explored],
-            choicelist=[self.tiles["light"], self.tiles["dark"]],
-            default=tile_types.SHROUD,
-        )
-
-        for entity in self.entities:
-            # Only print entities that are in the FOV
-            if self.visible[entity.x, entity.y]:
-                console.print(x=entity.x, y=entity.y, string=entity.char, fg=entity.color)
+        if isinstance(self.tiles, PaletteTiles):
+            # The same choice as below, done with a single lookup into the tile palette
+            output[...] = self.tiles.graphics(self.visible[window], self.explored[window], window)
+        else:
+            output[...] = np.select(
+                condlist=[self.visible[window], self.explored[window]],
+                choicelist=[self.tiles["light"][window], self.tiles["dark"][window]],
+                default=tile_types.SHROUD,
+            )
+
+        # Only print entities that are in the FOV, and in view of the camera
+        if camera is None:
+            entities = self.visible_entities()
+        else:
+            entities = self.visible_entities_in(*camera.bounds)
+        for entity in entities:
+            console.print(x=entity.x - x1, y=entity.y - y1, string=entity.char, fg=entity.color)
@@ -1,10 +1,32 @@
 from __future__ import annotations
-from typing import Optional, TYPE_CHECKING  # Optional denotes something can be set to None
+from typing import Dict, Optional, Tuple, TYPE_CHECKING  # Optional denotes something can be set to None
 import tcod.event
-from actions import Action, EscapeAction, BumpAction
+from actions import Action, EscapeAction, BumpAction, TakeStairsAction
+from profiling import profiler
 
 if TYPE_CHECKING:
     from engine import Engine
+    from entity import Entity
+    from replay import ReplayRecorder
+
+# Keys that bump the player in a direction, as (dx, dy)
+MOVE_KEYS: Dict[int, Tuple[int, int]] = {
+    tcod.event.K_UP: (0, -1),
+    tcod.event.K_DOWN: (0, 1),
+    tcod.event.K_LEFT: (-1, 0),
+    tcod.event.K_RIGHT: (1, 0),
+}
+
+ESCAPE_KEYS = {tcod.event.K_ESCAPE}
+
+# Keys that take the stairs, as the direction: ">" goes down and "<" goes up. Both need shift held
+STAIRS_KEYS: Dict[int, int] = {
+    tcod.event.K_PERIOD: 1,
+    tcod.event.K_COMMA: -1,
+}
+
+PROFILER_KEY = tcod.event.K_F12  # Toggles the profiler, the trace is written to PROFILE_PATH when it is turned off
+PROFILE_PATH = "profile.json"
 
 
 # Superclass EventDispatch allows us to send an event to its proper method based on what type of event it is
@@ -12,6 +34,25 @@ class EventHandler(tcod.event.EventDispatch[Action]):
     """The EventHandler class take an Action class event and performs an action"""
     def __init__(self, engine: Engine):
         self.engine = engine
+        # One reusable action per key for the current player, see keymap
+        self._keymap: Dict[int, Action] = {}
+        self._keymap_player: Optional[Entity] = None
+        self.recorder: Optional[ReplayRecorder] = None  # When set, every dispatched action is written to a replay log
+
+    def keymap(self) -> Dict[int, Action]:
+        """
+        Return the action each key performs for the current player
+
+        Actions don't change once made, so they are built once and performed again on every press instead of
+        allocating new ones. The table is rebuilt if the engine gets a new player.
+        """
+        player = self.engine.player
+        if player is not self._keymap_player:
+            self._keymap = {key: BumpAction(player, dx, dy) for key, (dx, dy) in MOVE_KEYS.items()}
+            self._keymap.update({key: EscapeAction(player) for key in ESCAPE_KEYS})
+            self._keymap.update({key: TakeStairsAction(player, direction) for key, direction in STAIRS_KEYS.items()})
+            self._keymap_player = player
+        return self._keymap
 
     def handle_events(self) -> None:
         for event in tcod.event.wait():
@@ -20,9 +61,18 @@ class EventHandler(tcod.event.EventDispatch[Action]):
             if action is None:
                 continue
 
-            action.perform()
-            self.engine.handle_enemy_turns()
-            self.engine.update_fov()
+            if self.recorder is not None:
+                self.recorder.record(action)
+            self.engine.perform_turn(action)
+
+    def toggle_profiler(self) -> None:
+        """Turn the profiler on or off without taking a turn. Turning it off writes the trace"""
+        if profiler.toggle():
+            profiler.reset()
+            self.engine.message("Profiling started")
+        else:
+            profiler.export(PROFILE_PATH)
+            self.engine.message(f"Profiling stopped, trace written to {PROFILE_PATH}")
 
     # Event quit
     def ev_quit(self, event: tcod.event.Quit) -> Optional[Action]:
@@ -30,26 +80,12 @@ class EventHandler(tcod.event.EventDispatch[Action]):
 
     # When a key is pressed down
     def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[Action]:
-        # This variable holds whatever subclass of Action we end up assigning to it. If no valid key, set to None
-        action: Optional[Action] = None
+        if event.sym == PROFILER_KEY:
+            self.toggle_profiler()
+            return None
 
-        # The key pressed with no modifiers
-        key = event.sym
-
-        player = self.engine.player
+        if event.sym in STAIRS_KEYS and not event.mod & tcod.event.KMOD_SHIFT:
+            return None  # "." or "," on their own
 
-        # Uses MovementAction to move the player
-        if key == tcod.event.K_UP:
-            action = BumpAction(player, dx=0, dy=-1)
-        elif key == tcod.event.K_DOWN:
-            action = BumpAction(player, dx=0, dy=1)
-        elif key == tcod.event.K_LEFT:
-            action = BumpAction(player, dx=-1, dy=0)
-        elif key == tcod.event.K_RIGHT:
-            action = BumpAction(player, dx=1, dy=0)
-
-        elif key == tcod.event.K_ESCAPE:
-            action = EscapeAction(player)
-
-        # No valid key was pressed
-        return action
+        # The key pressed is looked up in the keymap, None if no valid key was pressed
+        return self.keymap().get(event.sym)
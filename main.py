@@ -1,12 +1,39 @@
 #!/usr/bin/env python3
-import copy
+import argparse
+import json
+import random
+import time
 import tcod
-from engine import Engine
-import entity_factories
-from procgen import generate_dungeon
+
+
+def show_loading_screen(console: tcod.Console, context: tcod.context.Context) -> None:
+    """Put a frame up straight away, so the window isn't blank while the first dungeon is generated"""
+    console.clear()
+    console.print(
+        x=console.width // 2, y=console.height // 2, string="Generating the dungeon...", alignment=tcod.CENTER,
+    )
+    context.present(console)
+    console.clear()
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Yet Another Roguelike Tutorial")
+    parser.add_argument(
+        "--realtime", action="store_true",
+        help="Use the real time loop: fixed tick simulation, polled input and frame rate capped rendering",
+    )
+    parser.add_argument("--tick-rate", type=int, default=30, help="Simulation ticks per second, with --realtime")
+    parser.add_argument("--fps", type=int, default=60, help="Frame rate cap, with --realtime")
+    parser.add_argument(
+        "--record", default=None, metavar="PATH",
+        help="Record the game to a replay log at PATH, which replay.py plays back headlessly",
+    )
+    parser.add_argument(
+        "--startup-benchmark", action="store_true",
+        help="Quit once the first frame of the game is shown, printing when each frame was shown, see bench_startup",
+    )
+    args = parser.parse_args()
+
     # The screen size
     screen_width = 80
     screen_height = 50
@@ -28,21 +55,6 @@ def main() -> None:
         "dejavu10x10_gs_tc.png", 32, 8, tcod.tileset.CHARMAP_TCOD
     )
 
-    # Create our initial two entities
-    player = copy.deepcopy(entity_factories.player)
-
-    engine = Engine(player=player)
-
-    engine.game_map = generate_dungeon(
-        max_rooms=max_rooms,
-        room_min_size=room_min_size,
-        room_max_size=room_max_size,
-        map_width=map_width,
-        map_height=map_height,
-        max_monsters_per_room=max_monsters_per_room,
-        engine=engine,
-    )
-
     # Create a window based on this console and tileset
     with tcod.context.new_terminal(
         screen_width,
@@ -52,12 +64,67 @@ def main() -> None:
         vsync=True,
     ) as context:
         root_console = tcod.Console(screen_width, screen_height, order="F")  # Numpy access 2D arrays in [y,x] order
+        show_loading_screen(root_console, context)
+        loading_frame_shown = time.time()
+
+        # Imported once the window is up: the engine, the entity templates and the dungeon generation with its
+        # background worker aren't needed before
+        from camera import Camera
+        from engine import Engine
+        import entity_factories
+        from world import World
+
+        # Create our initial two entities
+        player = entity_factories.player.instantiate()
+
+        engine = Engine(player=player)
+        # Shows the part of the map around the player, so maps can be bigger than the screen
+        engine.camera = Camera(screen_width, map_height)
+
+        # The floors of the dungeon. The one below the player's is generated in the background, ready for the stairs
+        world = World(
+            engine,
+            seed=random.randrange(2**32),
+            pregenerate=False,  # Until the first frame is up, starting the worker process would only delay it
+            max_rooms=max_rooms,
+            room_min_size=room_min_size,
+            room_max_size=room_max_size,
+            map_width=map_width,
+            map_height=map_height,
+            max_monsters_per_room=max_monsters_per_room,
+        )
+        engine.world = world
+        world.enter(0)
+        engine.render(console=root_console, context=context)
+        world.pregenerate = True
+        world.prepare(1)
+
+        if args.startup_benchmark:
+            print(json.dumps({"loading_frame": loading_frame_shown, "first_frame": time.time()}))
+            world.close()
+            return
+
+        if args.record:
+            from replay import ReplayRecorder
+
+            engine.event_handler.recorder = ReplayRecorder(args.record, world.seed, world.generation_options)
+
+        with world:
+            if args.realtime:
+                from game_loop import RealtimeLoop
+
+                loop = RealtimeLoop(engine, context, root_console, tick_rate=args.tick_rate, max_fps=args.fps)
+                try:
+                    loop.run()
+                finally:
+                    # Per phase timings, for profiling
+                    print(json.dumps(loop.timings.summary(), indent=2))
 
-        # Main loop
-        while True:
-            # Draw the entities on the screen
-            engine.render(console=root_console, context=context)
-            engine.event_handler.handle_events()
+            # Main loop
+            while True:
+                engine.event_handler.handle_events()
+                # Draw the entities on the screen
+                engine.render(console=root_console, context=context)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,189 @@
+"""
+Indexes of a map's layout, for answering questions about it without scanning the tiles
+
+MapAnalytics is built from a GameMap's walkable tiles and its rooms, and holds
+
+- components: a label per tile, the same for every walkable tile that can reach the other, 0 for walls
+- room_ids: the index in GameMap.rooms of the room each tile is inside of, -1 outside of rooms
+- the room graph: which rooms are joined by a corridor, or touch, without going through another room
+- nearest_room and room_distance: the closest room to every walkable tile and how many steps away it is
+
+After it is built every query is an array lookup. GameMap.analytics builds it on first use and rebuilds it once the
+tiles have changed.
+"""
+from __future__ import annotations
+from typing import Dict, FrozenSet, List, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+# Offsets to half of the 8 neighbours, every neighbouring pair of tiles is one of these apart in one direction
+_HALF_NEIGHBOURS = ((1, 0), (0, 1), (1, 1), (1, -1))
+_NEIGHBOURS = _HALF_NEIGHBOURS + tuple((-dx, -dy) for dx, dy in _HALF_NEIGHBOURS)
+
+
+def _neighbour_pairs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Return the tiles where mask is set, and every pair of them that are 8-way neighbours
+
+    The tiles are returned as x and y arrays, and each pair as two indices into them.
+    """
+    xs, ys = np.nonzero(mask)
+    width, height = mask.shape
+    index = np.full((width + 2, height + 2), -1, dtype=np.intp)  # Padded so neighbours never go out of bounds
+    index[xs + 1, ys + 1] = np.arange(len(xs))
+    firsts, seconds = [], []
+    for dx, dy in _HALF_NEIGHBOURS:
+        neighbour = index[xs + 1 + dx, ys + 1 + dy]
+        found = neighbour >= 0
+        firsts.append(np.flatnonzero(found))
+        seconds.append(neighbour[found])
+    return xs, ys, np.concatenate(firsts), np.concatenate(seconds)
+
+
+def _union(count: int, firsts: np.ndarray, seconds: np.ndarray) -> np.ndarray:
+    """
+    Return a label per node such that nodes joined by a chain of (first, second) edges share it
+
+    Every node starts as its own root. Each pass hooks the larger root of every edge onto the smaller one, then
+    follows parents until every node points straight at a root. It takes a few passes however long the chains are.
+    """
+    parent = np.arange(count)
+    while True:
+        root_a, root_b = parent[firsts], parent[seconds]
+        if np.array_equal(root_a, root_b):
+            return parent
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+
+def _component_raster(
+        shape: Tuple[int, int], xs: np.ndarray, ys: np.ndarray, firsts: np.ndarray, seconds: np.ndarray,
+) -> np.ndarray:
+    """Label the tiles joined by the neighbour pairs from _neighbour_pairs, see label_components"""
+    parent = _union(len(xs), firsts, seconds)
+    # Every root is the lowest node of its component, so numbering the roots in order numbers the components from 1
+    labels = np.cumsum(parent == np.arange(len(parent)), dtype=np.int32)
+    components = np.zeros(shape, dtype=np.int32, order="F")
+    components[xs, ys] = labels[parent]
+    return components
+
+
+def label_components(mask: np.ndarray) -> np.ndarray:
+    """Return an int32 array labeling the 8-way connected areas of mask from 1 up, 0 where mask isn't set"""
+    return _component_raster(mask.shape, *_neighbour_pairs(mask))
+
+
+class MapAnalytics:
+    """Connectivity and room indexes of a GameMap, as it was when this was built. See the module docstring"""
+    def __init__(self, game_map: GameMap):
+        self.tiles_version = game_map.tiles_version  # What this was built from, GameMap.analytics checks it
+        walkable = np.asarray(game_map.tiles["walkable"], dtype=bool)
+        shape = walkable.shape
+
+        pairs = _neighbour_pairs(walkable)
+        self.components = _component_raster(shape, *pairs)
+        self.component_count = int(self.components.max(initial=0))
+
+        self.room_count = len(game_map.rooms)
+        self.room_ids = np.full(shape, -1, dtype=np.int32, order="F")
+        for room_id, room in enumerate(game_map.rooms):
+            self.room_ids[room.inner] = room_id
+        self.room_ids[~walkable] = -1  # Only the floor of a room counts as being inside of it
+
+        self.room_neighbours = self._room_graph(*pairs)
+        self.nearest_room, self.room_distance = self._nearest_rooms(walkable)
+
+    def _room_graph(
+            self, xs: np.ndarray, ys: np.ndarray, firsts: np.ndarray, seconds: np.ndarray,
+    ) -> List[FrozenSet[int]]:
+        """Return the rooms each room is joined to, by a stretch of corridor or by touching it"""
+        rooms = self.room_ids[xs, ys]
+
+        # Label the stretches of corridor, split wherever they pass through a room
+        in_corridor = rooms < 0
+        corridor_edges = in_corridor[firsts] & in_corridor[seconds]
+        stretch = _union(len(xs), firsts[corridor_edges], seconds[corridor_edges])
+
+        # Every (stretch, room) and (room, room) that are neighbours somewhere
+        first_rooms, second_rooms = rooms[firsts], rooms[seconds]
+        touching = (first_rooms >= 0) & (second_rooms < 0)
+        entered = (first_rooms < 0) & (second_rooms >= 0)
+        room_count = max(self.room_count, 1)
+        stretch_rooms = np.unique(np.concatenate([
+            stretch[seconds[touching]] * room_count + first_rooms[touching],
+            stretch[firsts[entered]] * room_count + second_rooms[entered],
+        ]))
+        direct = (first_rooms >= 0) & (second_rooms >= 0) & (first_rooms != second_rooms)
+
+        neighbours: List[set] = [set() for _ in range(self.room_count)]
+        for a, b in zip(first_rooms[direct].tolist(), second_rooms[direct].tolist()):
+            neighbours[a].add(b)
+            neighbours[b].add(a)
+        # Rooms reached by the same stretch of corridor are all joined to each other
+        stretches: Dict[int, List[int]] = {}
+        for corridor, room in zip(*(part.tolist() for part in np.divmod(stretch_rooms, room_count))):
+            stretches.setdefault(corridor, []).append(room)
+        for joined in stretches.values():
+            for room in joined:
+                neighbours[room].update(joined)
+                neighbours[room].discard(room)
+        return [frozenset(rooms) for rooms in neighbours]
+
+    def _nearest_rooms(self, walkable: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Walk outwards from every room at once, a step at a time, labeling each walkable tile with the room that got
+        there first and the number of steps it took. Tiles no room can reach get -1 for both
+        """
+        width, height = walkable.shape
+        # Padded so a step never goes out of bounds, the border is never walkable
+        open_tiles = np.zeros((width + 2, height + 2), dtype=bool)
+        open_tiles[1:-1, 1:-1] = walkable
+        nearest = np.full((width + 2, height + 2), -1, dtype=np.int32)
+        nearest[1:-1, 1:-1] = self.room_ids
+        distance = np.where(nearest >= 0, 0, -1).astype(np.int32)
+        open_tiles &= nearest < 0
+
+        xs, ys = np.nonzero(nearest >= 0)
+        steps = 0
+        while len(xs):
+            steps += 1
+            step_x = np.concatenate([xs + dx for dx, _ in _NEIGHBOURS])
+            step_y = np.concatenate([ys + dy for _, dy in _NEIGHBOURS])
+            labels = np.tile(nearest[xs, ys], len(_NEIGHBOURS))
+            reached = open_tiles[step_x, step_y]
+            step_x, step_y, labels = step_x[reached], step_y[reached], labels[reached]
+            # A tile reached by several rooms in the same step goes to the first of them
+            _, first = np.unique(step_x * (height + 2) + step_y, return_index=True)
+            xs, ys = step_x[first], step_y[first]
+            nearest[xs, ys] = labels[first]
+            distance[xs, ys] = steps
+            open_tiles[xs, ys] = False
+        return np.asfortranarray(nearest[1:-1, 1:-1]), np.asfortranarray(distance[1:-1, 1:-1])
+
+    def component_at(self, x: int, y: int) -> int:
+        """The label of the walkable area (x, y) is part of, 0 for a wall"""
+        return int(self.components[x, y])
+
+    def is_reachable(self, x1: int, y1: int, x2: int, y2: int) -> bool:
+        """Whether there is a walkable path from (x1, y1) to (x2, y2), ignoring entities"""
+        component = self.components[x1, y1]
+        return bool(component and component == self.components[x2, y2])
+
+    def room_at(self, x: int, y: int) -> int:
+        """The index in GameMap.rooms of the room (x, y) is in, -1 if it isn't in one"""
+        return int(self.room_ids[x, y])
+
+    def neighbours(self, room_id: int) -> FrozenSet[int]:
+        """The rooms joined to room_id by a corridor, or by touching it"""
+        return self.room_neighbours[room_id]
+
+    def nearest_room_to(self, x: int, y: int) -> Tuple[int, int]:
+        """The room closest to (x, y) on foot and how many steps away it is, (-1, -1) if no room can be reached"""
+        return int(self.nearest_room[x, y]), int(self.room_distance[x, y])
@@ -0,0 +1,155 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+import tcod.path
+
+if TYPE_CHECKING:
+    from entity import Entity
+    from game_map import GameMap
+
+UNREACHABLE = np.iinfo(np.int32).max
+
+# Steps to the 8 neighbours, cardinal ones first so they win ties with diagonals
+NEIGHBOR_DX = np.array([0, 0, -1, 1, -1, 1, -1, 1])
+NEIGHBOR_DY = np.array([-1, 1, 0, 0, -1, -1, 1, 1])
+
+
+class FlowField:
+    """
+    The walking distance from every tile to one goal, such as the player, shared by every monster heading there
+
+    Instead of every monster searching for its own path, the distances are computed once with tcod's Dijkstra and
+    each monster just steps to whichever neighbouring tile is closest to the goal. The field is only recomputed when
+    the goal moves or the map's walkable tiles change (tracked with GameMap.tiles_version), bumping into a wall or
+    waiting costs nothing.
+
+    Given a radius, only the (2r+1)x(2r+1) window around the goal is searched, like Engine.fov_windowed, which is what
+    ChunkedGameMap needs. Monsters outside the window don't move.
+    """
+    def __init__(self) -> None:
+        # Distances padded with a 1 tile UNREACHABLE border, so neighbour lookups never fall off the array
+        self.distance: np.ndarray = np.full((2, 2), UNREACHABLE, dtype=np.int32, order="F")
+        self.x1 = 0  # The world position of distance[1, 1]
+        self.y1 = 0
+        self.recomputes = 0  # How many times update actually ran Dijkstra, for profiling
+        self._key: Optional[tuple] = None
+
+    def update(self, game_map: GameMap, goal_x: int, goal_y: int, radius: Optional[int] = None) -> bool:
+        """Make sure the field leads to (goal_x, goal_y) on game_map, returns True if it had to be recomputed"""
+        key = (game_map, game_map.tiles_version, goal_x, goal_y, radius)
+        if key == self._key:
+            return False
+
+        if radius is None:
+            x1, y1, x2, y2 = 0, 0, game_map.width, game_map.height
+        else:
+            x1, y1 = max(0, goal_x - radius), max(0, goal_y - radius)
+            x2, y2 = min(game_map.width, goal_x + radius + 1), min(game_map.height, goal_y + radius + 1)
+
+        shape = (x2 - x1 + 2, y2 - y1 + 2)
+        cost = np.zeros(shape, dtype=np.int8, order="F")  # 0 is impassable to dijkstra2d, which covers the border
+        cost[1:-1, 1:-1] = game_map.tiles["walkable"][x1:x2, y1:y2]
+        distance = tcod.path.maxarray(shape, dtype=np.int32, order="F")
+        distance[goal_x - x1 + 1, goal_y - y1 + 1] = 0
+        tcod.path.dijkstra2d(distance, cost, 2, 3, out=distance)  # Diagonals cost a bit more than straight steps
+
+        self.distance, self.x1, self.y1 = distance, x1, y1
+        self.recomputes += 1
+        self._key = key
+        return True
+
+    def distance_at(self, x: int, y: int) -> int:
+        """Return the distance from (x, y) to the goal, UNREACHABLE if there is no path or it's outside the field"""
+        local_x, local_y = x - self.x1 + 1, y - self.y1 + 1
+        width, height = self.distance.shape
+        if not (0 < local_x < width - 1 and 0 < local_y < height - 1):
+            return UNREACHABLE
+        return int(self.distance[local_x, local_y])
+
+    def occupied(self, game_map: GameMap, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Return a boolean array shaped like distance which is True wherever a blocking entity stands
+
+        Only the area the entities at xs, ys can step into is filled in, the rest of the map is never looked at.
+        """
+        width, height = self.distance.shape
+        grid = np.zeros((width, height), dtype=bool, order="F")
+        if len(xs) == 0:
+            return grid
+        # The entities' bounding box grown by one step, clipped to the field
+        x1 = max(int(xs.min()) - 1, self.x1)
+        y1 = max(int(ys.min()) - 1, self.y1)
+        x2 = min(int(xs.max()) + 2, self.x1 + width - 2)
+        y2 = min(int(ys.max()) + 2, self.y1 + height - 2)
+        for entity in game_map.entity_index.entities_in_rect(x1, y1, x2, y2):
+            if entity.blocks_movement:
+                grid[entity.x - self.x1 + 1, entity.y - self.y1 + 1] = True
+        return grid
+
+    def downhill(
+            self, xs: np.ndarray, ys: np.ndarray, occupied: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pick the next step for the entities at xs, ys, all at once
+
+        Returns dx, dy and a mask of the entities that should move. Occupied tiles count as impassable, so entities
+        only move onto a free tile which is strictly closer to the goal, and when two entities pick the same tile only
+        the first one gets it. Entities outside the field never move.
+        """
+        distance = self.distance
+        width, height = distance.shape
+        local_x = xs - self.x1 + 1
+        local_y = ys - self.y1 + 1
+        inside = (local_x > 0) & (local_x < width - 1) & (local_y > 0) & (local_y < height - 1)
+        local_x = np.where(inside, local_x, 1)
+        local_y = np.where(inside, local_y, 1)
+
+        # Every entity's 8 neighbours as an (n, 8) array. The border keeps these in bounds
+        neighbor_x = local_x[:, None] + NEIGHBOR_DX
+        neighbor_y = local_y[:, None] + NEIGHBOR_DY
+        options = distance[neighbor_x, neighbor_y]
+        options[occupied[neighbor_x, neighbor_y]] = UNREACHABLE
+
+        best = options.argmin(axis=1)
+        rows = np.arange(len(xs))
+        moving = inside & (options[rows, best] < distance[local_x, local_y])
+
+        # Resolve entities trying to step onto the same tile in favour of the first one
+        target = neighbor_x[rows, best] * height + neighbor_y[rows, best]
+        movers = np.flatnonzero(moving)
+        _, first = np.unique(target[movers], return_index=True)
+        moving[:] = False
+        moving[movers[first]] = True
+
+        return NEIGHBOR_DX[best], NEIGHBOR_DY[best], moving
+
+    def step(self, game_map: GameMap, actors: Sequence[Entity]) -> int:
+        """
+        Move every actor one step towards the goal and return how many moved
+
+        An actor listed more than once, such as one faster than the player, steps once for every time it is listed.
+        Actors that are no longer on game_map, such as ones unloaded with their chunk, are skipped.
+        """
+        # Split the actors into rounds in which nobody appears twice, each round is one vectorized step
+        rounds: List[List[Entity]] = []
+        turns_taken: Dict[Entity, int] = {}
+        entities = game_map.entities
+        for actor in actors:
+            if actor not in entities:
+                continue
+            turn = turns_taken.get(actor, 0)
+            turns_taken[actor] = turn + 1
+            if turn == len(rounds):
+                rounds.append([])
+            rounds[turn].append(actor)
+
+        moved = 0
+        for batch in rounds:
+            xs = np.fromiter((actor.x for actor in batch), dtype=np.intp, count=len(batch))
+            ys = np.fromiter((actor.y for actor in batch), dtype=np.intp, count=len(batch))
+            dx, dy, moving = self.downhill(xs, ys, self.occupied(game_map, xs, ys))
+            for i in np.flatnonzero(moving).tolist():
+                batch[i].move(int(dx[i]), int(dy[i]))
+            moved += int(moving.sum())
+        return moved
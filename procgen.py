@@ -1,14 +1,15 @@
 from __future__ import annotations
-from typing import Iterator, List, Tuple, TYPE_CHECKING
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import zlib
+import numpy as np  # type: ignore
+from engine import Engine
+from entity import EntityTemplate
 import entity_factories
 from game_map import GameMap
 import tile_types
 import random
 import tcod
 
-if TYPE_CHECKING:
-    from engine import Engine
-
 
 class RectangularRoom:
     def __init__(self, x: int, y: int, width: int, height: int):
@@ -65,28 +66,30 @@ class RectangularRoom:
         )
 
 
-def place_entities(room: RectangularRoom, dungeon: GameMap, maximum_monsters: int) -> None:
-    number_of_monsters = random.randint(0, maximum_monsters)
+def place_entities(room: RectangularRoom, dungeon: GameMap, maximum_monsters: int, rng: random.Random) -> None:
+    number_of_monsters = rng.randint(0, maximum_monsters)
 
     # Randomly place up to two monsters
     for i in range(number_of_monsters):
-        x = random.randint(room.x1 + 1, room.x2 - 1)
-        y = random.randint(room.y1 + 1, room.y2 - 1)
+        x = rng.randint(room.x1 + 1, room.x2 - 1)
+        y = rng.randint(room.y1 + 1, room.y2 - 1)
 
         # If there is no other entity at that location, place entity
-        if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
-            if random.random() < 0.8:
+        if not dungeon.get_entities_at_location(x, y):
+            if rng.random() < 0.8:
                 entity_factories.orc.spawn(dungeon, x, y)
             else:
                 entity_factories.troll.spawn(dungeon, x, y)
 
 
-def tunnel_between(start: Tuple[int, int], end: Tuple[int, int]) -> Iterator[Tuple[int, int]]:
+def tunnel_between(
+        start: Tuple[int, int], end: Tuple[int, int], rng: random.Random,
+) -> Iterator[Tuple[int, int]]:
     """Return an L-shaped tunnel between these two points"""
     x1, y1 = start
     x2, y2 = end
 
-    if random.random() < 0.5:
+    if rng.random() < 0.5:
         # Move horizontally, then vertically
         corner_x, corner_y = x2, y1
     else:
@@ -100,6 +103,33 @@ def tunnel_between(start: Tuple[int, int], end: Tuple[int, int]) -> Iterator[Tup
         yield x, y  # Yield expressions return the values but keep the local state, allow it to pick up where it left
 
 
+def tunnel_index(
+        start: Tuple[int, int], end: Tuple[int, int], rng: random.Random,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the same tunnel as tunnel_between, drawing the same randomness, as x and y arrays
+
+    Ready to write to the tiles in one fancy indexed assignment instead of one tile at a time.
+    """
+    x1, y1 = start
+    x2, y2 = end
+    corner = (x2, y1) if rng.random() < 0.5 else (x1, y2)
+    points = np.concatenate([tcod.los.bresenham((x1, y1), corner), tcod.los.bresenham(corner, (x2, y2))])
+    return points[:, 0], points[:, 1]
+
+
+def place_downstairs(dungeon: GameMap, x: int, y: int) -> None:
+    """Put the stairs to the floor below at (x, y)"""
+    dungeon.set_tiles((x, y), tile_types.down_stairs)
+    dungeon.downstairs_location = (x, y)
+
+
+def place_upstairs(dungeon: GameMap, x: int, y: int) -> None:
+    """Put the stairs to the floor above at (x, y)"""
+    dungeon.set_tiles((x, y), tile_types.up_stairs)
+    dungeon.upstairs_location = (x, y)
+
+
 def generate_dungeon(
         max_rooms: int,
         room_min_size: int,
@@ -108,10 +138,26 @@ def generate_dungeon(
         map_height: int,
         max_monsters_per_room: int,
         engine: Engine,
+        columnar: bool = False,
+        seed: Optional[int] = None,
+        rng: Optional[random.Random] = None,
+        compact_tiles: bool = False,
 ) -> GameMap:
-    """Generate a new dungeon map"""
+    """
+    Generate a new dungeon map
+
+    columnar=True stores the spawned monsters in the map's EntityStore instead of as individual objects.
+    compact_tiles=True stores the tiles as palette IDs, see PaletteTiles.
+    All randomness is drawn from rng, or from a new random.Random(seed) if no rng is given, so the same seed always
+    generates the same map. Without either the map is different every time.
+    """
+    if rng is None:
+        rng = random.Random(seed)
+
     player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, entities=[player])
+    dungeon = GameMap(
+        engine, map_width, map_height, entities=[player], columnar=columnar, compact_tiles=compact_tiles,
+    )
 
     # Running list of RectangularRoom rooms
     rooms: List[RectangularRoom] = []
@@ -119,12 +165,12 @@ def generate_dungeon(
     # Algorithm may or may not produce room based on location and intersection of other rooms
     for r in range(max_rooms):
         # Get a random sized room
-        room_width = random.randint(room_min_size, room_max_size)
-        room_height = random.randint(room_min_size, room_max_size)
+        room_width = rng.randint(room_min_size, room_max_size)
+        room_height = rng.randint(room_min_size, room_max_size)
 
         # Get a random x,y coordinate where the room will fit within the dungeon
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
+        x = rng.randint(0, dungeon.width - room_width - 1)
+        y = rng.randint(0, dungeon.height - room_height - 1)
 
         # RectangularRoom class makes rectangles easier to work with
         new_room = RectangularRoom(x, y, room_width, room_height)
@@ -135,20 +181,406 @@ def generate_dungeon(
         # If there are no intersections then the room is valid
 
         # Dig out this rooms inner area
-        dungeon.tiles[new_room.inner] = tile_types.floor
+        dungeon.set_tiles(new_room.inner, tile_types.floor)
 
         if len(rooms) == 0:
             # The first room, where the player starts
             player.place(*new_room.center, dungeon)
         else:
             # All rooms after the first
-            # Dig out a tunnel between this room and the previous one.
-            for x, y in tunnel_between(rooms[-1].center, new_room.center):
-                dungeon.tiles[x, y] = tile_types.floor
+            # Dig out a tunnel between this room and the previous one, in one write
+            dungeon.set_tiles(tunnel_index(rooms[-1].center, new_room.center, rng), tile_types.floor)
 
-        place_entities(new_room, dungeon, max_monsters_per_room)
+        place_entities(new_room, dungeon, max_monsters_per_room, rng)
 
         # Append the new room to the list
         rooms.append(new_room)
 
+    if rooms:
+        # The stairs down are in the middle of the last room
+        place_downstairs(dungeon, *rooms[-1].center)
+    dungeon.rooms = rooms
+
+    return dungeon
+
+
+def generate_chunk(
+        dungeon: GameMap,
+        chunk_x: int,
+        chunk_y: int,
+        chunk_size: int,
+        max_rooms: int,
+        room_min_size: int,
+        room_max_size: int,
+        max_monsters_per_room: int,
+        rng: random.Random,
+) -> np.ndarray:
+    """
+    Generate one chunk_size x chunk_size chunk of a ChunkedGameMap and return its tiles
+
+    Rooms are placed like generate_dungeon does, but inside the chunk. Every chunk has a hub tunnel running from its
+    center to the middle of each of its edges, and the hubs of neighbouring chunks meet at their shared edge, so the
+    whole world is connected no matter which chunks are generated first. Monsters are spawned onto dungeon directly.
+    """
+    origin_x, origin_y = chunk_x * chunk_size, chunk_y * chunk_size
+    width = min(chunk_size, dungeon.width - origin_x)
+    height = min(chunk_size, dungeon.height - origin_y)
+    tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
+
+    def carve(points: Iterable[Tuple[int, int]]) -> None:
+        for x, y in points:
+            if 0 <= x - origin_x < width and 0 <= y - origin_y < height:
+                tiles[x - origin_x, y - origin_y] = tile_types.floor
+
+    # The hub, a cross through the middle of the chunk out to every edge
+    hub = (origin_x + width // 2, origin_y + height // 2)
+    carve(tcod.los.bresenham(hub, (origin_x, hub[1])).tolist())
+    carve(tcod.los.bresenham(hub, (origin_x + width - 1, hub[1])).tolist())
+    carve(tcod.los.bresenham(hub, (hub[0], origin_y)).tolist())
+    carve(tcod.los.bresenham(hub, (hub[0], origin_y + height - 1)).tolist())
+
+    rooms: List[RectangularRoom] = []
+    for r in range(max_rooms):
+        room_width = rng.randint(room_min_size, room_max_size)
+        room_height = rng.randint(room_min_size, room_max_size)
+        if room_width >= width - 1 or room_height >= height - 1:
+            continue  # A chunk at the edge of the world can be too small for this room
+
+        x = rng.randint(origin_x, origin_x + width - room_width - 1)
+        y = rng.randint(origin_y, origin_y + height - room_height - 1)
+        new_room = RectangularRoom(x, y, room_width, room_height)
+        if any(new_room.intersects(other_room) for other_room in rooms):
+            continue
+
+        inner_x, inner_y = new_room.inner
+        tiles[inner_x.start - origin_x: inner_x.stop - origin_x, inner_y.start - origin_y: inner_y.stop - origin_y] = (
+            tile_types.floor
+        )
+        # Every room is joined to the hub, which keeps it connected to the rest of the world
+        carve(tunnel_between(hub, new_room.center, rng))
+
+        place_entities(new_room, dungeon, max_monsters_per_room, rng)
+        rooms.append(new_room)
+
+    return tiles
+
+
+class RoomArray:
+    """
+    Rooms stored as parallel NumPy arrays of corners instead of a list of RectangularRoom objects
+
+    The corners mean the same as RectangularRoom's x1, y1, x2, y2. To test candidates against every existing room in
+    one vectorized comparison without comparing against rooms on the other side of the map, rooms are also bucketed
+    into a coarse grid of cells at least as big as the largest room. A room or candidate then touches at most 2x2
+    cells, and only the rooms in those cells can overlap it.
+    """
+    def __init__(self, capacity: int, map_width: int, map_height: int, room_max_size: int):
+        self.x1 = np.zeros(capacity, dtype=np.int32)
+        self.y1 = np.zeros(capacity, dtype=np.int32)
+        self.x2 = np.zeros(capacity, dtype=np.int32)
+        self.y2 = np.zeros(capacity, dtype=np.int32)
+        self.count = 0
+
+        # Room x1..x2 spans room_max_size + 1 tiles at most, so with cells that size a room touches at most 2 per axis
+        self.cell_size = room_max_size + 1
+        grid_shape = (map_width // self.cell_size + 1, map_height // self.cell_size + 1)
+        self.cell_rooms = np.full(grid_shape + (8,), -1, dtype=np.int32)  # Room indices in each cell, -1 if unused
+        self.cell_counts = np.zeros(grid_shape, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> RectangularRoom:
+        x1, y1 = int(self.x1[index]), int(self.y1[index])
+        return RectangularRoom(x1, y1, int(self.x2[index]) - x1, int(self.y2[index]) - y1)
+
+    def add(self, x1: int, y1: int, x2: int, y2: int) -> None:
+        index = self.count
+        self.x1[index], self.y1[index], self.x2[index], self.y2[index] = x1, y1, x2, y2
+        self.count += 1
+
+        size = self.cell_size
+        for cell_x in {x1 // size, x2 // size}:
+            for cell_y in {y1 // size, y2 // size}:
+                slot = self.cell_counts[cell_x, cell_y]
+                if slot == self.cell_rooms.shape[2]:
+                    # This cell is full, double the room slots of every cell
+                    self.cell_rooms = np.concatenate([self.cell_rooms, np.full_like(self.cell_rooms, -1)], axis=2)
+                self.cell_rooms[cell_x, cell_y, slot] = index
+                self.cell_counts[cell_x, cell_y] = slot + 1
+
+    def intersects(self, x1: np.ndarray, y1: np.ndarray, x2: np.ndarray, y2: np.ndarray) -> np.ndarray:
+        """Return, for each candidate room, whether it overlaps any room in this array. Same test as intersects()"""
+        size = self.cell_size
+        # The indices of every room in the (up to) 2x2 cells each candidate touches, -1 for empty slots
+        nearby = np.concatenate([
+            self.cell_rooms[cell_x // size, cell_y // size]
+            for cell_x in (x1, x2)
+            for cell_y in (y1, y2)
+        ], axis=1)
+        used = nearby >= 0
+
+        overlap = (
+            used
+            & (x1[:, None] <= self.x2[nearby])
+            & (x2[:, None] >= self.x1[nearby])
+            & (y1[:, None] <= self.y2[nearby])
+            & (y2[:, None] >= self.y1[nearby])
+        )
+        return overlap.any(axis=1)
+
+    @property
+    def centers(self) -> Tuple[np.ndarray, np.ndarray]:
+        """The same centers as RectangularRoom.center, for every room"""
+        n = self.count
+        return (self.x1[:n] + self.x2[:n]) // 2, (self.y1[:n] + self.y2[:n]) // 2
+
+
+def _place_rooms(
+        rng: np.random.Generator, max_rooms: int, room_min_size: int, room_max_size: int, width: int, height: int,
+        batch_size: int = 256,
+) -> RoomArray:
+    """
+    Draw max_rooms candidate rooms and keep each one that doesn't overlap an earlier kept room
+
+    Candidates are handled a batch at a time: one vectorized test against the rooms kept so far removes most of them,
+    then the survivors only need checking against the earlier survivors of their own batch.
+    """
+    rooms = RoomArray(max_rooms, width, height, room_max_size)
+    for start in range(0, max_rooms, batch_size):
+        count = min(batch_size, max_rooms - start)
+        room_width = rng.integers(room_min_size, room_max_size, size=count, endpoint=True)
+        room_height = rng.integers(room_min_size, room_max_size, size=count, endpoint=True)
+        x1 = rng.integers(0, width - room_width)
+        y1 = rng.integers(0, height - room_height)
+        x2 = x1 + room_width
+        y2 = y1 + room_height
+
+        survivors = np.flatnonzero(~rooms.intersects(x1, y1, x2, y2))
+        x1, y1, x2, y2 = x1[survivors], y1[survivors], x2[survivors], y2[survivors]
+
+        # Overlaps between the survivors, only the ones with earlier candidates count
+        overlap = (
+            (x1[:, None] <= x2[None, :])
+            & (x2[:, None] >= x1[None, :])
+            & (y1[:, None] <= y2[None, :])
+            & (y2[:, None] >= y1[None, :])
+        )
+        kept = np.zeros(len(survivors), dtype=bool)
+        for i in range(len(survivors)):
+            if not (overlap[i, :i] & kept[:i]).any():
+                kept[i] = True
+                rooms.add(x1[i], y1[i], x2[i], y2[i])
+    return rooms
+
+
+def _carve_rooms(rooms: RoomArray, width: int, height: int) -> np.ndarray:
+    """
+    Return a boolean (width, height) mask of every room's inner area, see RectangularRoom.inner
+
+    Each room adds +1/-1 at its corners of a difference array, a cumulative sum along both axes then turns that into
+    the filled rectangles without looping over the rooms.
+    """
+    n = len(rooms)
+    inner_x1 = rooms.x1[:n] + 1
+    inner_y1 = rooms.y1[:n]
+    inner_x2 = rooms.x2[:n]
+    inner_y2 = rooms.y2[:n]
+
+    difference = np.zeros((width + 1, height + 1), dtype=np.int32)
+    np.add.at(difference, (inner_x1, inner_y1), 1)
+    np.add.at(difference, (inner_x2, inner_y1), -1)
+    np.add.at(difference, (inner_x1, inner_y2), -1)
+    np.add.at(difference, (inner_x2, inner_y2), 1)
+    return difference.cumsum(axis=0).cumsum(axis=1)[:width, :height] > 0
+
+
+def _tunnel_points(rooms: RoomArray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the x and y coordinates of the L-shaped tunnels joining each room to the one before it"""
+    center_x, center_y = rooms.centers
+    horizontal_first = rng.random(len(rooms)) < 0.5
+
+    segments = []
+    for i in range(1, len(rooms)):
+        x1, y1 = int(center_x[i - 1]), int(center_y[i - 1])
+        x2, y2 = int(center_x[i]), int(center_y[i])
+        corner = (x2, y1) if horizontal_first[i] else (x1, y2)
+        segments.append(tcod.los.bresenham((x1, y1), corner))
+        segments.append(tcod.los.bresenham(corner, (x2, y2)))
+
+    if not segments:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    points = np.concatenate(segments)
+    return points[:, 0], points[:, 1]
+
+
+def _place_entities_vectorized(
+        rooms: RoomArray, dungeon: GameMap, maximum_monsters: int, rng: np.random.Generator,
+) -> None:
+    """Draw every monster position for every room at once, with the same distribution as place_entities"""
+    n = len(rooms)
+    counts = rng.integers(0, maximum_monsters, size=n, endpoint=True)
+    room_of = np.repeat(np.arange(n), counts)
+    xs = rng.integers(rooms.x1[:n][room_of] + 1, rooms.x2[:n][room_of])
+    ys = rng.integers(rooms.y1[:n][room_of] + 1, rooms.y2[:n][room_of])
+    is_orc = rng.random(len(room_of)) < 0.8
+
+    # Keep only the first monster drawn for each tile, and nothing on top of the player
+    player = dungeon.engine.player
+    flat = xs * dungeon.height + ys
+    _, first = np.unique(flat, return_index=True)
+    first = first[flat[first] != player.x * dungeon.height + player.y]
+    xs, ys, is_orc = xs[first], ys[first], is_orc[first]
+
+    entity_factories.spawn_many(entity_factories.orc, dungeon, xs[is_orc], ys[is_orc])
+    entity_factories.spawn_many(entity_factories.troll, dungeon, xs[~is_orc], ys[~is_orc])
+
+
+def generate_dungeon_vectorized(
+        max_rooms: int,
+        room_min_size: int,
+        room_max_size: int,
+        map_width: int,
+        map_height: int,
+        max_monsters_per_room: int,
+        engine: Engine,
+        columnar: bool = False,
+        seed: Optional[int] = None,
+        rng: Optional[np.random.Generator] = None,
+        compact_tiles: bool = False,
+) -> GameMap:
+    """
+    Generate a new dungeon map like generate_dungeon, but with NumPy doing the heavy lifting
+
+    Rooms are kept in a RoomArray so overlap tests are vectorized, all rooms are carved with one mask and all tunnels
+    with one fancy indexed assignment of the concatenated bresenham lines. The maps follow the same rules as
+    generate_dungeon but a seed won't produce the same map in both.
+    """
+    if rng is None:
+        rng = np.random.default_rng(seed)
+
+    player = engine.player
+    dungeon = GameMap(
+        engine, map_width, map_height, entities=[player], columnar=columnar, compact_tiles=compact_tiles,
+    )
+
+    rooms = _place_rooms(rng, max_rooms, room_min_size, room_max_size, map_width, map_height)
+    if len(rooms) == 0:
+        return dungeon
+
+    floor = _carve_rooms(rooms, map_width, map_height)
+    tunnel_x, tunnel_y = _tunnel_points(rooms, rng)
+    floor[tunnel_x, tunnel_y] = True
+    dungeon.set_tiles(floor, tile_types.floor)
+
+    # The first room is where the player starts
+    player.place(*rooms[0].center, dungeon)
+    place_downstairs(dungeon, *rooms[len(rooms) - 1].center)
+    dungeon.rooms = [rooms[i] for i in range(len(rooms))]
+    _place_entities_vectorized(rooms, dungeon, max_monsters_per_room, rng)
+
+    return dungeon
+
+
+class MapSnapshot(NamedTuple):
+    """
+    A compact, picklable copy of a generated map
+
+    The tile array is stored as zlib compressed bytes, which shrinks a freshly generated map to a tiny fraction of its
+    size as most of it is wall. Explored tiles are packed to one bit per tile before compressing them. Entities are
+    stored as plain tuples.
+    """
+    seed: Optional[int]
+    width: int
+    height: int
+    tiles: bytes
+    player_xy: Optional[Tuple[int, int]]  # None if the player was on another map
+    entities: List[tuple]  # x, y, then the fields of the entity's EntityTemplate
+    explored: Optional[bytes] = None
+    downstairs: Optional[Tuple[int, int]] = None
+    upstairs: Optional[Tuple[int, int]] = None
+    rooms: Tuple[Tuple[int, int, int, int], ...] = ()  # x1, y1, x2, y2 of each of GameMap.rooms
+
+
+def snapshot_map(dungeon: GameMap, seed: Optional[int] = None) -> MapSnapshot:
+    """Pack a GameMap into a MapSnapshot"""
+    player = dungeon.engine.player
+    return MapSnapshot(
+        seed=seed,
+        width=dungeon.width,
+        height=dungeon.height,
+        tiles=zlib.compress(np.asarray(dungeon.tiles).tobytes(order="F")),
+        # A floor packed while the player is elsewhere mustn't record where they are on that other floor
+        player_xy=(player.x, player.y) if getattr(player, "gamemap", None) is dungeon else None,
+        entities=sorted(  # Sorted so the same map always gives an identical snapshot
+            (entity.x, entity.y, *entity.template)
+            for entity in dungeon.entities
+            if entity is not player
+        ),
+        explored=zlib.compress(np.packbits(np.asarray(dungeon.explored).ravel(order="F")).tobytes()),
+        downstairs=dungeon.downstairs_location,
+        upstairs=dungeon.upstairs_location,
+        rooms=tuple((room.x1, room.y1, room.x2, room.y2) for room in dungeon.rooms),
+    )
+
+
+def restore_map(
+        snapshot: MapSnapshot, engine: Engine, columnar: bool = False, compact_tiles: bool = False,
+) -> GameMap:
+    """Unpack a MapSnapshot into a new GameMap, and place the engine's player on it if they were on it when packed"""
+    dungeon = GameMap(engine, snapshot.width, snapshot.height, columnar=columnar, compact_tiles=compact_tiles)
+    tiles = np.frombuffer(zlib.decompress(snapshot.tiles), dtype=tile_types.tile_dt)
+    dungeon.set_tiles(..., tiles.reshape((snapshot.width, snapshot.height), order="F"))
+    if snapshot.explored is not None:
+        explored = np.unpackbits(np.frombuffer(zlib.decompress(snapshot.explored), dtype=np.uint8))
+        dungeon.explored[:] = explored[:snapshot.width * snapshot.height].reshape(dungeon.explored.shape, order="F")
+    dungeon.downstairs_location = snapshot.downstairs
+    dungeon.upstairs_location = snapshot.upstairs
+    dungeon.rooms = [RectangularRoom(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in snapshot.rooms]
+
+    for x, y, *fields in snapshot.entities:
+        EntityTemplate(*fields).spawn(dungeon, x, y)
+    if snapshot.player_xy is not None:
+        engine.player.place(*snapshot.player_xy, dungeon)
     return dungeon
+
+
+def generate_snapshot(seed: int, options: dict, vectorized: bool = False) -> MapSnapshot:
+    """Generate a dungeon with a throwaway Engine and pack it, the entry point of worker processes"""
+    engine = Engine(player=entity_factories.player.instantiate(), quiet=True)
+    generate = generate_dungeon_vectorized if vectorized else generate_dungeon
+    return snapshot_map(generate(engine=engine, seed=seed, **options), seed)
+
+
+def generate_many(
+        seeds: Iterable[int],
+        workers: Optional[int] = None,
+        max_rooms: int = 30,
+        room_min_size: int = 6,
+        room_max_size: int = 10,
+        map_width: int = 80,
+        map_height: int = 45,
+        max_monsters_per_room: int = 2,
+        vectorized: bool = False,
+) -> List[MapSnapshot]:
+    """
+    Generate one dungeon per seed in a pool of worker processes, returned in the same order as seeds
+
+    workers defaults to the number of cores. vectorized=True uses generate_dungeon_vectorized.
+    Use restore_map to turn a snapshot back into a GameMap.
+    """
+    options = dict(
+        max_rooms=max_rooms,
+        room_min_size=room_min_size,
+        room_max_size=room_max_size,
+        map_width=map_width,
+        map_height=map_height,
+        max_monsters_per_room=max_monsters_per_room,
+    )
+    from concurrent.futures import ProcessPoolExecutor  # Only needed here, importing it slows down starting the game
+
+    seeds = list(seeds)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+            generate_snapshot, seeds, [options] * len(seeds), [vectorized] * len(seeds), chunksize=16,
+        ))
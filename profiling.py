@@ -0,0 +1,224 @@
+"""
+Optional instrumentation of the engine's hot paths
+
+While disabled nothing is instrumented at all, so it costs nothing. Profiler.enable swaps timed wrappers in for
+
+- perform on every Action subclass
+- Engine.handle_enemy_turns, Engine.update_fov and Engine.render
+- render on GameMap and its subclasses, and MapRenderer.render
+- tcod's Context.present
+- procgen.generate_dungeon and procgen.generate_dungeon_vectorized
+
+and disable puts the originals back, so it can be toggled at any time while the game runs (F12 in game).
+
+Every call's duration goes into a fixed size ring buffer per function, for p50/p99 latencies. Calls are also summed
+per frame: a frame ends whenever Engine.render returns, or when end_frame is called, such as by headless runners
+after every turn. The most recent frames are kept in another ring buffer, along with the entity counts at the time.
+"""
+from __future__ import annotations
+from collections import deque
+import csv
+import functools
+import json
+import sys
+import time
+from typing import Callable, Deque, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+
+def _subclasses(cls: type) -> List[type]:
+    """Return cls and every class derived from it that has been defined so far"""
+    classes = [cls]
+    for subclass in cls.__subclasses__():
+        classes.extend(_subclasses(subclass))
+    return classes
+
+
+class Profiler:
+    """
+    Collects timings of the instrumented functions while enabled
+
+    capacity is how many calls are kept per function, frame_capacity how many frames are kept.
+    """
+    def __init__(self, capacity: int = 4096, frame_capacity: int = 1024):
+        self.capacity = capacity
+        self.enabled = False
+        self.samples: Dict[str, Deque[float]] = {}  # Ring buffer of call durations in seconds, per function
+        self.calls: Dict[str, int] = {}  # Calls per function since the profiler was enabled, not limited by capacity
+        self.frames: Deque[dict] = deque(maxlen=frame_capacity)
+        self.frame_count = 0
+        self._frame_totals: Dict[str, float] = {}  # Time per function in the current frame
+        self._frame_start = time.perf_counter()
+        self._patches: List[Tuple[object, str, object]] = []  # (owner, attribute, original) for disable
+
+    def toggle(self) -> bool:
+        """Enable the profiler if it is disabled and the other way around. Returns the new state"""
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+        return self.enabled
+
+    def enable(self) -> None:
+        """Install the timed wrappers and start collecting"""
+        if self.enabled:
+            return
+        # Imported here so loading this module doesn't pull the whole game in
+        from tcod.context import Context
+        from actions import Action
+        from engine import Engine
+        from game_map import GameMap
+        import procgen
+        from renderer import MapRenderer
+
+        for cls in _subclasses(Action):
+            if "perform" in cls.__dict__:
+                self._wrap_method(cls, "perform")
+        for name in ("handle_enemy_turns", "update_fov"):
+            self._wrap_method(Engine, name)
+        self._wrap_method(Engine, "render", ends_frame=True)
+        for cls in _subclasses(GameMap):
+            if "render" in cls.__dict__:
+                self._wrap_method(cls, "render")
+        self._wrap_method(MapRenderer, "render")
+        self._wrap_method(Context, "present")
+        for name in ("generate_dungeon", "generate_dungeon_vectorized"):
+            self._wrap_function(procgen, name)
+
+        self._frame_totals = {}
+        self._frame_start = time.perf_counter()
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Put every original function back. The collected data is kept until reset"""
+        for owner, attribute, original in reversed(self._patches):
+            setattr(owner, attribute, original)
+        self._patches.clear()
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Forget everything collected so far"""
+        # Cleared in place, installed wrappers hold on to these
+        for samples in self.samples.values():
+            samples.clear()
+        for name in self.calls:
+            self.calls[name] = 0
+        self.frames.clear()
+        self.frame_count = 0
+        self._frame_totals = {}
+        self._frame_start = time.perf_counter()
+
+    def _timed(self, name: str, func: Callable, ends_frame: bool = False) -> Callable:
+        samples = self.samples.setdefault(name, deque(maxlen=self.capacity))
+        self.calls.setdefault(name, 0)
+        calls = self.calls
+        clock = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                samples.append(elapsed)
+                calls[name] += 1
+                totals = self._frame_totals
+                totals[name] = totals.get(name, 0.0) + elapsed
+                if ends_frame:
+                    self.end_frame(args[0])  # The Engine being rendered
+
+        return wrapper
+
+    def _wrap_method(self, cls: type, attribute: str, ends_frame: bool = False) -> None:
+        original = cls.__dict__[attribute]
+        setattr(cls, attribute, self._timed(f"{cls.__name__}.{attribute}", original, ends_frame))
+        self._patches.append((cls, attribute, original))
+
+    def _wrap_function(self, module, attribute: str) -> None:
+        """Wrap a module level function, along with every copy of it imported into another module with from import"""
+        original = getattr(module, attribute)
+        wrapper = self._timed(f"{module.__name__}.{attribute}", original)
+        for other in list(sys.modules.values()):
+            if getattr(other, "__dict__", {}).get(attribute) is original:
+                setattr(other, attribute, wrapper)
+                self._patches.append((other, attribute, original))
+
+    def end_frame(self, engine: Optional[Engine] = None) -> None:
+        """Close the current frame, recording its duration, the time spent per function and the entity counts"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        frame = {
+            "frame": self.frame_count,
+            "duration": now - self._frame_start,
+            "timings": self._frame_totals,
+        }
+        if engine is not None and hasattr(engine, "game_map"):
+            frame["entities"] = len(engine.game_map.entities)
+            frame["awake"] = engine.scheduler.awake_count
+        self.frames.append(frame)
+        self.frame_count += 1
+        self._frame_totals = {}
+        self._frame_start = now
+
+    def report(self) -> dict:
+        """p50/p99 latencies per function and per frame in milliseconds, and entity counts, ready for JSON"""
+        functions = {}
+        for name, samples in sorted(self.samples.items()):
+            if not samples:
+                continue
+            durations = np.fromiter(samples, dtype=np.float64, count=len(samples)) * 1e3
+            p50, p99 = np.percentile(durations, [50, 99])
+            functions[name] = {
+                "calls": self.calls[name],
+                "p50_ms": float(p50),
+                "p99_ms": float(p99),
+                "mean_ms": float(durations.mean()),
+                "max_ms": float(durations.max()),
+            }
+
+        report: dict = {"enabled": self.enabled, "functions": functions, "frames": self.frame_count}
+        if self.frames:
+            durations = np.array([frame["duration"] for frame in self.frames]) * 1e3
+            p50, p99 = np.percentile(durations, [50, 99])
+            report["frame_p50_ms"] = float(p50)
+            report["frame_p99_ms"] = float(p99)
+            entities = [frame["entities"] for frame in self.frames if "entities" in frame]
+            if entities:
+                report["entities_mean"] = sum(entities) / len(entities)
+                report["entities_max"] = max(entities)
+        return report
+
+    def export_json(self, path: str) -> None:
+        """Write the report and every frame in the ring buffer to a JSON trace"""
+        with open(path, "w") as f:
+            json.dump({"report": self.report(), "frames": list(self.frames)}, f, indent=1)
+
+    def export_csv(self, path: str) -> None:
+        """Write one row per frame in the ring buffer, with a column of milliseconds per instrumented function"""
+        names = sorted(self.samples)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "duration_ms", "entities", "awake"] + [f"{name}_ms" for name in names])
+            for frame in self.frames:
+                timings = frame["timings"]
+                writer.writerow(
+                    [frame["frame"], frame["duration"] * 1e3, frame.get("entities", ""), frame.get("awake", "")]
+                    + [timings.get(name, 0.0) * 1e3 for name in names]
+                )
+
+    def export(self, path: str) -> None:
+        """Write a trace to path, as CSV if it ends with .csv and JSON otherwise"""
+        if path.endswith(".csv"):
+            self.export_csv(path)
+        else:
+            self.export_json(path)
+
+
+# The profiler used by the game, toggled with F12
+profiler = Profiler()
@@ -0,0 +1,216 @@
+from __future__ import annotations
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+from tcod.console import Console
+from tile_grid import PaletteTiles
+import tile_types
+
+if TYPE_CHECKING:
+    from camera import Camera
+    from game_map import GameMap
+
+
+class MapRenderer:
+    """
+    Render a GameMap into a console using preallocated buffers
+
+    GameMap.render builds the whole frame from scratch with np.select and prints every entity one at a time. This
+    renderer instead composes each frame into a buffer it reuses, writes all visible entity glyphs with a single
+    scatter, and then only copies the tiles that differ from the previous frame into the console.
+
+    Only the map's dirty bounding box (see GameMap.dirty) is composed and compared, so a turn where the player takes
+    a step costs about the size of the FOV window rather than the size of the map. With a Camera the buffers are the
+    size of the camera's window, and everything outside it is ignored. When the camera scrolls, what is on screen is
+    shifted along with it, and only the strips that scrolled into view are composed on top of the dirty area.
+
+    The console must not be cleared between frames, Engine.render skips console.clear() when a renderer is in use.
+    """
+    def __init__(self) -> None:
+        self.frame: Optional[np.ndarray] = None  # The frame being composed
+        self.previous: Optional[np.ndarray] = None  # The frame currently shown on the console
+        self._changed: Optional[np.ndarray] = None  # Scratch space for the per tile change mask
+        self._changed_words: Optional[np.ndarray] = None  # Scratch space for the per word diff, see _find_changes
+        self._console: Optional[Console] = None
+        self._game_map: Optional[GameMap] = None
+        self._origin = (0, 0)  # The map position drawn at the console's top left corner
+        self.tiles_written = 0  # How many tiles the last render call copied into the console
+        # How many tiles the last render call composed, the dirty area plus anything scrolled into view
+        self.tiles_composed = 0
+
+    def _allocate(self, shape: Tuple[int, int]) -> None:
+        self.frame = np.empty(shape, dtype=tile_types.graphic_dt, order="F")
+        self.previous = np.empty(shape, dtype=tile_types.graphic_dt, order="F")
+        self._changed = np.empty(shape, dtype=bool, order="F")
+        self._changed_words = np.empty((shape[1], shape[0], WORDS_PER_TILE), dtype=bool)
+
+    def invalidate(self) -> None:
+        """Force the next render call to redraw every tile"""
+        self._console = None
+
+    def render(self, console: Console, game_map: GameMap, camera: Optional[Camera] = None) -> None:
+        if camera is None:
+            view = (0, 0, game_map.width, game_map.height)
+        else:
+            view = camera.bounds
+        origin_x, origin_y = view[0], view[1]
+        shape = (view[2] - origin_x, view[3] - origin_y)
+        if self.frame is None or self.frame.shape != shape:
+            self._allocate(shape)
+            self.invalidate()
+        if game_map is not self._game_map:
+            self._game_map = game_map
+            self.invalidate()
+
+        dirty = game_map.take_dirty()
+        self.tiles_written = self.tiles_composed = 0
+        if console is not self._console:
+            # A console we haven't drawn to before, everything has to be written
+            self._console = console
+            self._origin = origin_x, origin_y
+            self._draw(console, game_map, view, redraw=True)
+            return
+
+        if (origin_x, origin_y) != self._origin:
+            exposed = self._scroll(console, view)
+            for area in exposed:
+                self._draw(console, game_map, area, redraw=True)
+        if dirty is not None:
+            # Only the part of the dirty area in view matters
+            self._draw(console, game_map, (
+                max(dirty[0], view[0]), max(dirty[1], view[1]), min(dirty[2], view[2]), min(dirty[3], view[3]),
+            ), redraw=False)
+
+    def _scroll(self, console: Console, view: Tuple[int, int, int, int]) -> List[Tuple[int, int, int, int]]:
+        """
+        Follow the camera to view by shifting what is on screen, and return the newly exposed areas in map positions
+
+        The tiles that stay in view only move on the console, so they are copied over by the scroll distance in both
+        the console and the previous frame instead of being composed again. Only the strips that scrolled into view
+        along each axis have to be drawn.
+        """
+        dx, dy = view[0] - self._origin[0], view[1] - self._origin[1]
+        self._origin = view[0], view[1]
+        width, height = self.previous.shape  # type: ignore
+        if abs(dx) >= width or abs(dy) >= height:
+            return [view]  # Nothing that was on screen is still in view
+
+        source = slice(max(dx, 0), width + min(dx, 0)), slice(max(dy, 0), height + min(dy, 0))
+        destination = slice(max(-dx, 0), width + min(-dx, 0)), slice(max(-dy, 0), height + min(-dy, 0))
+        for array in (self.previous, console.tiles_rgb[:width, :height]):
+            # Copying whole records as raw bytes is far faster than field by field. NumPy copies overlapping slices
+            # correctly
+            raw = array.view(np.dtype((np.void, array.dtype.itemsize)))  # type: ignore
+            raw[destination] = raw[source]
+
+        x1, y1, x2, y2 = view
+        exposed = []
+        if dx:
+            # The columns along the side scrolled towards, the full height of the view
+            columns = (x2 - dx, x2) if dx > 0 else (x1, x1 - dx)
+            exposed.append((columns[0], y1, columns[1], y2))
+            x1, x2 = (x1, x2 - dx) if dx > 0 else (x1 - dx, x2)  # The rows below don't need those columns again
+        if dy:
+            exposed.append((x1, y2 - dy, x2, y2) if dy > 0 else (x1, y1, x2, y1 - dy))
+        return exposed
+
+    def _draw(
+            self, console: Console, game_map: GameMap, area: Tuple[int, int, int, int], redraw: bool,
+    ) -> None:
+        """
+        Compose the map area [x1, x2) x [y1, y2) of the current view and bring the console up to date with it
+
+        With redraw every tile of the area is written to the console, otherwise only those that differ from what is
+        on screen.
+        """
+        x1, y1, x2, y2 = area
+        if x1 >= x2 or y1 >= y2:
+            return
+        origin_x, origin_y = self._origin
+        window = slice(x1, x2), slice(y1, y2)  # In map positions
+        # The same window in buffer and console positions
+        local = slice(x1 - origin_x, x2 - origin_x), slice(y1 - origin_y, y2 - origin_y)
+
+        frame = self.frame[local]  # type: ignore
+        tiles = game_map.tiles
+        if isinstance(tiles, PaletteTiles):
+            frame[...] = tiles.graphics(game_map.visible[window], game_map.explored[window], window)
+        else:
+            # The same layering as GameMap.render, but written in place instead of allocating with np.select
+            frame[...] = tile_types.SHROUD
+            np.copyto(frame, tiles["dark"][window], where=game_map.explored[window])
+            np.copyto(frame, tiles["light"][window], where=game_map.visible[window])
+
+        self._draw_entities(frame, game_map, x1, y1, x2, y2)
+
+        output = console.tiles_rgb[local]
+        previous = self.previous[local]  # type: ignore
+        if redraw:
+            output[...] = frame
+            self.tiles_written += frame.size
+        else:
+            changed = self._find_changes(local)
+            output[changed] = frame[changed]
+            self.tiles_written += int(np.count_nonzero(changed))
+        # What we just composed is what is now on screen
+        previous[...] = frame
+        self.tiles_composed += frame.size
+
+    def _draw_entities(self, frame: np.ndarray, game_map: GameMap, x1: int, y1: int, x2: int, y2: int) -> None:
+        """
+        Write the glyph and color of every visible entity inside [x1, x2) x [y1, y2) into the frame, which covers
+        that window, in one fancy indexed assignment
+        """
+        visible = game_map.visible
+        store = game_map.entity_store
+        if store is not None and (x2 - x1) * (y2 - y1) > store.count:
+            # A big area, going through every row of the store at once beats looking up every tile
+            indices = store.visible_indices(visible)
+            xs, ys = store.x[indices], store.y[indices]
+            inside = (xs >= x1) & (xs < x2) & (ys >= y1) & (ys < y2)
+            indices = indices[inside]
+            xs, ys = xs[inside] - x1, ys[inside] - y1
+            frame["ch"][xs, ys] = store.char[indices]
+            frame["fg"][xs, ys] = store.color[indices]
+            others = [
+                entity for entity in game_map.unstored_entities
+                if x1 <= entity.x < x2 and y1 <= entity.y < y2 and visible[entity.x, entity.y]
+            ]
+        else:
+            others = game_map.visible_entities_in(x1, y1, x2, y2)
+
+        if others:
+            xs = np.fromiter((entity.x for entity in others), dtype=np.intp, count=len(others)) - x1
+            ys = np.fromiter((entity.y for entity in others), dtype=np.intp, count=len(others)) - y1
+            frame["ch"][xs, ys] = [ord(entity.char) for entity in others]
+            frame["fg"][xs, ys] = [entity.color for entity in others]
+
+    def _find_changes(self, window: Tuple[slice, slice]) -> np.ndarray:
+        """
+        Compare the window of the new frame against the one on screen without allocating
+
+        Each graphic_dt record is 10 bytes, so both frames are viewed as 5 uint16 words per tile and compared word by
+        word. Reducing the 5 words with separate logical_or calls is much faster than a reduce over a length 5 axis.
+        """
+        x_window, y_window = window
+        changed = self._changed[window]  # type: ignore
+        words_changed = self._changed_words[y_window, x_window]  # type: ignore  # The word views are in [y, x] order
+        frame = _as_words(self.frame)[y_window, x_window]  # type: ignore
+        previous = _as_words(self.previous)[y_window, x_window]  # type: ignore
+
+        np.not_equal(frame, previous, out=words_changed)
+        changed_t = changed.T
+        np.logical_or(words_changed[..., 0], words_changed[..., 1], out=changed_t)
+        for word in range(2, WORDS_PER_TILE):
+            np.logical_or(changed_t, words_changed[..., word], out=changed_t)
+        return changed
+
+
+# graphic_dt records seen as a run of uint16 words, for fast comparisons
+WORDS_PER_TILE = tile_types.graphic_dt.itemsize // 2
+
+
+def _as_words(frame: np.ndarray) -> np.ndarray:
+    """Return a (height, width, WORDS_PER_TILE) uint16 view of an order="F" graphic_dt array"""
+    width, height = frame.shape
+    return frame.T.view(np.uint16).reshape((height, width, WORDS_PER_TILE))
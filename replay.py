@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Recording games and replaying them headlessly
+
+A game is fully determined by the seed of its World and the player's actions, so that is all a replay log holds:
+
+    magic (8 bytes) | format version (uint32) | seed (uint64) | options length (uint32) | options JSON | records...
+
+The options are the World's generation options. Every action is a 3 byte record, its kind then two signed bytes of
+arguments, so an hour of play fits in a few kilobytes. Records are written as the actions are dispatched, before they
+are performed, so the log of a game that crashed ends with the action that crashed it.
+
+Replaying drives an Engine without a window, as fast as it goes: nothing is rendered, and with skip_fov the FOV is only
+computed once, after the last action. Only the explored tiles differ then, since nothing else depends on the FOV.
+
+    python main.py --record game.replay
+    python replay.py game.replay --skip-fov --trace replay.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import struct
+import time
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+from actions import (
+    Action, ActionWithDirection, BumpAction, EscapeAction, MeleeAction, MovementAction, TakeStairsAction,
+)
+from engine import Engine
+import entity_factories
+from profiling import profiler
+from world import World
+
+MAGIC = b"RLREPLAY"
+FORMAT_VERSION = 1
+_PREFIX = struct.Struct("<8sIQI")  # magic, format version, seed, options length
+_RECORD = struct.Struct("<Bbb")  # kind, then the action's arguments
+
+# The kind of each action that can be recorded, and what its two arguments are
+ACTION_KINDS: Dict[type, int] = {
+    EscapeAction: 0,
+    BumpAction: 1,  # dx, dy
+    MovementAction: 2,  # dx, dy
+    MeleeAction: 3,  # dx, dy
+    TakeStairsAction: 4,  # direction, 0
+}
+_ACTION_TYPES = {kind: cls for cls, kind in ACTION_KINDS.items()}
+
+
+class ReplayFormatError(Exception):
+    """Raised when a file isn't a replay log, or was written by an incompatible version"""
+
+
+def encode_action(action: Action) -> bytes:
+    """Pack an action into a record"""
+    kind = ACTION_KINDS[type(action)]
+    if isinstance(action, TakeStairsAction):
+        return _RECORD.pack(kind, action.direction, 0)
+    if isinstance(action, ActionWithDirection):
+        return _RECORD.pack(kind, action.dx, action.dy)
+    return _RECORD.pack(kind, 0, 0)
+
+
+class ReplayRecorder:
+    """Writes the seed and every action dispatched to the player to a replay log"""
+    def __init__(self, path: str, seed: int, options: dict):
+        self.path = path
+        self.actions = 0
+        options_bytes = json.dumps(options, sort_keys=True).encode()
+        self._file: Optional[BinaryIO] = open(path, "wb")
+        self._file.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, seed, len(options_bytes)))
+        self._file.write(options_bytes)
+        self._file.flush()
+
+    def record(self, action: Action) -> None:
+        """Append an action. It is flushed straight away, so the log survives the game crashing"""
+        if self._file is None:
+            return
+        self._file.write(encode_action(action))
+        self._file.flush()
+        self.actions += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> ReplayRecorder:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class Replay(NamedTuple):
+    seed: int
+    options: dict  # World's generation options
+    records: bytes  # The packed actions, see encode_action
+
+    def __len__(self) -> int:
+        return len(self.records) // _RECORD.size
+
+    def actions(self, engine: Engine) -> List[Action]:
+        """
+        Unpack the actions for the engine's player, up to the first EscapeAction
+
+        Actions don't change once made, so each distinct record is turned into one action that is shared by every
+        repeat of it, like EventHandler's keymap does.
+        """
+        player = engine.player
+        made: Dict[Tuple[int, int, int], Action] = {}
+        actions = []
+        for record in _RECORD.iter_unpack(self.records):
+            action = made.get(record)
+            if action is None:
+                kind, first, second = record
+                cls = _ACTION_TYPES.get(kind)
+                if cls is None:
+                    raise ReplayFormatError(f"Unknown action kind {kind}")
+                if cls is EscapeAction:
+                    break
+                action = cls(player, first) if cls is TakeStairsAction else cls(player, first, second)
+                made[record] = action
+            actions.append(action)
+        return actions
+
+
+def read_replay(path: str) -> Replay:
+    """Read a replay log"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _PREFIX.size:
+        raise ReplayFormatError(f"{path} is not a replay log")
+    magic, version, seed, length = _PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ReplayFormatError(f"{path} is not a replay log")
+    if version != FORMAT_VERSION:
+        raise ReplayFormatError(f"{path} uses replay format {version}, only {FORMAT_VERSION} is supported")
+    start = _PREFIX.size + length
+    options = json.loads(data[_PREFIX.size:start])
+    records = data[start:]
+    records = records[:len(records) - len(records) % _RECORD.size]  # A record cut short by a crash is dropped
+    return Replay(seed, options, records)
+
+
+class ReplayResult(NamedTuple):
+    turns: int
+    depth: int  # The floor the player ended on
+    player_xy: Tuple[int, int]
+    explored_tiles: int
+    setup_seconds: float
+    replay_seconds: float
+
+    @property
+    def turns_per_second(self) -> float:
+        return self.turns / self.replay_seconds if self.replay_seconds else 0.0
+
+    def summary(self) -> dict:
+        """Machine readable results, suitable for tracking in CI"""
+        return dict(self._asdict(), turns_per_second=self.turns_per_second)
+
+
+def play(replay: Replay, skip_fov: bool = False) -> Tuple[Engine, ReplayResult]:
+    """
+    Replay a game headlessly and return its Engine in the final state
+
+    The FOV is computed after every action like in the game unless skip_fov is set, then only after the last one.
+    Every turn ends a frame of the profiler, which only records anything while it is enabled.
+    """
+    start = time.perf_counter()
+    engine = Engine(player=entity_factories.player.instantiate(), quiet=True)
+    # Floors are generated here as they are reached, they come out the same as the game's background worker made them
+    world = World(engine, seed=replay.seed, pregenerate=False, **replay.options)
+    engine.world = world
+    world.enter(0)
+    engine.update_fov()
+    actions = replay.actions(engine)
+    ready = time.perf_counter()
+
+    with world:
+        for action in actions:
+            if skip_fov:
+                action.perform()
+                engine.handle_enemy_turns()
+            else:
+                engine.perform_turn(action)
+            profiler.end_frame(engine)
+        engine.update_fov()
+        finished = time.perf_counter()
+
+        player = engine.player
+        return engine, ReplayResult(
+            turns=len(actions),
+            depth=world.depth,
+            player_xy=(player.x, player.y),
+            explored_tiles=int(engine.game_map.explored.sum()),
+            setup_seconds=ready - start,
+            replay_seconds=finished - ready,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a recorded game headlessly, as fast as possible")
+    parser.add_argument("path", help="A replay log written by main.py --record")
+    parser.add_argument("--skip-fov", action="store_true", help="Only compute the FOV after the last action")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay this many times, for a steadier benchmark")
+    parser.add_argument(
+        "--trace", default=None,
+        help="Profile the replays and write a trace to this path, CSV if it ends with .csv and JSON otherwise",
+    )
+    args = parser.parse_args()
+
+    replay = read_replay(args.path)
+    if args.trace:
+        profiler.enable()
+    for _ in range(args.repeat):
+        _, result = play(replay, skip_fov=args.skip_fov)
+        print(json.dumps(result.summary()))
+    if args.trace:
+        profiler.export(args.trace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Saving and loading games in a binary format that loads without parsing
+
+A save file is a small header followed by raw array buffers:
+
+    magic (8 bytes) | format version (uint32) | header length (uint32) | header JSON | padding | buffers...
+
+The header describes every buffer (dtype, shape and offset from the start of the buffers) and holds the few things
+that aren't arrays, such as the player and the table of entity names. Every buffer starts on a 64 byte boundary, so
+load_game maps the file once and views each buffer in that mapping as is. Opening even a huge map is then instant:
+pages are only read from disk as they are touched, and the copy-on-write mapping means the game can change them
+without the file being modified.
+
+Saving writes a new file next to the old one and then replaces it, so the game that is being saved over can still be
+mapped from the old file, and a save that fails halfway leaves the old one intact.
+"""
+from __future__ import annotations
+import json
+import mmap
+import os
+import struct
+import tempfile
+from typing import Dict, List
+
+import numpy as np  # type: ignore
+
+from engine import Engine
+from entity import Entity, EntityTemplate
+import entity_factories
+from game_map import GameMap
+from procgen import RectangularRoom
+from tile_grid import PaletteTiles
+import tile_types
+
+MAGIC = b"RLSAVE\0\0"
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+_PREFIX = struct.Struct("<8sII")  # magic, format version, header length
+
+# One saved entity, other than the player. name indexes the header's table of entity names
+entity_dt = np.dtype(
+    [
+        ("x", np.int32),
+        ("y", np.int32),
+        ("char", np.int32),  # Unicode codepoint
+        ("color", np.uint8, (3,)),
+        ("blocks_movement", bool),
+        ("speed", np.int32),
+        ("name", np.int32),
+    ]
+)
+
+# The header names these dtypes instead of spelling out their fields, which are slow to rebuild on every load. Any
+# change to them needs a new FORMAT_VERSION
+_NAMED_DTYPES: Dict[str, np.dtype] = {"tile_dt": tile_types.tile_dt, "entity_dt": entity_dt}
+
+
+class SaveFormatError(Exception):
+    """Raised when a file isn't a save file, or was written by an incompatible version"""
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _data_start(header_length: int) -> int:
+    """The buffers start at the first aligned offset after the header"""
+    return _align(_PREFIX.size + header_length)
+
+
+def _describe(name: str, array: np.ndarray, offset: int) -> list:
+    """The header entry of a buffer: [name, dtype, shape, order, offset]"""
+    dtype_names = [dtype_name for dtype_name, dtype in _NAMED_DTYPES.items() if dtype == array.dtype]
+    return [
+        name,
+        dtype_names[0] if dtype_names else np.lib.format.dtype_to_descr(array.dtype),
+        list(array.shape),
+        "F" if array.flags.f_contiguous and array.ndim > 1 else "C",
+        offset,
+    ]
+
+
+def save_game(engine: Engine, path: str) -> None:
+    """Write the engine's current map, its entities and the player to path"""
+    game_map = engine.game_map
+    player = engine.player
+    arrays: Dict[str, np.ndarray] = {
+        "visible": game_map.visible,
+        "explored": game_map.explored,
+    }
+    if isinstance(game_map.tiles, PaletteTiles):
+        arrays["tile_ids"] = game_map.tiles.ids
+        arrays["palette"] = game_map.tiles.palette
+    else:
+        arrays["tiles"] = game_map.tiles
+
+    arrays["rooms"] = np.array(
+        [[room.x1, room.y1, room.x2, room.y2] for room in game_map.rooms], dtype=np.int32,
+    ).reshape(-1, 4)
+
+    # Entity data goes in one record per entity. Names are stored once each in the header, and by their index in
+    # that table here
+    entities = [entity for entity in game_map.entities if entity is not player]
+    name_table: Dict[str, int] = {}
+    records = np.zeros(len(entities), dtype=entity_dt)
+    records["x"] = [entity.x for entity in entities]
+    records["y"] = [entity.y for entity in entities]
+    records["char"] = [ord(entity.char) for entity in entities]
+    records["color"] = np.array([entity.color for entity in entities], dtype=np.uint8).reshape(-1, 3)
+    records["blocks_movement"] = [entity.blocks_movement for entity in entities]
+    records["speed"] = [entity.speed for entity in entities]
+    records["name"] = [name_table.setdefault(entity.name, len(name_table)) for entity in entities]
+    arrays["entities"] = records
+
+    header = {
+        "map": {
+            "width": game_map.width,
+            "height": game_map.height,
+            "downstairs": game_map.downstairs_location,
+            "upstairs": game_map.upstairs_location,
+        },
+        "engine": {
+            "fov_radius": engine.fov_radius,
+            "fov_algorithm": engine.fov_algorithm,
+            "fov_windowed": engine.fov_windowed,
+        },
+        "player": {
+            "x": player.x,
+            "y": player.y,
+            "char": player.char,
+            "color": list(player.color),
+            "name": player.name,
+            "blocks_movement": player.blocks_movement,
+            "speed": player.speed,
+        },
+        "entity_names": list(name_table),
+        "arrays": [],
+    }
+
+    offset = 0
+    for name, array in arrays.items():
+        header["arrays"].append(_describe(name, array, offset))
+        offset = _align(offset + array.nbytes)
+
+    header_bytes = json.dumps(header).encode()
+    start = _data_start(len(header_bytes))
+    # Never write into path itself: the arrays being saved may be memory-mapped from it, if the game was loaded from it
+    directory, filename = os.path.split(os.path.abspath(path))
+    fd, temporary_path = tempfile.mkstemp(prefix=f".{filename}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            for array, (_, _, _, order, array_offset) in zip(arrays.values(), header["arrays"]):
+                f.seek(start + array_offset)
+                # Write straight from the array's memory. The transpose of an order="F" array is C contiguous with
+                # the same bytes, which is what tofile writes out
+                (array.T if order == "F" else np.ascontiguousarray(array)).tofile(f)
+            f.truncate(start + offset)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def _parse_header(data, path: str) -> dict:
+    """Read the header from the start of a save file's bytes"""
+    if len(data) < _PREFIX.size:
+        raise SaveFormatError(f"{path} is not a save file")
+    magic, version, length = _PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise SaveFormatError(f"{path} is not a save file")
+    if version != FORMAT_VERSION:
+        raise SaveFormatError(f"{path} uses save format {version}, only {FORMAT_VERSION} is supported")
+    header = json.loads(data[_PREFIX.size:_PREFIX.size + length])
+    header["data_start"] = _data_start(length)
+    return header
+
+
+def read_header(path: str) -> dict:
+    """Return the JSON header of a save file"""
+    with open(path, "rb") as f:
+        prefix = f.read(_PREFIX.size)
+        length = _PREFIX.unpack(prefix)[2] if len(prefix) == _PREFIX.size else 0
+        return _parse_header(prefix + f.read(length), path)
+
+
+def _dtype(descr) -> np.dtype:
+    if isinstance(descr, list):
+        return np.lib.format.descr_to_dtype(descr)  # Some other structured dtype
+    if descr in _NAMED_DTYPES:
+        return _NAMED_DTYPES[descr]
+    return np.dtype(descr)
+
+
+def _view_arrays(mapping: mmap.mmap, header: dict) -> Dict[str, np.ndarray]:
+    """View every buffer described in the header in the mapping of the whole file"""
+    start = header["data_start"]
+    arrays = {}
+    for name, descr, shape, order, offset in header["arrays"]:
+        dtype = _dtype(descr)
+        if 0 in shape:
+            arrays[name] = np.zeros(shape, dtype=dtype)  # An empty buffer may start past the end of the file
+            continue
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=mapping, offset=start + offset, order=order)
+    return arrays
+
+
+def load_game(path: str, quiet: bool = False, columnar: bool = True) -> Engine:
+    """
+    Return a new Engine for the game saved at path
+
+    With columnar the entities are loaded straight from their columns into the map's EntityStore, otherwise each
+    becomes an Entity object.
+    """
+    # One copy-on-write mapping of the whole file, that the header is read from and every array is a view of
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        mapping = mmap.mmap(fd, 0, access=mmap.ACCESS_COPY)
+    finally:
+        os.close(fd)
+    header = _parse_header(mapping, path)
+    arrays = _view_arrays(mapping, header)
+
+    player_data = header["player"]
+    player = Entity(
+        template=EntityTemplate(
+            player_data["char"],
+            tuple(player_data["color"]),
+            player_data["name"],
+            player_data["blocks_movement"],
+            player_data["speed"],
+        ),
+    )
+    engine = Engine(player=player, quiet=quiet, **header["engine"])
+
+    if "tile_ids" in arrays:
+        tiles = PaletteTiles.from_ids(arrays["tile_ids"], arrays["palette"])
+    else:
+        tiles = arrays["tiles"]
+    game_map = GameMap.from_arrays(engine, tiles, arrays["visible"], arrays["explored"], columnar=columnar)
+    engine.game_map = game_map
+    for name in ("downstairs", "upstairs"):
+        location = header["map"][name]
+        setattr(game_map, f"{name}_location", tuple(location) if location else None)
+    game_map.rooms = [RectangularRoom(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in arrays["rooms"].tolist()]
+
+    records = arrays["entities"]
+    name_table: List[str] = header["entity_names"]
+    names = [name_table[index] for index in records["name"].tolist()]
+    if game_map.entity_store is not None:
+        game_map.entity_store.extend(
+            records["x"], records["y"], records["char"], records["color"], records["blocks_movement"],
+            records["speed"], names,
+        )
+    else:
+        reds, greens, blues = records["color"].T.tolist()
+        columns = zip(
+            records["char"].tolist(), reds, greens, blues, names, records["blocks_movement"].tolist(),
+            records["speed"].tolist(),
+        )
+        # Group the entities by kind, so each kind shares one template and is spawned in a single call
+        kinds: Dict[tuple, List[int]] = {}
+        for row, kind in enumerate(columns):
+            kinds.setdefault(kind, []).append(row)
+        xs, ys = records["x"], records["y"]
+        for (char, red, green, blue, name, blocks_movement, speed), rows in kinds.items():
+            template = EntityTemplate(chr(char), (red, green, blue), name, blocks_movement, speed)
+            entity_factories.spawn_many(template, game_map, xs[rows], ys[rows])
+
+    player.place(player_data["x"], player_data["y"], game_map)
+    return engine
@@ -0,0 +1,131 @@
+from __future__ import annotations
+import heapq
+import itertools
+from typing import Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from entity import Entity
+    from game_map import GameMap
+
+ACTION_COST = 100  # Game time one action takes at normal speed
+NORMAL_SPEED = 100
+
+
+def action_delay(speed: int) -> int:
+    """Return the game time between two turns of an entity with this speed"""
+    return ACTION_COST * NORMAL_SPEED // max(speed, 1)
+
+
+class TurnScheduler:
+    """
+    Decides which actors take a turn, and how many, each time the player acts
+
+    Awake actors wait in a heap ordered by the game time of their next turn, and an actor with twice the player's
+    speed comes up twice per player action. Only actors within wake_radius tiles of the player are woken, found with
+    the map's SpatialIndex, and an actor further than sleep_radius away is put back to sleep when its turn comes up.
+    sleep_radius defaults to a bit more than wake_radius so actors near the edge don't flip between the two states.
+    Sleeping actors, and actors in chunks that aren't loaded, aren't looked at at all, so the cost of a turn depends on
+    how many actors are near the player rather than on how many there are on the map.
+    """
+    def __init__(self, engine: Engine, wake_radius: int = 20, sleep_radius: Optional[int] = None):
+        self.engine = engine
+        self.wake_radius = wake_radius
+        self.sleep_radius = wake_radius + 8 if sleep_radius is None else sleep_radius
+        self.time = 0  # Game time, advanced by every player action
+        self._queue: List[Tuple[int, int, Entity]] = []  # (time of next turn, tie breaker, actor)
+        self._awake: Set[Entity] = set()
+        self._sequence = itertools.count()  # Keeps actors with the same turn time in the order they were scheduled
+        self._game_map: Optional[GameMap] = None
+
+        # Totals since the scheduler was created, for profiling. See stats
+        self.player_turns = 0
+        self.actor_turns = 0
+        self.actors_woken = 0
+        self.actors_slept = 0
+        # The same counts for the most recent call to advance
+        self.last_actor_turns = 0
+        self.last_woken = 0
+
+    @property
+    def queue_size(self) -> int:
+        """Entries in the heap, including ones for actors that have left the map and are dropped when popped"""
+        return len(self._queue)
+
+    @property
+    def awake_count(self) -> int:
+        return len(self._awake)
+
+    def reset(self) -> None:
+        """Put every actor to sleep, such as when the player moves to a new map"""
+        self._queue.clear()
+        self._awake.clear()
+        self._game_map = None
+
+    def advance(self) -> List[Entity]:
+        """
+        Let game time pass for one action of the player and return the actors that get a turn in that time
+
+        Actors are returned in the order their turns come up. An actor faster than the player can appear more than once.
+        """
+        engine = self.engine
+        game_map = engine.game_map
+        player = engine.player
+        if game_map is not self._game_map:
+            self.reset()
+            self._game_map = game_map
+
+        self.last_woken = self._wake_nearby(game_map, player)
+        self.time += action_delay(player.speed)
+
+        queue = self._queue
+        entities = game_map.entities
+        px, py = player.x, player.y
+        radius = self.sleep_radius
+        turns: List[Entity] = []
+        while queue and queue[0][0] <= self.time:
+            when, _, actor = heapq.heappop(queue)
+            if actor not in entities:
+                self._awake.discard(actor)  # Removed from the map, or unloaded along with its chunk
+                continue
+            if max(abs(actor.x - px), abs(actor.y - py)) > radius:
+                self._awake.discard(actor)
+                self.actors_slept += 1
+                continue
+            turns.append(actor)
+            heapq.heappush(queue, (when + action_delay(actor.speed), next(self._sequence), actor))
+
+        self.player_turns += 1
+        self.actor_turns += len(turns)
+        self.last_actor_turns = len(turns)
+        return turns
+
+    def _wake_nearby(self, game_map: GameMap, player: Entity) -> int:
+        """Schedule every sleeping actor within wake_radius of the player and return how many were woken"""
+        radius = self.wake_radius
+        awake = self._awake
+        woken = 0
+        for actor in game_map.entity_index.entities_in_rect(
+                player.x - radius, player.y - radius, player.x + radius + 1, player.y + radius + 1,
+        ):
+            if actor is player or actor in awake:
+                continue
+            awake.add(actor)
+            heapq.heappush(self._queue, (self.time + action_delay(actor.speed), next(self._sequence), actor))
+            woken += 1
+        self.actors_woken += woken
+        return woken
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for profiling, suitable for dumping as JSON"""
+        return {
+            "time": self.time,
+            "player_turns": self.player_turns,
+            "actor_turns": self.actor_turns,
+            "actors_woken": self.actors_woken,
+            "actors_slept": self.actors_slept,
+            "last_actor_turns": self.last_actor_turns,
+            "last_woken": self.last_woken,
+            "awake": self.awake_count,
+            "queue_size": self.queue_size,
+        }
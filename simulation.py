@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Headless game runner
+
+Drives the Engine without a window: dungeons are generated, actions are performed and enemy turns and FOV updates run
+exactly like in main.main, but nothing is rendered and no input is read. Games are seeded so any run can be repeated,
+and batches of games are spread across every core with multiprocessing.
+
+    python simulation.py --games 1000 --turns 200
+"""
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing
+import random
+import time
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from actions import Action, BumpAction
+from entity import Entity
+from engine import Engine
+import entity_factories
+from procgen import generate_dungeon
+from profiling import profiler
+
+# A policy picks the player's next action, or returns None to end the game
+Policy = Callable[[Engine], Optional[Action]]
+
+DIRECTIONS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+
+class RandomWalkPolicy:
+    """A bot that bumps in a random direction every turn"""
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self._actions: List[Action] = []  # One reusable BumpAction per direction, for self._player
+        self._player: Optional[Entity] = None
+
+    def __call__(self, engine: Engine) -> Optional[Action]:
+        if engine.player is not self._player:
+            self._actions = [BumpAction(engine.player, dx, dy) for dx, dy in DIRECTIONS]
+            self._player = engine.player
+        return self.rng.choice(self._actions)
+
+
+class ScriptedPolicy:
+    """Plays back a fixed sequence of (dx, dy) bumps, then ends the game"""
+    def __init__(self, steps: Sequence[Tuple[int, int]]):
+        self.steps = iter(steps)
+
+    def __call__(self, engine: Engine) -> Optional[Action]:
+        step = next(self.steps, None)
+        if step is None:
+            return None
+        return BumpAction(engine.player, *step)
+
+
+class GameResult(NamedTuple):
+    seed: int
+    turns: int
+    entities: int
+    explored_tiles: int
+    generation_seconds: float
+    simulation_seconds: float
+
+
+class BatchResult(NamedTuple):
+    games: List[GameResult]
+    wall_seconds: float
+    workers: int
+
+    @property
+    def turns(self) -> int:
+        return sum(game.turns for game in self.games)
+
+    @property
+    def turns_per_second(self) -> float:
+        return self.turns / self.wall_seconds
+
+    @property
+    def maps_per_second(self) -> float:
+        return len(self.games) / self.wall_seconds
+
+    def summary(self) -> dict:
+        """Machine readable totals, suitable for tracking in CI"""
+        return {
+            "games": len(self.games),
+            "workers": self.workers,
+            "turns": self.turns,
+            "wall_seconds": self.wall_seconds,
+            "turns_per_second": self.turns_per_second,
+            "maps_per_second": self.maps_per_second,
+            "generation_seconds": sum(game.generation_seconds for game in self.games),
+            "simulation_seconds": sum(game.simulation_seconds for game in self.games),
+        }
+
+
+def new_game(
+        seed: int,
+        map_width: int = 80,
+        map_height: int = 45,
+        room_min_size: int = 6,
+        room_max_size: int = 10,
+        max_rooms: int = 30,
+        max_monsters_per_room: int = 2,
+) -> Engine:
+    """Set up a quiet Engine and its dungeon the same way main.main does, using the given seed"""
+    player = entity_factories.player.instantiate()
+    engine = Engine(player=player, quiet=True)
+    engine.game_map = generate_dungeon(
+        max_rooms=max_rooms,
+        room_min_size=room_min_size,
+        room_max_size=room_max_size,
+        map_width=map_width,
+        map_height=map_height,
+        max_monsters_per_room=max_monsters_per_room,
+        engine=engine,
+        seed=seed,
+    )
+    engine.update_fov()
+    return engine
+
+
+def run_game(seed: int, turns: int, policy: Optional[Policy] = None) -> GameResult:
+    """
+    Play one game for up to the given number of turns. The default policy is a seeded random walk
+
+    Every turn ends a frame of the profiler, which only records anything while it is enabled.
+    """
+    start = time.perf_counter()
+    engine = new_game(seed)
+    generated = time.perf_counter()
+
+    if policy is None:
+        policy = RandomWalkPolicy(seed)
+
+    turn = 0
+    for turn in range(1, turns + 1):
+        action = policy(engine)
+        if action is None:
+            turn -= 1
+            break
+        engine.perform_turn(action)
+        profiler.end_frame(engine)
+    finished = time.perf_counter()
+
+    return GameResult(
+        seed=seed,
+        turns=turn,
+        entities=len(engine.game_map.entities),
+        explored_tiles=int(engine.game_map.explored.sum()),
+        generation_seconds=generated - start,
+        simulation_seconds=finished - generated,
+    )
+
+
+def _run_game_args(args: Tuple[int, int]) -> GameResult:
+    return run_game(*args)
+
+
+def run_games(seeds: Sequence[int], turns: int, workers: Optional[int] = None) -> BatchResult:
+    """Play one random walk game per seed, spread across worker processes. workers defaults to the number of cores"""
+    workers = workers or multiprocessing.cpu_count()
+    start = time.perf_counter()
+    if workers == 1:
+        games = [run_game(seed, turns) for seed in seeds]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            games = pool.map(_run_game_args, [(seed, turns) for seed in seeds], chunksize=16)
+    return BatchResult(games=games, wall_seconds=time.perf_counter() - start, workers=workers)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run seeded headless games and report throughput")
+    parser.add_argument("--games", type=int, default=1000, help="Number of games to play")
+    parser.add_argument("--turns", type=int, default=200, help="Turns per game")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first game, the rest count up from it")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, defaults to every core")
+    parser.add_argument(
+        "--trace", default=None,
+        help="Profile the games and write a trace to this path, CSV if it ends with .csv and JSON otherwise. "
+             "Implies --workers 1",
+    )
+    args = parser.parse_args()
+
+    if args.trace:
+        profiler.enable()
+        args.workers = 1
+    batch = run_games(range(args.seed, args.seed + args.games), args.turns, args.workers)
+    print(json.dumps(batch.summary(), indent=2))
+    if args.trace:
+        profiler.export(args.trace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from entity import Entity
+
+
+class SpatialIndex:
+    """
+    Maps (x, y) positions to the entities standing on them
+
+    The GameMap owns one of these and keeps it up to date through Entity.move, Entity.place and Entity.spawn.
+    Looking up what is at a tile is a single dict lookup instead of a scan over every entity on the map.
+    """
+    def __init__(self) -> None:
+        # Position -> entities on that tile. Almost always a list of length 1
+        self._cells: Dict[Tuple[int, int], List[Entity]] = {}
+        # Entity -> the position it was indexed at, so it can be found again after its x/y have changed
+        self._locations: Dict[Entity, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, entity: Entity) -> bool:
+        return entity in self._locations
+
+    def add(self, entity: Entity) -> None:
+        """Index an entity at its current location. Re-adding an entity simply moves it"""
+        if entity in self._locations:
+            self.remove(entity)
+
+        location = (entity.x, entity.y)
+        self._locations[entity] = location
+        self._cells.setdefault(location, []).append(entity)
+
+    def remove(self, entity: Entity) -> None:
+        """Remove an entity from the index, using the location it was last indexed at"""
+        location = self._locations.pop(entity)
+        cell = self._cells[location]
+        cell.remove(entity)
+        if not cell:
+            del self._cells[location]
+
+    def update(self, entity: Entity) -> None:
+        """Call after an entity's x/y have changed to move it to its new cell. Does nothing if it isn't indexed"""
+        indexed = self._locations.get(entity)
+        if indexed is None or indexed == (entity.x, entity.y):
+            return  # No longer on the map, or nothing moved
+        self.add(entity)
+
+    def entities_at(self, x: int, y: int) -> List[Entity]:
+        """Return the entities at x, y. The returned list must not be modified"""
+        return self._cells.get((x, y), [])
+
+    def blocking_entity_at(self, x: int, y: int) -> Optional[Entity]:
+        """Return the first entity at x, y that blocks movement, if any"""
+        for entity in self._cells.get((x, y), ()):
+            if entity.blocks_movement:
+                return entity
+
+        return None
+
+    def entities_in_rect(self, x1: int, y1: int, x2: int, y2: int) -> Iterator[Entity]:
+        """
+        Yield every entity inside the half open rectangle [x1, x2) x [y1, y2)
+
+        This walks whichever is smaller: the cells of the rectangle or the occupied cells of the index
+        """
+        if (x2 - x1) * (y2 - y1) <= len(self._cells):
+            cells = self._cells
+            for x in range(x1, x2):
+                for y in range(y1, y2):
+                    cell = cells.get((x, y))
+                    if cell:
+                        yield from cell
+        else:
+            for (x, y), cell in self._cells.items():
+                if x1 <= x < x2 and y1 <= y < y2:
+                    yield from cell
@@ -0,0 +1,96 @@
+import random
+from typing import Dict, Set, Tuple
+
+import numpy as np  # type: ignore
+
+from engine import Engine
+from entity_store import EntityStore
+import entity_factories
+from game_map import GameMap
+
+WIDTH, HEIGHT = 12, 9  # Small, so many entities share a tile and the chains get long
+
+
+def new_map() -> GameMap:
+    engine = Engine(player=entity_factories.player.instantiate(), quiet=True)
+    game_map = GameMap(engine, WIDTH, HEIGHT, columnar=True)
+    engine.game_map = game_map
+    return game_map
+
+
+def assert_index_matches(store: EntityStore, reference: Dict[object, Tuple[int, int]]) -> None:
+    """Every tile's next_in_cell chain holds exactly the rows the reference has on that tile"""
+    tiles: Dict[Tuple[int, int], Set[int]] = {}
+    for entity, position in reference.items():
+        tiles.setdefault(position, set()).add(entity.index)
+    for x in range(WIDTH):
+        for y in range(HEIGHT):
+            rows = list(store.rows_at(x, y))
+            assert len(rows) == len(set(rows)), (x, y)  # A chain never visits a row twice
+            assert set(rows) == tiles.get((x, y), set()), (x, y)
+    assert len(store.cells) == len(tiles)
+    assert store.indexed == len(reference)
+
+
+def test_index_follows_moves_removals_and_reused_rows():
+    """The position index stays in step with a plain dict through spawning, moving, removing and respawning"""
+    game_map = new_map()
+    store = game_map.entity_store
+    rng = random.Random(0)
+    reference: Dict[object, Tuple[int, int]] = {}
+
+    def spawn() -> None:
+        x, y = rng.randrange(WIDTH), rng.randrange(HEIGHT)
+        reference[entity_factories.orc.spawn(game_map, x, y)] = (x, y)
+
+    for _ in range(100):
+        spawn()
+    assert_index_matches(store, reference)
+
+    for step in range(2000):
+        roll = rng.random()
+        if roll < 0.6:
+            entity = rng.choice(list(reference))
+            x, y = rng.randrange(WIDTH), rng.randrange(HEIGHT)
+            if roll < 0.3:
+                entity.move(x - entity.x, y - entity.y)
+            else:
+                entity.place(x, y)
+            reference[entity] = (x, y)
+        elif roll < 0.8 and reference:
+            # Releasing a row from the middle of a chain has to splice it out
+            entity = rng.choice(list(reference))
+            game_map.remove_entity(entity)
+            del reference[entity]
+        else:
+            spawn()  # Reuses released rows first
+        if step % 100 == 0:
+            assert_index_matches(store, reference)
+    assert_index_matches(store, reference)
+
+
+def test_bulk_rows_are_indexed():
+    """Rows from spawn_many and extend land in the same chains as rows created one at a time"""
+    game_map = new_map()
+    store = game_map.entity_store
+    rng = np.random.default_rng(1)
+    xs, ys = rng.integers(0, WIDTH, 300), rng.integers(0, HEIGHT, 300)
+
+    reference: Dict[object, Tuple[int, int]] = {}
+    for entity in entity_factories.spawn_many(entity_factories.troll, game_map, xs[:100], ys[:100]):
+        reference[entity] = (entity.x, entity.y)
+    for x, y in zip(xs[100:200].tolist(), ys[100:200].tolist()):
+        reference[entity_factories.orc.spawn(game_map, x, y)] = (x, y)
+    count = 100
+    handles = store.extend(
+        xs[200:], ys[200:], np.full(count, ord("o")), np.zeros((count, 3)), np.ones(count, dtype=bool),
+        np.full(count, 100), ["Orc"] * count,
+    )
+    for entity, x, y in zip(handles, xs[200:].tolist(), ys[200:].tolist()):
+        reference[entity] = (x, y)
+    assert_index_matches(store, reference)
+
+    for entity in list(reference)[::3]:
+        game_map.remove_entity(entity)
+        del reference[entity]
+    assert_index_matches(store, reference)
@@ -0,0 +1,83 @@
+from collections import deque
+
+import numpy as np  # type: ignore
+import pytest
+
+from engine import Engine
+import entity_factories
+from map_analytics import MapAnalytics, label_components
+from procgen import generate_dungeon
+
+
+def bfs_labels(mask: np.ndarray) -> np.ndarray:
+    """
+    Label the 8-way connected areas of mask with a breadth first search from each unlabeled tile
+
+    Tiles are visited in np.nonzero order, so the areas are numbered in the order of their first tile, the same as
+    label_components numbers them.
+    """
+    width, height = mask.shape
+    labels = np.zeros(mask.shape, dtype=np.int32)
+    count = 0
+    for start in zip(*np.nonzero(mask)):
+        if labels[start]:
+            continue
+        count += 1
+        labels[start] = count
+        queue = deque([start])
+        while queue:
+            x, y = queue.popleft()
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    nx, ny = x + dx, y + dy
+                    if 0 <= nx < width and 0 <= ny < height and mask[nx, ny] and not labels[nx, ny]:
+                        labels[nx, ny] = count
+                        queue.append((nx, ny))
+    return labels
+
+
+def snake(width: int, height: int) -> np.ndarray:
+    """One corridor winding back and forth across the whole area, the longest chain a mask of this size can hold"""
+    mask = np.zeros((width, height), dtype=bool)
+    mask[:, ::4] = True
+    mask[-1, 1::8] = mask[-1, 2::8] = mask[-1, 3::8] = True
+    mask[0, 5::8] = mask[0, 6::8] = mask[0, 7::8] = True
+    return mask
+
+
+@pytest.mark.parametrize("density", [0.2, 0.4, 0.6, 0.9])
+def test_random_masks(density):
+    """Densities either side of where the areas join up into one"""
+    rng = np.random.default_rng(int(density * 10))
+    for _ in range(5):
+        mask = rng.random((40, 30)) < density
+        assert np.array_equal(label_components(mask), bfs_labels(mask))
+
+
+def test_long_chains():
+    mask = snake(60, 61)
+    assert np.array_equal(label_components(mask), bfs_labels(mask))
+    assert label_components(mask).max() == 1
+
+
+def test_empty_and_full():
+    for mask in (np.zeros((7, 5), dtype=bool), np.ones((7, 5), dtype=bool)):
+        assert np.array_equal(label_components(mask), bfs_labels(mask))
+
+
+def test_generated_map():
+    """The components of a generated map, and reachability between every pair of tiles"""
+    engine = Engine(player=entity_factories.player.instantiate(), quiet=True)
+    game_map = generate_dungeon(
+        max_rooms=30, room_min_size=6, room_max_size=10, map_width=80, map_height=45, max_monsters_per_room=0,
+        engine=engine, seed=3,
+    )
+    walkable = np.asarray(game_map.tiles["walkable"])
+    analytics = MapAnalytics(game_map)
+    expected = bfs_labels(walkable)
+    assert np.array_equal(analytics.components, expected)
+
+    rng = np.random.default_rng(0)
+    for x1, y1, x2, y2 in rng.integers(0, (80, 45, 80, 45), (500, 4)).tolist():
+        reachable = bool(expected[x1, y1]) and expected[x1, y1] == expected[x2, y2]
+        assert analytics.is_reachable(x1, y1, x2, y2) == reachable
@@ -0,0 +1,83 @@
+import numpy as np  # type: ignore
+import tcod.path
+
+from engine import Engine
+import entity_factories
+from game_map import GameMap
+from pathfinding import FlowField, UNREACHABLE
+from procgen import generate_dungeon
+import tile_types
+
+
+def new_map(seed: int = 0) -> GameMap:
+    engine = Engine(player=entity_factories.player.instantiate(), quiet=True)
+    return generate_dungeon(
+        max_rooms=30, room_min_size=6, room_max_size=10, map_width=80, map_height=45, max_monsters_per_room=0,
+        engine=engine, seed=seed,
+    )
+
+
+def dijkstra(walkable: np.ndarray, goal_x: int, goal_y: int) -> np.ndarray:
+    """Distances to the goal over walkable, straight from tcod with the same step costs as FlowField"""
+    distance = tcod.path.maxarray(walkable.shape, dtype=np.int32, order="F")
+    distance[goal_x, goal_y] = 0
+    tcod.path.dijkstra2d(distance, walkable.astype(np.int8), 2, 3, out=distance)
+    return distance
+
+
+def field_distances(field: FlowField, game_map: GameMap) -> np.ndarray:
+    return np.array([[field.distance_at(x, y) for y in range(game_map.height)] for x in range(game_map.width)])
+
+
+def assert_field_matches(field: FlowField, game_map: GameMap, goal_x: int, goal_y: int) -> None:
+    walkable = np.asarray(game_map.tiles["walkable"])
+    assert np.array_equal(field_distances(field, game_map), dijkstra(walkable, goal_x, goal_y))
+
+
+def test_reused_field_tracks_goal_and_tiles():
+    """A field kept across updates always matches a fresh Dijkstra, and is only recomputed when it has to be"""
+    game_map = new_map()
+    field = FlowField()
+    goal = game_map.engine.player.x, game_map.engine.player.y
+    assert field.update(game_map, *goal)
+    assert_field_matches(field, game_map, *goal)
+
+    # Nothing changed, the field is reused as is
+    assert not field.update(game_map, *goal)
+    assert field.recomputes == 1
+
+    # The goal moves to another walkable tile
+    xs, ys = np.nonzero(np.asarray(game_map.tiles["walkable"]))
+    goal = int(xs[len(xs) // 2]), int(ys[len(ys) // 2])
+    assert field.update(game_map, *goal)
+    assert_field_matches(field, game_map, *goal)
+
+    # A wall goes up across the map, so some distances grow and some tiles are cut off
+    game_map.set_tiles((slice(goal[0] + 3, goal[0] + 4), slice(None)), tile_types.wall)
+    assert field.update(game_map, *goal)
+    assert_field_matches(field, game_map, *goal)
+    assert field.recomputes == 3
+
+    # The same goal on another map of the same size
+    other = new_map(seed=1)
+    assert field.update(other, other.engine.player.x, other.engine.player.y)
+    assert_field_matches(field, other, other.engine.player.x, other.engine.player.y)
+
+
+def test_windowed_field():
+    """With a radius, the field inside the window is Dijkstra over the window alone and the rest is UNREACHABLE"""
+    game_map = new_map()
+    field = FlowField()
+    walkable = np.asarray(game_map.tiles["walkable"])
+    radius = 8
+    for goal_x, goal_y in zip(*np.nonzero(walkable)[:2]):
+        if (goal_x + goal_y) % 97:
+            continue  # A spread of goals, some of them near the edges of the map
+        goal_x, goal_y = int(goal_x), int(goal_y)
+        field.update(game_map, goal_x, goal_y, radius)
+        x1, y1 = max(0, goal_x - radius), max(0, goal_y - radius)
+        x2, y2 = min(game_map.width, goal_x + radius + 1), min(game_map.height, goal_y + radius + 1)
+
+        expected = np.full(walkable.shape, UNREACHABLE)
+        expected[x1:x2, y1:y2] = dijkstra(walkable[x1:x2, y1:y2], goal_x - x1, goal_y - y1)
+        assert np.array_equal(field_distances(field, game_map), expected), (goal_x, goal_y)
@@ -0,0 +1,41 @@
+import numpy as np  # type: ignore
+import pytest
+
+from engine import Engine
+import entity_factories
+from procgen import generate_dungeon
+from savegame import load_game, save_game
+
+
+def new_game(compact_tiles: bool, columnar: bool) -> Engine:
+    engine = Engine(player=entity_factories.player.instantiate(), quiet=True)
+    engine.game_map = generate_dungeon(
+        max_rooms=30, room_min_size=6, room_max_size=10, map_width=80, map_height=45, max_monsters_per_room=2,
+        engine=engine, seed=0, compact_tiles=compact_tiles, columnar=columnar,
+    )
+    engine.update_fov()
+    return engine
+
+
+def entities(engine: Engine) -> list:
+    return sorted((entity.x, entity.y, entity.char, entity.name, entity.speed) for entity in engine.game_map.entities)
+
+
+@pytest.mark.parametrize("compact_tiles", [False, True])
+@pytest.mark.parametrize("columnar", [False, True])
+def test_save_over_loaded_game(tmp_path, compact_tiles, columnar):
+    """Saving a loaded game back to the file it is memory-mapped from keeps the game intact"""
+    path = str(tmp_path / "game.sav")
+    engine = new_game(compact_tiles, columnar)
+    save_game(engine, path)
+
+    loaded = load_game(path, quiet=True, columnar=columnar)
+    loaded.game_map.explored[:] = True  # A change that is only in the copy-on-write mapping
+    save_game(loaded, path)
+
+    reloaded = load_game(path, quiet=True, columnar=columnar)
+    assert reloaded.game_map.explored.all()
+    assert np.array_equal(reloaded.game_map.tiles["walkable"], engine.game_map.tiles["walkable"])
+    assert entities(reloaded) == entities(engine)
+    assert (reloaded.player.x, reloaded.player.y) == (engine.player.x, engine.player.y)
+    assert [entry.name for entry in tmp_path.iterdir()] == ["game.sav"]  # No temporary file left behind
@@ -0,0 +1,85 @@
+import random
+from typing import Set
+
+from engine import Engine
+from entity import Entity
+import entity_factories
+from game_map import GameMap
+from scheduler import TurnScheduler
+import tile_types
+
+SIZE = 60
+WAKE_RADIUS = 6
+SLEEP_RADIUS = 10
+
+
+def new_map() -> GameMap:
+    engine = Engine(player=entity_factories.player.instantiate(), quiet=True)
+    game_map = GameMap(engine, SIZE, SIZE)
+    engine.game_map = game_map
+    game_map.set_tiles(..., tile_types.floor)
+    engine.player.place(SIZE // 2, SIZE // 2, game_map)
+    return game_map
+
+
+def distance(entity: Entity, player: Entity) -> int:
+    return max(abs(entity.x - player.x), abs(entity.y - player.y))
+
+
+def hop(entity: Entity, reach: int, rng: random.Random) -> None:
+    """Move up to reach tiles along each axis, staying on the map"""
+    entity.place(
+        min(max(entity.x + rng.randint(-reach, reach), 0), SIZE - 1),
+        min(max(entity.y + rng.randint(-reach, reach), 0), SIZE - 1),
+    )
+
+
+def test_sleep_and_wake_radii():
+    """
+    Actors wake within WAKE_RADIUS of the player, stay awake until they are more than SLEEP_RADIUS away, and only
+    awake actors get turns. Checked against a plain set of awake actors while the player and actors jump around
+    """
+    game_map = new_map()
+    engine = game_map.engine
+    player = engine.player
+    scheduler = TurnScheduler(engine, wake_radius=WAKE_RADIUS, sleep_radius=SLEEP_RADIUS)
+    rng = random.Random(0)
+    actors = [entity_factories.orc.spawn(game_map, rng.randrange(SIZE), rng.randrange(SIZE)) for _ in range(200)]
+    awake: Set[Entity] = set()
+
+    for turn in range(300):
+        # Short hops, so actors spend turns between the two radii as well as crossing them
+        hop(player, 2, rng)
+        for actor in rng.sample(actors, 20):
+            hop(actor, 3, rng)
+        if turn % 50 == 25:
+            gone = actors.pop(rng.randrange(len(actors)))  # Leaves the map while it may be awake
+            game_map.remove_entity(gone)
+            awake.discard(gone)
+
+        awake |= {actor for actor in actors if distance(actor, player) <= WAKE_RADIUS}
+        awake -= {actor for actor in awake if distance(actor, player) > SLEEP_RADIUS}
+
+        turns = scheduler.advance()
+        assert len(turns) == len(set(turns))  # Everyone has the player's speed, one turn each
+        assert set(turns) == awake, turn
+        assert scheduler.awake_count == len(awake)
+
+
+def test_fast_actors_wake_and_act_twice():
+    """An actor twice the player's speed gets two turns per player action once woken, and none while asleep"""
+    game_map = new_map()
+    engine = game_map.engine
+    player = engine.player
+    scheduler = TurnScheduler(engine, wake_radius=WAKE_RADIUS, sleep_radius=SLEEP_RADIUS)
+    fast = entity_factories.orc.spawn(game_map, player.x + WAKE_RADIUS + 1, player.y)
+    fast.speed = 200
+
+    assert scheduler.advance() == []  # Just outside the wake radius
+    fast.place(player.x + WAKE_RADIUS, player.y)
+    assert scheduler.advance() == [fast, fast]
+    fast.place(player.x + SLEEP_RADIUS, player.y)
+    assert scheduler.advance() == [fast, fast]  # Between the radii it stays awake
+    fast.place(player.x + SLEEP_RADIUS + 1, player.y)
+    assert scheduler.advance() == []
+    assert scheduler.actors_slept == 1
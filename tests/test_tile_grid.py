@@ -0,0 +1,78 @@
+import random
+
+import numpy as np  # type: ignore
+
+from tile_grid import PaletteTiles
+import tile_types
+
+WIDTH, HEIGHT = 30, 20
+FIELDS = ("walkable", "transparent", "dark", "light")
+
+
+def numbered_tile(number: int) -> np.ndarray:
+    """A distinct tile for every number, with walkable and transparent varying too"""
+    return tile_types.new_tile(
+        walkable=number % 2,
+        transparent=number % 3 == 0,
+        dark=(number, (number % 256, 0, 0), (0, 0, 0)),
+        light=(number, (0, number % 256, 0), (0, 0, 0)),
+    )
+
+
+def random_key(rng: random.Random):
+    """An index of the kinds the game writes tiles with: one tile, a window, a whole row or column, or a mask"""
+    kind = rng.randrange(4)
+    if kind == 0:
+        return rng.randrange(WIDTH), rng.randrange(HEIGHT)
+    if kind == 1:
+        x, y = rng.randrange(WIDTH), rng.randrange(HEIGHT)
+        return slice(x, x + rng.randrange(1, 8)), slice(y, y + rng.randrange(1, 8))
+    if kind == 2:
+        return (rng.randrange(WIDTH), slice(None)) if rng.random() < 0.5 else (slice(None), rng.randrange(HEIGHT))
+    return np.random.default_rng(rng.randrange(2 ** 32)).random((WIDTH, HEIGHT)) < 0.1
+
+
+def test_fields_follow_every_write():
+    """
+    Reading a field after each write gives the same as the full tile_dt array written the same way, even though the
+    fields are cached between writes
+    """
+    rng = random.Random(0)
+    tiles = PaletteTiles(WIDTH, HEIGHT, fill=tile_types.wall)
+    reference = np.full((WIDTH, HEIGHT), fill_value=tile_types.wall, order="F")
+    choices = [tile_types.floor, tile_types.wall, tile_types.down_stairs]
+
+    for step in range(500):
+        key = random_key(rng)
+        if rng.random() < 0.3:
+            # An array of mixed tiles rather than a single one
+            shape = reference[key].shape
+            value = np.array(choices, dtype=tile_types.tile_dt)[
+                np.random.default_rng(step).integers(0, len(choices), shape)
+            ]
+        else:
+            value = rng.choice(choices)
+        tiles[key] = value
+        reference[key] = value
+
+        for field in rng.sample(FIELDS, 2):  # Some fields stay cached across several writes before being read
+            assert np.array_equal(tiles[field], reference[field]), (step, field)
+    assert np.array_equal(np.asarray(tiles), reference)
+
+
+def test_palette_grows_past_256_tiles():
+    """New tiles are added to the palette, and the IDs widen once there are too many for a byte"""
+    tiles = PaletteTiles(WIDTH, HEIGHT, fill=tile_types.wall)
+    reference = np.full((WIDTH, HEIGHT), fill_value=tile_types.wall, order="F")
+    tiles["walkable"]  # Cached before the palette changes
+
+    for number in range(300):
+        x, y = number % WIDTH, number // WIDTH
+        tiles[x, y] = numbered_tile(number)
+        reference[x, y] = numbered_tile(number)
+    assert tiles.ids.dtype == np.uint16
+    for field in FIELDS:
+        assert np.array_equal(tiles[field], reference[field]), field
+
+    graphics = tiles.graphics(np.ones((WIDTH, HEIGHT), dtype=bool), np.ones((WIDTH, HEIGHT), dtype=bool))
+    assert np.array_equal(graphics, reference["light"])
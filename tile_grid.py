@@ -0,0 +1,104 @@
+from __future__ import annotations
+from typing import Dict, Optional, Tuple
+
+import numpy as np  # type: ignore
+import tile_types
+
+
+class PaletteTiles:
+    """
+    A compact stand in for a (width, height) array of tile_dt records
+
+    Every tile_dt record is 22 bytes, but a map only ever uses a handful of different tiles. This stores one small
+    integer tile ID per cell plus a palette holding each distinct tile once. Anything derived from the tiles is looked
+    up through the palette: tiles["walkable"] and tiles["transparent"] are built with a single palette index and then
+    cached until a tile changes, and render graphics come from one gather over a combined light/dark/SHROUD palette.
+
+    It is indexed like the array it replaces, tiles[x, y] = tile_types.floor, tiles["walkable"][x, y] and so on.
+    """
+    def __init__(self, width: int, height: int, fill: np.ndarray):
+        self.palette = np.array([fill], dtype=tile_types.tile_dt)
+        self.ids = np.zeros((width, height), dtype=np.uint8, order="F")
+        self._fields: Dict[str, np.ndarray] = {}  # Cached per field arrays, see __getitem__
+        self._graphics: Optional[np.ndarray] = None  # Cached light + dark + SHROUD palette, see graphics
+
+    @classmethod
+    def from_ids(cls, ids: np.ndarray, palette: np.ndarray) -> PaletteTiles:
+        """Wrap an existing tile ID array and its palette, without copying either"""
+        tiles = cls.__new__(cls)  # Skips allocating the arrays that would be replaced right away
+        tiles.ids, tiles.palette = ids, palette
+        tiles._fields, tiles._graphics = {}, None
+        return tiles
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.ids.shape
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the tile IDs and palette, not counting cached fields"""
+        return self.ids.nbytes + self.palette.nbytes
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        """Decode into a full tile_dt array, for code that needs the real thing"""
+        tiles = self.palette[self.ids]
+        return tiles if dtype is None else tiles.astype(dtype)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            # Masks such as walkable and transparent are read every turn, so keep them until the tiles change
+            field = self._fields.get(key)
+            if field is None:
+                field = np.asfortranarray(self.palette[key][self.ids])
+                self._fields[key] = field
+            return field
+        return self.palette[self.ids[key]]
+
+    def __setitem__(self, key, value) -> None:
+        value = np.asarray(value, dtype=tile_types.tile_dt)
+        if value.ndim == 0:
+            self.ids[key] = self.tile_id(value)
+        else:
+            # Map every distinct tile in value to its ID, then write all the IDs at once
+            ids = np.zeros(value.shape, dtype=np.uint16)
+            unmatched = np.ones(value.shape, dtype=bool)
+            while unmatched.any():
+                tile = value[unmatched][0]
+                matches = value == tile
+                ids[matches] = self.tile_id(tile)
+                unmatched &= ~matches
+            self.ids[key] = ids
+        self._fields.clear()
+
+    def tile_id(self, tile: np.ndarray) -> int:
+        """Return the palette index of a tile, adding it to the palette if it's new"""
+        matches = np.flatnonzero(self.palette == tile)
+        if len(matches):
+            return int(matches[0])
+
+        self.palette = np.append(self.palette, np.asarray(tile, dtype=tile_types.tile_dt).reshape(1))
+        self._graphics = None
+        if len(self.palette) > np.iinfo(self.ids.dtype).max + 1:
+            self.ids = self.ids.astype(np.uint16, order="F")  # More than 256 different tiles
+        return len(self.palette) - 1
+
+    def graphics(self, visible: np.ndarray, explored: np.ndarray, window=...) -> np.ndarray:
+        """
+        Return the graphic_dt array to draw, the same as GameMap.render's np.select but with a single gather
+
+        The palette's light graphics, then its dark graphics, then SHROUD are joined into one lookup table, and each
+        cell picks its entry from that table based on its tile ID and whether it is visible or explored.
+        window limits the result to self.ids[window], visible and explored must then be that size already.
+        """
+        count = len(self.palette)
+        if self._graphics is None:
+            self._graphics = np.concatenate(
+                [self.palette["light"], self.palette["dark"], tile_types.SHROUD.reshape(1)]
+            )
+
+        index = self.ids[window].astype(np.intp)  # Light, if visible
+        np.add(index, count, out=index, where=~visible)  # Dark, if only explored
+        np.copyto(index, 2 * count, where=~(visible | explored))  # SHROUD otherwise
+        # np.take is much faster than fancy indexing with structured dtypes. It always returns a C ordered array, so
+        # take along the transposed index to get the result back in order="F"
+        return np.take(self._graphics, index.T).T
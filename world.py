@@ -0,0 +1,176 @@
+"""
+A dungeon of several floors connected by stairs
+
+Floor 0 is the top, and every floor is generated from its own seed, derived from the world's seed and its depth, so
+the same world seed always gives the same dungeon.
+
+World keeps the max_loaded most recently visited floors in memory. A floor pushed out of that budget is packed into a
+MapSnapshot, explored tiles included, and written to cache_dir. Coming back to it unpacks the file again.
+
+While the player is on a floor, the floor below it is generated in a background worker process, the same way
+procgen.generate_many does. Taking the stairs down then only has to unpack the finished snapshot.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+import os
+import pickle
+import shutil
+import tempfile
+from typing import Dict, Optional, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+import procgen
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ProcessPoolExecutor
+    from engine import Engine
+    from game_map import GameMap
+
+
+class World:
+    """
+    The floors of the dungeon, and which one the player is on
+
+    The generation options mean the same as for procgen.generate_many. columnar and compact_tiles are used for the
+    GameMaps floors are unpacked into, see GameMap. pregenerate=False generates every floor when it is first entered,
+    in this process.
+    """
+    def __init__(
+            self,
+            engine: Engine,
+            seed: int = 0,
+            max_loaded: int = 3,
+            cache_dir: Optional[str] = None,
+            pregenerate: bool = True,
+            max_rooms: int = 30,
+            room_min_size: int = 6,
+            room_max_size: int = 10,
+            map_width: int = 80,
+            map_height: int = 45,
+            max_monsters_per_room: int = 2,
+            vectorized: bool = False,
+            columnar: bool = False,
+            compact_tiles: bool = False,
+    ):
+        self.engine = engine
+        self.seed = seed
+        self.max_loaded = max(max_loaded, 1)
+        self.pregenerate = pregenerate
+        self.generation_options = dict(
+            max_rooms=max_rooms,
+            room_min_size=room_min_size,
+            room_max_size=room_max_size,
+            map_width=map_width,
+            map_height=map_height,
+            max_monsters_per_room=max_monsters_per_room,
+        )
+        self.vectorized = vectorized
+        self.columnar = columnar
+        self.compact_tiles = compact_tiles
+
+        self.depth = 0  # The floor the player is on
+        self.floors: OrderedDict[int, GameMap] = OrderedDict()  # Loaded floors, least recently visited first
+        self._owns_cache_dir = cache_dir is None
+        self.cache_dir = cache_dir or tempfile.mkdtemp(prefix="floors-")
+        self._pending: Dict[int, Future] = {}  # Floors being generated in the background
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def close(self) -> None:
+        """Stop the background worker and drop every floor, and the cache directory if this world created it"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._pending.clear()
+        self.floors.clear()
+        if self._owns_cache_dir:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def __enter__(self) -> World:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def floor_seed(self, depth: int) -> int:
+        """The seed floor depth is generated from"""
+        return int(np.random.SeedSequence([self.seed, depth]).generate_state(1)[0])
+
+    def _path(self, depth: int) -> str:
+        return os.path.join(self.cache_dir, f"floor_{depth}.snapshot")
+
+    def enter(self, depth: int) -> GameMap:
+        """
+        Make floor depth the engine's map and put the player on it
+
+        The player arrives on the floor's up stairs when coming down and on its down stairs when coming up. On the first
+        floor entered the player starts where the generator put them.
+        """
+        game_map = self._load(depth)
+        arrival = None
+        if depth > self.depth:
+            arrival = game_map.upstairs_location
+        elif depth < self.depth:
+            arrival = game_map.downstairs_location
+        if arrival is not None:
+            self.engine.player.place(*arrival, game_map)
+
+        self.depth = depth
+        self.engine.game_map = game_map
+        self._evict()
+        if self.pregenerate:
+            self.prepare(depth + 1)
+        return game_map
+
+    def descend(self) -> GameMap:
+        """Take the stairs down"""
+        return self.enter(self.depth + 1)
+
+    def ascend(self) -> GameMap:
+        """Take the stairs up"""
+        return self.enter(self.depth - 1)
+
+    def _load(self, depth: int) -> GameMap:
+        """Return floor depth, unpacking or generating it if it isn't in memory. It becomes the most recently used"""
+        game_map = self.floors.get(depth)
+        if game_map is not None:
+            self.floors.move_to_end(depth)
+            return game_map
+
+        path = self._path(depth)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                snapshot = pickle.load(f)
+        elif depth in self._pending:
+            snapshot = self._pending.pop(depth).result()  # Only waits if the player got here before the worker did
+        else:
+            snapshot = procgen.generate_snapshot(self.floor_seed(depth), self.generation_options, self.vectorized)
+
+        game_map = procgen.restore_map(
+            snapshot, self.engine, columnar=self.columnar, compact_tiles=self.compact_tiles,
+        )
+        if depth > 0 and game_map.upstairs_location is None:
+            # A new floor, the way back up is where the player starts
+            procgen.place_upstairs(game_map, *snapshot.player_xy)
+        self.floors[depth] = game_map
+        return game_map
+
+    def _evict(self) -> None:
+        """Write the least recently visited floors to disk until no more than max_loaded are left in memory"""
+        while len(self.floors) > self.max_loaded:
+            depth, game_map = self.floors.popitem(last=False)
+            snapshot = procgen.snapshot_map(game_map, self.floor_seed(depth))
+            with open(self._path(depth), "wb") as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def prepare(self, depth: int) -> None:
+        """Start generating floor depth in the background, unless it already exists or is on its way"""
+        if depth in self.floors or depth in self._pending or os.path.exists(self._path(depth)):
+            return
+        if self._executor is None:
+            # Imported on first use, starting the game doesn't need it
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=1)
+        self._pending[depth] = self._executor.submit(
+            procgen.generate_snapshot, self.floor_seed(depth), self.generation_options, self.vectorized,
+        )